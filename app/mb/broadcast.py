@@ -0,0 +1,189 @@
+import asyncio
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+from websockets.protocol import State
+
+from app import logger
+
+# Slow-consumer policies, applied when a client's send queue is full
+DROP = 'drop'              # Discard intermediate updates (deltas, interim summaries, status) for that client
+LATEST = 'latest'          # Discard the oldest queued messages and keep the newest
+DISCONNECT = 'disconnect'  # Close the connection; the client can reconnect and catch up
+POLICIES = (DROP, LATEST, DISCONNECT)
+
+# Updates that a later message supersedes, so a lagging client loses nothing it needs
+INTERMEDIATE = {"summary_delta", "final_summary_delta", "summary", "llm_status", "sessions"}
+
+SLOW_CONSUMER_CLOSE_CODE = 1008
+
+
+def log_preview(message: dict, limit: int = 120) -> str:
+    """A bounded one-line description of a message for the logs."""
+    text = message.get("text")
+    if not isinstance(text, str):
+        return f"{message.get('type') or message.get('action')}"
+    preview = text if len(text) <= limit else f"{text[:limit]}... ({len(text)} chars)"
+    return f"{message.get('type') or message.get('action')}: {preview!r}"
+
+
+class ClientQueue:
+    """Bounded send queue for one client, drained by its own sender task."""
+
+    def __init__(self, websocket, max_size: int, policy: str):
+        self.websocket = websocket
+        self.max_size = max(max_size, 1)
+        self.policy = policy
+        self.frames = deque()  # (message type, frame, replayed)
+        self.replayed = 0  # Queued replay frames, which do not count against max_size
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.stats = {"sent": 0, "dropped": 0, "bytes": 0, "max_depth": 0}
+        self.task = asyncio.create_task(self._sender())
+
+    @property
+    def depth(self) -> int:
+        return len(self.frames)
+
+    def put(self, message_type: str, frame, force: bool = False) -> bool:
+        """Queue a frame without waiting; returns False if it was dropped or the client cut off.
+
+        force skips the size limit, for a replay the client asked for.
+        """
+        if self.closed:
+            return False
+        if not force and self.depth - self.replayed >= self.max_size and not self._make_room(message_type):
+            return False
+        self.frames.append((message_type, frame, force))
+        self.replayed += force
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self.frames))
+        self.ready.set()
+        return True
+
+    def _make_room(self, message_type: str) -> bool:
+        if self.policy == LATEST:
+            index = next(i for i, (_, _, replayed) in enumerate(self.frames) if not replayed)
+            del self.frames[index]
+            self._dropped()
+            return True
+        if self.policy == DROP:
+            if message_type in INTERMEDIATE:
+                self._dropped()
+                return False
+            for index, (queued_type, _, replayed) in enumerate(self.frames):
+                if queued_type in INTERMEDIATE and not replayed:
+                    del self.frames[index]
+                    self._dropped()
+                    return True
+        # Nothing can be dropped without losing data the client needs
+        logger.warning(f"Disconnecting slow client after {len(self.frames)} queued messages")
+        self.close()
+        asyncio.create_task(self.websocket.close(SLOW_CONSUMER_CLOSE_CODE, "Client is too slow"))
+        return False
+
+    def _dropped(self):
+        self.stats["dropped"] += 1
+        if self.stats["dropped"] == 1 or self.stats["dropped"] % 100 == 0:
+            logger.warning(f"Slow client: {self.stats['dropped']} message(s) dropped so far")
+
+    async def _sender(self):
+        while not self.closed:
+            if not self.frames:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            _, frame, replayed = self.frames.popleft()
+            self.replayed -= replayed
+            try:
+                await self.websocket.send(frame)
+            except Exception as e:
+                logger.info(f"Stopped sending to client: {e}")
+                self.close()
+                return
+            self.stats["sent"] += 1
+            self.stats["bytes"] += len(frame)
+
+    async def drain(self):
+        """Wait until every queued frame has been handed to the connection."""
+        while self.frames and not self.closed:
+            await asyncio.sleep(0.01)
+
+    def close(self):
+        self.closed = True
+        self.frames.clear()
+        self.replayed = 0
+        self.ready.set()
+
+    def snapshot(self) -> dict:
+        return {"depth": self.depth, **self.stats}
+
+
+class Broadcaster:
+    """Fans messages out to many clients without waiting for any of them.
+
+    Each message is encoded once per wire format and queued for every recipient; one
+    sender task per client drains its queue, so a stalled client only delays itself.
+    """
+
+    def __init__(self, codec_for: Callable, max_queue: int = 256, policy: str = DROP):
+        if policy not in POLICIES:
+            logger.warning(f"Unknown slow consumer policy {policy!r}, using {DROP!r}")
+            policy = DROP
+        self.codec_for = codec_for
+        self.max_queue = max_queue
+        self.policy = policy
+        self.queues: Dict[object, ClientQueue] = {}
+
+    def queue(self, websocket) -> ClientQueue:
+        client_queue = self.queues.get(websocket)
+        if client_queue is None or client_queue.closed:
+            client_queue = ClientQueue(websocket, self.max_queue, self.policy)
+            self.queues[websocket] = client_queue
+        return client_queue
+
+    def remove(self, websocket):
+        client_queue = self.queues.pop(websocket, None)
+        if client_queue is not None:
+            client_queue.close()
+            client_queue.task.cancel()  # It may be stuck sending to a dead connection
+
+    def publish(self, clients: Iterable, message: dict) -> int:
+        """Queue the message for every open client; returns how many accepted it."""
+        frames = {}
+        accepted = 0
+        for client in list(clients):
+            if client.state != State.OPEN:
+                continue
+            codec = self.codec_for(client)
+            if codec.format not in frames:
+                frames[codec.format] = codec.encode(message)
+            accepted += self.queue(client).put(message.get("type"), frames[codec.format])
+        logger.debug(f"Queued {log_preview(message)} for {accepted} client(s)")
+        return accepted
+
+    def replay(self, websocket, messages: Iterable[dict]) -> int:
+        """Queue past messages for one client ahead of anything published after this call."""
+        codec = self.codec_for(websocket)
+        client_queue = self.queue(websocket)
+        return sum(client_queue.put(message.get("type"), codec.encode(message), force=True) for message in messages)
+
+    async def drain(self, clients: Iterable, timeout: Optional[float] = None):
+        """Wait (up to timeout) for the given clients' queues to empty, e.g. before shutdown."""
+        drains = [self.queues[c].drain() for c in list(clients) if c in self.queues]
+        if drains:
+            await asyncio.wait([asyncio.ensure_future(d) for d in drains], timeout=timeout)
+
+    def stats(self) -> dict:
+        """Per-client queue depth and delivery counters."""
+        stats = {}
+        for index, (websocket, client_queue) in enumerate(self.queues.items(), 1):
+            address = getattr(websocket, "remote_address", None)
+            name = f"{address[0]}:{address[1]}" if address else f"client{index}"
+            stats[name] = client_queue.snapshot()
+        return stats
+
+    async def close(self):
+        tasks = [client_queue.task for client_queue in self.queues.values()]
+        for websocket in list(self.queues):
+            self.remove(websocket)
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -24,12 +24,29 @@ class Config:
 
     # Websocket settings
     websocket_port: int = int(os.getenv('WEBSOCKET_PORT', '9876'))
+    websocket_compression: bool = os.getenv('WEBSOCKET_COMPRESSION', 'true').lower() == 'true'
+    websocket_wire_format: str = os.getenv('WEBSOCKET_WIRE_FORMAT', 'msgpack')
+    broadcast_queue_size: int = int(os.getenv('BROADCAST_QUEUE_SIZE', '256'))
+    slow_consumer_policy: str = os.getenv('SLOW_CONSUMER_POLICY', 'drop')
+    event_log_size: int = int(os.getenv('EVENT_LOG_SIZE', '1000'))
+    reconnect_grace_seconds: float = float(os.getenv('RECONNECT_GRACE_SECONDS', '30'))
+    tracing_enabled: bool = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+    loop_block_threshold: float = float(os.getenv('LOOP_BLOCK_THRESHOLD', '0.1'))
+    metrics_port: int = int(os.getenv('METRICS_PORT', '9877'))
+    max_sessions: int = int(os.getenv('MAX_SESSIONS', '4'))
+    file_chunk_size: int = int(os.getenv('FILE_CHUNK_SIZE', '65536'))
+    file_transfer_compression: bool = os.getenv('FILE_TRANSFER_COMPRESSION', 'true').lower() == 'true'
 
     # File paths from app.__init__
     watch_directory: str = WATCH_DIRECTORY
     output_directory: str = OUTPUT_DIRECTORY
     context_directory: str = CONTEXT_DIRECTORY
     prompts_directory: str = os.path.abspath(os.path.join(ROOT_PATH, 'app/prompts'))
+    prompt_reload_interval: float = float(os.getenv('PROMPT_RELOAD_INTERVAL', '2'))
+    context_top_k: int = int(os.getenv('CONTEXT_TOP_K', '5'))
+    context_token_budget: int = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
+    context_chunk_tokens: int = int(os.getenv('CONTEXT_CHUNK_TOKENS', '300'))
+    context_refresh_interval: float = float(os.getenv('CONTEXT_REFRESH_INTERVAL', '5'))
 
     # Meeting notes settings
     meeting_prompt_file: str = os.getenv('MEETING_PROMPT_FILE', 'app/prompts/meeting_prompt.md')
@@ -38,9 +55,44 @@ class Config:
     openai_model: str = os.getenv('OPENAI_MODEL', 'gpt-4o')
     check_interval: int = int(os.getenv('CHECK_INTERVAL', '120'))
     summary_interval: int = int(os.getenv('SUMMARY_INTERVAL', '5'))
+    summary_min_new_words: int = int(os.getenv('SUMMARY_MIN_NEW_WORDS', '40'))
+    summary_max_interval: int = int(os.getenv('SUMMARY_MAX_INTERVAL', '120'))
+    summary_idle_seconds: int = int(os.getenv('SUMMARY_IDLE_SECONDS', '60'))
+    rolling_window_seconds: int = int(os.getenv('ROLLING_WINDOW_SECONDS', '60'))
+    rolling_windows_per_fold: int = int(os.getenv('ROLLING_WINDOWS_PER_FOLD', '10'))
     log_level: int = os.getenv('log_level', 'INFO')
     local_llm_model: str = os.getenv('LLM_MODEL', 'ollama/mistral:v0.3-32k')
+    local_llm_context_tokens: int = int(os.getenv('LLM_CONTEXT_TOKENS', '32768'))
+    openai_context_tokens: int = int(os.getenv('OPENAI_CONTEXT_TOKENS', '128000'))
+    llm_max_output_tokens: int = int(os.getenv('LLM_MAX_OUTPUT_TOKENS', '4000'))
+    chunk_overlap_tokens: int = int(os.getenv('CHUNK_OVERLAP_TOKENS', '200'))
+    summary_parallelism: int = int(os.getenv('SUMMARY_PARALLELISM', '4'))
+    stream_summaries: bool = os.getenv('STREAM_SUMMARIES', 'true').lower() == 'true'
+    llm_cache_enabled: bool = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    llm_cache_directory: str = os.path.abspath(os.path.join(ROOT_PATH, os.getenv('LLM_CACHE_DIRECTORY', './cache/llm')))
+    llm_cache_size_mb: int = int(os.getenv('LLM_CACHE_SIZE_MB', '256'))
+    llm_cache_ttl_seconds: int = int(os.getenv('LLM_CACHE_TTL_SECONDS', '604800'))
     openai_api_key: str = os.getenv('OPENAI_API_KEY', '')
+    local_llm_api_base: str = os.getenv('LLM_API_BASE', '')
+    local_llm_api_key: str = os.getenv('LLM_API_KEY', '')
+    openai_base_url: str = os.getenv('OPENAI_BASE_URL', '')
+    local_llm_timeout: float = float(os.getenv('LLM_TIMEOUT', '120'))
+    openai_timeout: float = float(os.getenv('OPENAI_TIMEOUT', '60'))
+    llm_max_retries: int = int(os.getenv('LLM_MAX_RETRIES', '2'))
+    llm_max_connections: int = int(os.getenv('LLM_MAX_CONNECTIONS', '10'))
+    llm_warm_up: bool = os.getenv('LLM_WARM_UP', 'true').lower() == 'true'
+    llm_keep_alive_interval: float = float(os.getenv('LLM_KEEP_ALIVE_INTERVAL', '240'))
+    meeting_token_budget: int = int(os.getenv('MEETING_TOKEN_BUDGET', '0'))
+    meeting_budget_near_ratio: float = float(os.getenv('MEETING_BUDGET_NEAR_RATIO', '0.8'))
+    meeting_budget_throttle_factor: float = float(os.getenv('MEETING_BUDGET_THROTTLE_FACTOR', '3'))
+    llm_route_policy: str = os.getenv('LLM_ROUTE_POLICY', 'fallback')
+    llm_primary_provider: str = os.getenv('LLM_PRIMARY_PROVIDER', 'hosted')
+    llm_primary_deadline: float = float(os.getenv('LLM_PRIMARY_DEADLINE', '60'))
+    llm_hedge_delay: float = float(os.getenv('LLM_HEDGE_DELAY', '0'))
+    llm_concurrency: int = int(os.getenv('LLM_CONCURRENCY', '1'))
+    local_llm_requests_per_minute: float = float(os.getenv('LLM_REQUESTS_PER_MINUTE', '0'))
+    openai_requests_per_minute: float = float(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '0'))
+    llm_rate_burst: int = int(os.getenv('LLM_RATE_BURST', '3'))
 
     @classmethod
     def load_config(cls, config_file_path=None):
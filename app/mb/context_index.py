@@ -0,0 +1,193 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app import logger
+from app.mb.token_budget import TokenBudget
+
+CONTEXT_EXTENSIONS = ('.md', '.markdown', '.txt')
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i if in is it its of on or so that the this to was we were "
+    "will with you they he she them our us do did not no yes okay ok um uh like just".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class ContextChunk:
+    """A passage of a context file with its term frequencies."""
+    source: str
+    text: str
+    tokens: int
+    terms: Counter
+    length: int
+
+
+class ContextIndex:
+    """BM25 index over the files in the context directory.
+
+    Files are split into passages of about chunk_tokens tokens. The index is refreshed
+    incrementally: only files whose mtime or size changed are re-read, at most once per
+    refresh_interval seconds. search() returns the passages most relevant to a query
+    that together fit a token budget, so prompt size stays bounded however much
+    context accumulates.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, directory: str, budget: TokenBudget, chunk_tokens: int = 300, exclude=(),
+                 refresh_interval: float = 5.0, clock=time.monotonic):
+        self.directory = directory
+        self.budget = budget
+        self.chunk_tokens = chunk_tokens
+        self.exclude = set(exclude)
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.files: Dict[str, Tuple[Tuple[float, int], List[ContextChunk]]] = {}
+        self.document_frequency: Counter = Counter()
+        self.chunk_count = 0
+        self.total_length = 0
+        self.refreshed_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, directory: str = None) -> "ContextIndex":
+        """Index of directory (a meeting session's context directory), the configured one by default."""
+        return cls(
+            directory or config.context_directory,
+            TokenBudget.for_model(config, hosted=False),
+            chunk_tokens=config.context_chunk_tokens,
+            # The meeting context note is always sent whole, and the notes file is rewritten during the meeting
+            exclude=(config.user_meeting_context_file, config.meeting_notes_file),
+            refresh_interval=config.context_refresh_interval
+        )
+
+    def _chunk(self, source: str, text: str) -> List[ContextChunk]:
+        paragraphs = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if self.budget.count(paragraph) > self.chunk_tokens:
+                paragraphs.extend(self.budget.split(paragraph, self.chunk_tokens))
+            else:
+                paragraphs.append(paragraph)
+
+        chunks = []
+        for passage in self.budget.group(paragraphs, self.chunk_tokens):
+            terms = Counter(tokenize(passage))
+            if terms:
+                chunks.append(ContextChunk(source, passage, self.budget.count(passage), terms, sum(terms.values())))
+        return chunks
+
+    def _remove(self, path: str):
+        _, chunks = self.files.pop(path)
+        for chunk in chunks:
+            self.document_frequency.subtract(chunk.terms.keys())
+            self.total_length -= chunk.length
+        self.chunk_count -= len(chunks)
+
+    def _add(self, path: str, stat: Tuple[float, int], chunks: List[ContextChunk]):
+        self.files[path] = (stat, chunks)
+        for chunk in chunks:
+            self.document_frequency.update(chunk.terms.keys())
+            self.total_length += chunk.length
+        self.chunk_count += len(chunks)
+
+    def refresh(self, force: bool = False):
+        """Re-index files that were added, changed or removed since the last refresh."""
+        with self.lock:
+            if not force and self.refreshed_at is not None and self.clock() - self.refreshed_at < self.refresh_interval:
+                return
+            self.refreshed_at = self.clock()
+
+            seen = set()
+            if os.path.isdir(self.directory):
+                for root, _, files in os.walk(self.directory):
+                    for file in files:
+                        if file in self.exclude or not file.endswith(CONTEXT_EXTENSIONS):
+                            continue
+                        path = os.path.join(root, file)
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        seen.add(path)
+                        signature = (stat.st_mtime, stat.st_size)
+                        if path in self.files and self.files[path][0] == signature:
+                            continue
+                        try:
+                            with open(path, 'r', errors='replace') as f:
+                                text = f.read()
+                        except OSError as e:
+                            logger.warning(f"Could not read context file {path}: {e}")
+                            continue
+                        if path in self.files:
+                            self._remove(path)
+                        self._add(path, signature, self._chunk(os.path.relpath(path, self.directory), text))
+                        logger.info(f"Indexed context file {path} ({len(self.files[path][1])} passages)")
+
+            for path in set(self.files) - seen:
+                self._remove(path)
+                logger.info(f"Removed context file {path} from the index")
+
+    def _score(self, chunk: ContextChunk, query_terms: Counter, average_length: float) -> float:
+        score = 0.0
+        for term in query_terms:
+            frequency = chunk.terms.get(term)
+            if not frequency:
+                continue
+            df = self.document_frequency[term]
+            idf = math.log(1 + (self.chunk_count - df + 0.5) / (df + 0.5))
+            norm = frequency + self.K1 * (1 - self.B + self.B * chunk.length / average_length)
+            score += idf * frequency * (self.K1 + 1) / norm
+        return score
+
+    def search(self, query: str, top_k: int = 5, budget_tokens: int = 1500) -> List[ContextChunk]:
+        """Return up to top_k passages relevant to the query that together fit budget_tokens."""
+        self.refresh()
+        query_terms = Counter(tokenize(query))
+        with self.lock:
+            if not query_terms or not self.chunk_count:
+                return []
+            average_length = self.total_length / self.chunk_count
+            scored = []
+            for _, chunks in self.files.values():
+                for chunk in chunks:
+                    score = self._score(chunk, query_terms, average_length)
+                    if score > 0:
+                        scored.append((score, chunk))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        selected = []
+        used = 0
+        for _, chunk in scored:
+            if len(selected) >= top_k:
+                break
+            if used + chunk.tokens > budget_tokens:
+                continue
+            selected.append(chunk)
+            used += chunk.tokens
+        return selected
+
+    @staticmethod
+    def render(chunks: List[ContextChunk]) -> str:
+        return "\n\n".join(f"[{chunk.source}]\n{chunk.text}" for chunk in chunks)
+
+    def related_context(self, query: str, top_k: int = 5, budget_tokens: int = 1500) -> str:
+        """Rendered top passages for the query, or an empty string when nothing matches."""
+        chunks = self.search(query, top_k, budget_tokens)
+        if chunks:
+            logger.info(f"Retrieved {len(chunks)} context passages ({sum(c.tokens for c in chunks)} tokens)")
+        return self.render(chunks)
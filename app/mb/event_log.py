@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from typing import List, Optional, Tuple
+
+from app import logger
+
+# Session events that are replayed to reconnecting and late-joining clients. Summary
+# deltas are left out: the complete summary they build up to is logged.
+LOGGED_TYPES = {"transcription", "summary", "final_summary", "error"}
+
+
+def resume_token(log_id: str, event_seq: int) -> str:
+    return f"{log_id}:{event_seq}"
+
+
+def parse_resume_token(token: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split a resume token into the log id and the last event_seq the client saw."""
+    if not token or ':' not in token:
+        return None, 0
+    log_id, _, seq = token.rpartition(':')
+    try:
+        return log_id, max(int(seq), 0)
+    except ValueError:
+        return None, 0
+
+
+class EventLog:
+    """Numbered history of a meeting session's events.
+
+    Every event gets the next event_seq (starting at 1). The most recent events are
+    kept in memory; once the ring buffer is full the oldest are appended to a JSONL
+    file, so a client can still catch up from any point of the meeting. The log id
+    changes with every meeting, so a resume token from an earlier meeting (or an
+    earlier service process) is recognised and answered with a full replay.
+
+    Spill writes and read-backs run in worker threads when called on an event loop.
+    """
+
+    def __init__(self, capacity: int = 1000, spill_directory: Optional[str] = None):
+        self.log_id = uuid.uuid4().hex[:12]
+        self.capacity = max(capacity, 1)
+        self.events = deque()
+        self.last_seq = 0
+        self.spill_path = os.path.join(spill_directory, f"{self.log_id}.jsonl") if spill_directory else None
+        self.spilled = 0  # Events moved to disk (or dropped when there is no spill file)
+        self.spill_task: Optional[asyncio.Task] = None  # Pending spill writes, in order
+
+    @property
+    def token(self) -> str:
+        """Resume token for the current end of the log."""
+        return resume_token(self.log_id, self.last_seq)
+
+    def append(self, message: dict) -> dict:
+        """Number the message in place and record it."""
+        self.last_seq += 1
+        message["event_seq"] = self.last_seq
+        self.events.append(message)
+        if len(self.events) > self.capacity:
+            self._spill()
+        return message
+
+    def _spill(self):
+        # Move the older half in one write so spilling is rare and sequential
+        batch = [self.events.popleft() for _ in range(len(self.events) - self.capacity // 2)]
+        self.spilled += len(batch)
+        if self.spill_path is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(batch)
+            return
+        self.spill_task = asyncio.create_task(self._write_after(self.spill_task, batch))
+
+    async def _write_after(self, previous: Optional[asyncio.Task], batch: List[dict]):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        await asyncio.to_thread(self._write, batch)
+
+    def _write(self, batch: List[dict]):
+        try:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(event) + '\n' for event in batch))
+        except OSError as e:
+            logger.error(f"Failed to spill {len(batch)} session events to {self.spill_path}: {e}")
+
+    def _read_spilled(self, after_seq: int, through_seq: int) -> List[dict]:
+        events = []
+        if self.spill_path and os.path.exists(self.spill_path):
+            with open(self.spill_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    event = json.loads(line)
+                    if after_seq < event["event_seq"] <= through_seq:
+                        events.append(event)
+        return events
+
+    async def since(self, event_seq: int = 0) -> List[dict]:
+        """Events after event_seq, oldest first, reading spilled events back from disk when needed.
+
+        The result runs up to the newest event at the time it returns, so a caller that
+        queues it without awaiting in between misses nothing.
+        """
+        events = []
+        after = event_seq
+        while True:
+            if self.spill_task is not None and not self.spill_task.done():
+                await asyncio.gather(self.spill_task, return_exceptions=True)
+                continue
+            spilled = self.spilled
+            if after >= spilled:
+                break
+            events.extend(await asyncio.to_thread(self._read_spilled, after, spilled))
+            after = spilled  # More events may have been spilled while the file was read
+        events.extend(event for event in self.events if event["event_seq"] > after)
+        return events
+
+    async def resume(self, token: Optional[str]) -> Tuple[List[dict], bool]:
+        """Events a client holding token has missed, and whether it must reset its state first."""
+        log_id, event_seq = parse_resume_token(token)
+        if log_id != self.log_id or event_seq > self.last_seq:
+            return await self.since(0), True
+        return await self.since(event_seq), False
+
+    def close(self):
+        if self.spill_task is not None and not self.spill_task.done():
+            # Remove the file once the pending writes have finished
+            self.spill_task.add_done_callback(lambda _: self._remove())
+            return
+        self._remove()
+
+    def _remove(self):
+        if self.spill_path and os.path.exists(self.spill_path):
+            try:
+                os.remove(self.spill_path)
+            except OSError as e:
+                logger.warning(f"Could not remove {self.spill_path}: {e}")
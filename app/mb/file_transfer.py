@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import struct
+import uuid
+import zlib
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+
+from app import logger
+
+# Binary frame: magic, transfer id (16 bytes), chunk index, then the payload
+MAGIC = b"MBF1"
+HEADER = struct.Struct("!4s16sI")
+DEFAULT_CHUNK_SIZE = 64 * 1024
+ZLIB = "zlib"
+
+
+class FileTransferError(Exception):
+    """Raised when a received file is incomplete or fails its checksum."""
+
+
+def is_chunk_frame(frame) -> bool:
+    return isinstance(frame, (bytes, bytearray)) and frame[:len(MAGIC)] == MAGIC
+
+
+def encode_chunk(transfer_id: str, index: int, payload: bytes) -> bytes:
+    return HEADER.pack(MAGIC, uuid.UUID(transfer_id).bytes, index) + payload
+
+
+def decode_chunk(frame: bytes) -> Tuple[str, int, bytes]:
+    magic, transfer_id, index = HEADER.unpack_from(frame)
+    if magic != MAGIC:
+        raise FileTransferError("Not a file chunk frame")
+    return str(uuid.UUID(bytes=transfer_id)), index, bytes(frame[HEADER.size:])
+
+
+async def file_sha256(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    async with aiofiles.open(path, 'rb') as f:
+        while True:
+            block = await f.read(chunk_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def send_file(websocket, path: str, file_type: str, filename: str = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, compression: Optional[str] = None,
+                    resume: Optional[dict] = None, encode=json.dumps) -> dict:
+    """Stream a file to one client as a JSON manifest, binary chunk frames and a completion message.
+
+    The file is read chunk by chunk with non-blocking I/O, so memory stays at one chunk
+    and other clients keep being served. Chunks are compressed independently, so a
+    transfer can resume from any chunk: when resume carries the sha256 of this same
+    file and the number of bytes already received, earlier chunks are skipped. encode
+    serializes the manifest and completion messages in the client's wire format.
+    """
+    size = os.path.getsize(path)
+    sha256 = await file_sha256(path, chunk_size)
+    start_chunk = 0
+    if resume and resume.get("sha256") == sha256:
+        start_chunk = min(int(resume.get("offset", 0)) // chunk_size, (size + chunk_size - 1) // chunk_size)
+
+    transfer_id = str(uuid.uuid4())
+    manifest = {
+        "type": "file_manifest",
+        "transfer_id": transfer_id,
+        "file_type": file_type,
+        "filename": filename or os.path.basename(path),
+        "size": size,
+        "sha256": sha256,
+        "chunk_size": chunk_size,
+        "chunks": (size + chunk_size - 1) // chunk_size,
+        "start_chunk": start_chunk,
+        "compression": compression,
+    }
+    await websocket.send(encode(manifest))
+
+    sent_bytes = 0
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start_chunk * chunk_size)
+        index = start_chunk
+        while True:
+            block = await f.read(chunk_size)
+            if not block:
+                break
+            payload = zlib.compress(block) if compression == ZLIB else block
+            await websocket.send(encode_chunk(transfer_id, index, payload))
+            sent_bytes += len(payload)
+            index += 1
+
+    await websocket.send(encode({"type": "file_complete", "transfer_id": transfer_id}))
+    logger.info(f"Sent {file_type} file {manifest['filename']} ({size} bytes as {sent_bytes} bytes "
+                f"from chunk {start_chunk} of {manifest['chunks']})")
+    return manifest
+
+
+class FileReceiver:
+    """Reassembles chunked transfers into files under directory and verifies their checksums."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.transfers: Dict[str, dict] = {}
+        self.interrupted: Dict[str, dict] = {}  # Resume state per file type of transfers cut off by a disconnect
+        os.makedirs(directory, exist_ok=True)
+
+    def partial_path(self, manifest: dict) -> str:
+        return os.path.join(self.directory, f"{manifest['sha256']}.part")
+
+    def resume_state(self) -> Dict[str, dict]:
+        """Bytes already received per file type, to send back with a download_files request."""
+        state = dict(self.interrupted)
+        for transfer in self.transfers.values():
+            manifest = transfer["manifest"]
+            state[manifest["file_type"]] = {"sha256": manifest["sha256"], "offset": transfer["received"]}
+        return state
+
+    def start(self, manifest: dict):
+        self.interrupted.pop(manifest["file_type"], None)
+        path = self.partial_path(manifest)
+        offset = manifest["start_chunk"] * manifest["chunk_size"]
+        mode = 'r+b' if offset and os.path.exists(path) else 'wb'
+        handle = open(path, mode)
+        handle.seek(offset)
+        handle.truncate()
+        self.transfers[manifest["transfer_id"]] = {
+            "manifest": manifest, "path": path, "handle": handle,
+            "next_chunk": manifest["start_chunk"], "received": offset,
+        }
+
+    def add_chunk(self, frame: bytes):
+        transfer_id, index, payload = decode_chunk(frame)
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None:
+            raise FileTransferError(f"Chunk for unknown transfer {transfer_id}")
+        if index != transfer["next_chunk"]:
+            raise FileTransferError(f"Expected chunk {transfer['next_chunk']}, got {index}")
+        if transfer["manifest"]["compression"] == ZLIB:
+            payload = zlib.decompress(payload)
+        transfer["handle"].write(payload)
+        transfer["next_chunk"] += 1
+        transfer["received"] += len(payload)
+
+    def complete(self, transfer_id: str) -> Tuple[dict, str]:
+        """Finish a transfer; returns its manifest and the path of the verified file."""
+        transfer = self.transfers.pop(transfer_id)
+        transfer["handle"].close()
+        manifest = transfer["manifest"]
+        digest = hashlib.sha256()
+        with open(transfer["path"], 'rb') as f:
+            for block in iter(lambda: f.read(manifest["chunk_size"]), b""):
+                digest.update(block)
+        if transfer["received"] != manifest["size"] or digest.hexdigest() != manifest["sha256"]:
+            raise FileTransferError(f"{manifest['filename']} failed verification "
+                                    f"({transfer['received']} of {manifest['size']} bytes)")
+        path = os.path.join(self.directory, manifest["filename"])
+        os.replace(transfer["path"], path)
+        return manifest, path
+
+    def abort(self):
+        """Close open transfers, e.g. when the connection drops, keeping their partial files for resuming.
+
+        Their transfer ids die with the connection; resume_state() still reports how far they got.
+        """
+        for transfer in self.transfers.values():
+            transfer["handle"].close()
+            manifest = transfer["manifest"]
+            self.interrupted[manifest["file_type"]] = {"sha256": manifest["sha256"], "offset": transfer["received"]}
+        self.transfers.clear()
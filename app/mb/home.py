@@ -53,7 +53,8 @@ def initialize_session_state():
         'download_transcription_name': '',
         'download_summary_name': '',
         'expected_file_types': {'transcription': False, 'summary': False},
-        'received_final_summary': False
+        'received_final_summary': False,
+        'llm_status': None
     }
 
     # Initialize missing variables all at once to avoid iteration issues
@@ -172,6 +173,24 @@ def process_queue():
             elif msg_type == "summary":
                 st.session_state.interim_summary_text = msg_data
 
+            elif msg_type == "reset":
+                # The service replays the meeting from the start
+                st.session_state.transcription_text = ""
+                st.session_state.interim_summary_text = ""
+
+            elif msg_type == "summary_delta":
+                if msg_data["first"]:
+                    st.session_state.interim_summary_text = ""
+                st.session_state.interim_summary_text += msg_data["text"]
+
+            elif msg_type == "final_summary_delta":
+                if msg_data["first"]:
+                    st.session_state.final_summary_text = ""
+                st.session_state.final_summary_text += msg_data["text"]
+
+            elif msg_type == "llm_status":
+                st.session_state.llm_status = msg_data
+
             elif msg_type == "final_summary":
                 st.session_state.final_summary_text = msg_data
                 # Request file contents for download after receiving final summary
@@ -218,6 +237,8 @@ if starting:
     status_message = "Starting transcription service..."
 elif stopping:
     status_message = "Stopping transcription and generating summary..."
+elif t and st.session_state.llm_status and not st.session_state.llm_status["ready"]:
+    status_message = "Loading language model..."
 
 if status_message:
     st.markdown(f"**{status_message}**")
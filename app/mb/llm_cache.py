@@ -0,0 +1,90 @@
+import hashlib
+from typing import Optional
+
+from app import logger
+
+try:
+    import diskcache
+except ImportError:  # pragma: no cover - diskcache is in requirements.txt
+    diskcache = None
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256((text or "").encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """Disk-backed cache of LLM responses keyed by model, prompt, context and content."""
+
+    def __init__(self, directory: str, size_limit_mb: int = 256, ttl_seconds: int = 7 * 24 * 3600,
+                 enabled: bool = True):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.hits = 0
+        self.misses = 0
+        self.cache = None
+
+        if enabled and diskcache is None:
+            logger.warning("diskcache is not installed, LLM responses will not be cached")
+        elif enabled:
+            self.cache = diskcache.Cache(
+                directory,
+                size_limit=size_limit_mb * 1024 * 1024,
+                eviction_policy='least-recently-used'
+            )
+
+    @classmethod
+    def from_config(cls, config) -> "LLMCache":
+        return cls(
+            config.llm_cache_directory,
+            size_limit_mb=config.llm_cache_size_mb,
+            ttl_seconds=config.llm_cache_ttl_seconds,
+            enabled=config.llm_cache_enabled
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache is not None
+
+    @staticmethod
+    def make_key(model: str, prompt: str, context: str, content: str) -> str:
+        return f"{model}:{_digest(prompt)}:{_digest(context)}:{_digest(content)}"
+
+    def get(self, model: str, prompt: str, context: str, content: str) -> Optional[str]:
+        """Return the cached response, or None on a miss."""
+        if not self.enabled:
+            return None
+        try:
+            response = self.cache.get(self.make_key(model, prompt, context, content))
+        except Exception as e:
+            logger.error(f"Error reading LLM cache: {e}")
+            response = None
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            logger.info(f"LLM cache hit for {model} ({self.hits} hits, {self.misses} misses)")
+        return response
+
+    def set(self, model: str, prompt: str, context: str, content: str, response: str):
+        if not self.enabled or not response:
+            return
+        try:
+            self.cache.set(self.make_key(model, prompt, context, content), response, expire=self.ttl_seconds)
+        except Exception as e:
+            logger.error(f"Error writing LLM cache: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.cache) if self.enabled else 0,
+            "size_bytes": self.cache.volume() if self.enabled else 0,
+        }
+
+    def close(self):
+        if self.enabled:
+            self.cache.close()
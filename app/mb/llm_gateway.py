@@ -0,0 +1,206 @@
+import asyncio
+import contextvars
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from litellm import acompletion
+from openai import AsyncOpenAI
+
+from app import logger
+from app.mb.llm_scheduler import TokenBucket
+from app.mb.metrics import LLM_ERRORS, record_llm_call
+
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+LOCAL = 'local'
+HOSTED = 'hosted'
+
+# Usage ledger of the meeting session the current task works for; see usage_ledger.with_ledger
+current_ledger = contextvars.ContextVar('llm_ledger', default=None)
+
+
+@dataclass
+class LLMResult:
+    """Text and usage of a single LLM call."""
+    text: str
+    provider: str
+    model: str
+    latency: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+
+@dataclass
+class ProviderSettings:
+    """Per-provider model, timeout and retry settings."""
+    name: str
+    model: str
+    timeout: float
+    retries: int
+
+
+class LLMGatewayError(Exception):
+    """Raised when a provider cannot produce a response."""
+
+
+class LLMGateway:
+    """Long-lived async gateway to the local (litellm) and hosted (OpenAI) models.
+
+    The gateway is created once per process and owns a pooled HTTP client for the
+    hosted API, so connection setup and TLS handshakes are paid once rather than
+    on every summary. Calls are native coroutines; nothing hops to a thread.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.providers: Dict[str, ProviderSettings] = {
+            LOCAL: ProviderSettings(LOCAL, config.local_llm_model, config.local_llm_timeout, config.llm_max_retries),
+            HOSTED: ProviderSettings(HOSTED, config.openai_model, config.openai_timeout, config.llm_max_retries),
+        }
+        # Per-provider request rate limits, None when unlimited
+        self.rate_limiters: Dict[str, Optional[TokenBucket]] = {
+            LOCAL: TokenBucket.per_minute(config.local_llm_requests_per_minute, config.llm_rate_burst),
+            HOSTED: TokenBucket.per_minute(config.openai_requests_per_minute, config.llm_rate_burst),
+        }
+        # Monotonic time of the last completed call per provider, for keep-alive scheduling
+        self.last_used: Dict[str, float] = {}
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.llm_max_connections,
+                max_keepalive_connections=config.llm_max_connections
+            ),
+            timeout=httpx.Timeout(config.openai_timeout, connect=10.0)
+        )
+        self.hosted_client = None
+        api_key = config.openai_api_key or os.getenv('OPENAI_API_KEY')
+        if api_key:
+            self.hosted_client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=config.openai_base_url or None,
+                http_client=self.http_client,
+                max_retries=0  # Retries are handled here so they respect the provider deadline
+            )
+
+    def available(self, provider: str) -> bool:
+        if provider == HOSTED:
+            return self.hosted_client is not None
+        return bool(self.providers[LOCAL].model)
+
+    async def complete(self, provider: str, messages: List[dict], on_delta: Optional[DeltaCallback] = None,
+                       temperature: float = 0.7, max_tokens: Optional[int] = None) -> LLMResult:
+        """Run a chat completion on the given provider, streaming deltas through on_delta when given."""
+        if not self.available(provider):
+            raise LLMGatewayError(f"LLM provider '{provider}' is not configured")
+        settings = self.providers[provider]
+        max_tokens = max_tokens or self.config.llm_max_output_tokens
+        streamed = False
+
+        async def tracking_delta(delta: str):
+            nonlocal streamed
+            streamed = True
+            await on_delta(delta)
+
+        last_error = None
+        limiter = self.rate_limiters.get(provider)
+        for attempt in range(settings.retries + 1):
+            if limiter is not None:
+                await limiter.acquire()
+            start_time = time.monotonic()
+            try:
+                call = self._call_hosted if provider == HOSTED else self._call_local
+                result = await asyncio.wait_for(
+                    call(settings, messages, tracking_delta if on_delta else None, temperature, max_tokens),
+                    timeout=settings.timeout
+                )
+                result.latency = time.monotonic() - start_time
+                self.last_used[provider] = time.monotonic()
+                ledger = current_ledger.get()
+                if ledger is not None:
+                    await ledger.record(result)
+                record_llm_call(result)
+                logger.info(f"LLM call to {provider} ({settings.model}) took {result.latency:.2f} seconds, "
+                            f"{result.prompt_tokens} prompt / {result.completion_tokens} completion tokens")
+                return result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                last_error = e
+                if streamed:
+                    # Deltas already reached the caller, so a retry would duplicate output
+                    break
+                if attempt < settings.retries:
+                    backoff = 0.5 * (2 ** attempt)
+                    logger.warning(f"LLM call to {provider} failed ({e!r}), retrying in {backoff:.1f}s")
+                    await asyncio.sleep(backoff)
+        LLM_ERRORS.labels(provider).inc()
+        raise LLMGatewayError(f"LLM call to {provider} failed: {last_error!r}") from last_error
+
+    async def _call_local(self, settings: ProviderSettings, messages, on_delta, temperature, max_tokens) -> LLMResult:
+        kwargs = {}
+        if self.config.local_llm_api_base:
+            kwargs['api_base'] = self.config.local_llm_api_base
+        if self.config.local_llm_api_key:
+            kwargs['api_key'] = self.config.local_llm_api_key
+        response = await acompletion(
+            model=settings.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=settings.timeout,
+            stream=on_delta is not None,
+            **kwargs
+        )
+        if on_delta is None:
+            return self._result_from_response(settings, response)
+        return await self._consume_stream(settings, response, on_delta)
+
+    async def _call_hosted(self, settings: ProviderSettings, messages, on_delta, temperature, max_tokens) -> LLMResult:
+        kwargs = {}
+        if on_delta is not None:
+            kwargs['stream'] = True
+            kwargs['stream_options'] = {"include_usage": True}
+        response = await self.hosted_client.chat.completions.create(
+            model=settings.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        if on_delta is None:
+            return self._result_from_response(settings, response)
+        return await self._consume_stream(settings, response, on_delta)
+
+    async def _consume_stream(self, settings: ProviderSettings, stream, on_delta: DeltaCallback) -> LLMResult:
+        parts = []
+        result = LLMResult("", settings.name, settings.model, 0.0)
+        async for chunk in stream:
+            if getattr(chunk, 'usage', None):
+                self._apply_usage(result, chunk.usage)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                await on_delta(delta)
+        result.text = "".join(parts)
+        return result
+
+    def _result_from_response(self, settings: ProviderSettings, response) -> LLMResult:
+        if not response or not getattr(response, 'choices', None):
+            raise LLMGatewayError(f"Invalid response structure from {settings.name}: {response}")
+        result = LLMResult(response.choices[0].message.content or "", settings.name, settings.model, 0.0)
+        if getattr(response, 'usage', None):
+            self._apply_usage(result, response.usage)
+        return result
+
+    @staticmethod
+    def _apply_usage(result: LLMResult, usage):
+        result.prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        result.completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        details = getattr(usage, 'prompt_tokens_details', None)
+        result.cached_tokens = (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+
+    async def close(self):
+        await self.http_client.aclose()
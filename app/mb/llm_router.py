@@ -0,0 +1,198 @@
+import asyncio
+import bisect
+import copy
+import time
+from typing import Dict, List, Optional
+
+from app import logger
+from app.mb.llm_gateway import LLMGateway, LLMGatewayError, LLMResult, DeltaCallback, HOSTED, LOCAL
+
+FALLBACK = 'fallback'
+HEDGE = 'hedge'
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets (in seconds)."""
+
+    BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, float('inf'))
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.failures = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.BUCKETS, self.counts):
+            cumulative += count
+            buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "mean": self.total / self.count if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class LLMRouter:
+    """Routes a completion across the local and hosted models.
+
+    Policies:
+        fallback: call the primary provider; if it fails, returns nothing, or has not
+            produced its first token by the deadline, cancel it and use the fallback.
+        hedge: race both providers (the second after ``hedge_delay`` seconds). The
+            first good response, or the first to stream a token, wins and the loser
+            is cancelled.
+    """
+
+    def __init__(self, gateway: LLMGateway, policy: str = FALLBACK, primary: str = HOSTED,
+                 fallback: Optional[str] = LOCAL, deadline: float = 60.0, hedge_delay: float = 0.0):
+        if policy not in (FALLBACK, HEDGE):
+            raise ValueError(f"Unknown LLM routing policy: {policy}")
+        self.gateway = gateway
+        self.policy = policy
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.histograms: Dict[str, LatencyHistogram] = {LOCAL: LatencyHistogram(), HOSTED: LatencyHistogram()}
+
+        # Drop providers that are not configured, e.g. no OpenAI key
+        providers = [p for p in (primary, fallback) if p and gateway.available(p)]
+        providers = list(dict.fromkeys(providers))
+        if not providers:
+            raise LLMGatewayError("No LLM provider is configured")
+        self.primary = providers[0]
+        self.fallback = providers[1] if len(providers) > 1 else None
+
+    @classmethod
+    def from_config(cls, gateway: LLMGateway, config) -> "LLMRouter":
+        return cls(
+            gateway,
+            policy=config.llm_route_policy,
+            primary=config.llm_primary_provider,
+            fallback=LOCAL if config.llm_primary_provider == HOSTED else HOSTED,
+            deadline=config.llm_primary_deadline,
+            hedge_delay=config.llm_hedge_delay
+        )
+
+    def preferring(self, provider: Optional[str]) -> "LLMRouter":
+        """A router with provider as the primary, e.g. for one meeting near its token budget.
+
+        The copy shares the gateway and latency histograms; this router is left unchanged.
+        """
+        if provider is None or self.fallback != provider:
+            return self
+        router = copy.copy(self)
+        router.primary, router.fallback = self.fallback, self.primary
+        return router
+
+    @property
+    def providers(self) -> List[str]:
+        return [p for p in (self.primary, self.fallback) if p]
+
+    async def _timed(self, provider: str, messages, on_delta, **kwargs) -> LLMResult:
+        start_time = time.monotonic()
+        try:
+            result = await self.gateway.complete(provider, messages, on_delta=on_delta, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.histograms[provider].failures += 1
+            raise
+        self.histograms[provider].observe(time.monotonic() - start_time)
+        if not result.text.strip():
+            self.histograms[provider].failures += 1
+            raise LLMGatewayError(f"Empty response from {provider}")
+        return result
+
+    async def complete(self, messages: List[dict], on_delta: Optional[DeltaCallback] = None, **kwargs) -> LLMResult:
+        if self.fallback is None:
+            return await self._timed(self.primary, messages, on_delta, **kwargs)
+        if self.policy == HEDGE:
+            return await self._hedged(messages, on_delta, **kwargs)
+        return await self._with_fallback(messages, on_delta, **kwargs)
+
+    async def _with_fallback(self, messages, on_delta, **kwargs) -> LLMResult:
+        first_delta = asyncio.Event()
+
+        async def primary_delta(delta: str):
+            first_delta.set()
+            await on_delta(delta)
+
+        primary_task = asyncio.create_task(
+            self._timed(self.primary, messages, primary_delta if on_delta else None, **kwargs)
+        )
+        waiter = asyncio.create_task(first_delta.wait())
+        try:
+            # The deadline covers time-to-first-token; once streaming has started the primary may finish
+            done, _ = await asyncio.wait({primary_task, waiter}, timeout=self.deadline,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if primary_task in done or waiter in done:
+                return await primary_task
+            logger.warning(f"{self.primary} missed the {self.deadline:.0f}s deadline, falling back to {self.fallback}")
+            primary_task.cancel()
+        except asyncio.CancelledError:
+            primary_task.cancel()
+            raise
+        except Exception as e:
+            if first_delta.is_set():
+                # Part of the response already reached the caller
+                raise
+            logger.warning(f"{self.primary} failed ({e}), falling back to {self.fallback}")
+        finally:
+            waiter.cancel()
+        return await self._timed(self.fallback, messages, on_delta, **kwargs)
+
+    async def _hedged(self, messages, on_delta, **kwargs) -> LLMResult:
+        stream_owner = None
+
+        def claiming_delta(provider: str):
+            async def forward(delta: str):
+                nonlocal stream_owner
+                if stream_owner is None:
+                    stream_owner = provider
+                    # The first provider to stream owns the output, so stop the other one
+                    for other, task in tasks.items():
+                        if other != provider:
+                            task.cancel()
+                if stream_owner == provider:
+                    await on_delta(delta)
+            return forward
+
+        async def delayed(provider: str, delay: float) -> LLMResult:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return await self._timed(provider, messages, claiming_delta(provider) if on_delta else None, **kwargs)
+
+        tasks = {
+            self.primary: asyncio.create_task(delayed(self.primary, 0)),
+            self.fallback: asyncio.create_task(delayed(self.fallback, self.hedge_delay)),
+        }
+        errors = []
+        pending = set(tasks.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is None:
+                        winner = task.result()
+                        logger.info(f"Hedged LLM request won by {winner.provider} in {winner.latency:.2f}s")
+                        return winner
+                    errors.append(task.exception())
+                    if stream_owner is not None and tasks[stream_owner] is task:
+                        raise task.exception()
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        raise LLMGatewayError(f"All hedged LLM requests failed: {errors}")
+
+    def latency_snapshot(self) -> dict:
+        return {provider: histogram.snapshot() for provider, histogram in self.histograms.items()}
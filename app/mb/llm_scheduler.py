@@ -0,0 +1,173 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app import logger
+
+# Lower values run first
+FINAL = 0
+ROLLING = 5  # Rolling summary layers, which later interim summaries are built from
+INTERIM = 10
+
+
+class LLMJobCancelled(Exception):
+    """Raised to callers whose job was cancelled before it produced a result."""
+
+
+class TokenBucket:
+    """Token-bucket rate limiter; acquire() waits until a token is available."""
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock=time.monotonic):
+        self.rate = rate  # tokens per second
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.lock = asyncio.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: float = 1.0) -> Optional["TokenBucket"]:
+        """Build a bucket for a requests-per-minute limit, or None when unlimited."""
+        if not requests_per_minute or requests_per_minute <= 0:
+            return None
+        return cls(requests_per_minute / 60.0, burst)
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    run: Callable[[], Awaitable[Any]] = field(compare=False)
+    key: Optional[str] = field(compare=False, default=None)
+    future: Optional[asyncio.Future] = field(compare=False, default=None)
+    task: Optional[asyncio.Task] = field(compare=False, default=None)
+    waiters: int = field(compare=False, default=1)
+
+
+class LLMScheduler:
+    """Runs LLM jobs by priority with a concurrency limit.
+
+    Queued jobs that share a coalescing key are merged: a newer submission replaces
+    the work of the queued one and every caller receives the newer result, so a slow
+    model never works through a backlog of stale interim summaries.
+    """
+
+    def __init__(self, concurrency: int = 1):
+        self.concurrency = max(concurrency, 1)
+        self.queue: Optional[asyncio.PriorityQueue] = None
+        self.queued: Dict[str, _Job] = {}
+        self.running: Dict[int, _Job] = {}
+        self.workers = []
+        self.counter = itertools.count()
+        self.stats = {"submitted": 0, "coalesced": 0, "cancelled": 0, "completed": 0, "failed": 0}
+
+    def _start(self):
+        if self.workers:
+            return
+        self.queue = asyncio.PriorityQueue()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def submit(self, run: Callable[[], Awaitable[Any]], priority: int = INTERIM, key: Optional[str] = None) -> Any:
+        """Queue run() and wait for its result.
+
+        Raises LLMJobCancelled if the job is cancelled through cancel().
+        """
+        self._start()
+        self.stats["submitted"] += 1
+        job = self.queued.get(key) if key else None
+        if job is not None:
+            # Replace the stale queued work; both callers get the newer result
+            job.run = run
+            job.waiters += 1
+            self.stats["coalesced"] += 1
+            logger.info(f"Coalesced queued LLM job '{key}'")
+        else:
+            job = _Job(priority, next(self.counter), run, key, asyncio.get_running_loop().create_future())
+            if key:
+                self.queued[key] = job
+            self.queue.put_nowait(job)
+
+        try:
+            return await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            # The caller gave up; stop the job once nobody is waiting for it
+            job.waiters -= 1
+            if job.waiters == 0:
+                self._cancel_job(job)
+            raise
+
+    def cancel(self, priority: Optional[int] = None, key: Optional[str] = None, prefix: Optional[str] = None) -> int:
+        """Cancel queued and running jobs matching the priority, key and/or key prefix. Returns the number cancelled."""
+        jobs = [job for job in list(self.queued.values()) + list(self.running.values())
+                if (priority is None or job.priority == priority) and (key is None or job.key == key)
+                and (prefix is None or (job.key or "").startswith(prefix))]
+        for job in jobs:
+            self._cancel_job(job)
+        if jobs:
+            logger.info(f"Cancelled {len(jobs)} LLM job(s)")
+        return len(jobs)
+
+    def _cancel_job(self, job: _Job):
+        if job.key and self.queued.get(job.key) is job:
+            del self.queued[job.key]
+        if job.task is not None:
+            job.task.cancel()
+        if not job.future.done():
+            job.future.set_exception(LLMJobCancelled(f"LLM job {job.key or job.seq} was cancelled"))
+            # Retrieve the exception so an unawaited future does not warn
+            job.future.exception()
+            self.stats["cancelled"] += 1
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.future.done():
+                    continue  # Cancelled while queued
+                if job.key and self.queued.get(job.key) is job:
+                    del self.queued[job.key]
+                job.task = asyncio.create_task(job.run())
+                self.running[job.seq] = job
+                try:
+                    await asyncio.wait({job.task})
+                except asyncio.CancelledError:
+                    job.task.cancel()
+                    raise
+                finally:
+                    self.running.pop(job.seq, None)
+
+                if job.future.done():
+                    continue
+                if job.task.cancelled():
+                    job.future.set_exception(LLMJobCancelled(f"LLM job {job.key or job.seq} was cancelled"))
+                    self.stats["cancelled"] += 1
+                elif job.task.exception() is not None:
+                    job.future.set_exception(job.task.exception())
+                    self.stats["failed"] += 1
+                else:
+                    job.future.set_result(job.task.result())
+                    self.stats["completed"] += 1
+            finally:
+                self.queue.task_done()
+
+    async def close(self):
+        self.cancel()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
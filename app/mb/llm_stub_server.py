@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Local stand-in for an OpenAI-compatible chat-completions server.
+
+The stub answers /v1/chat/completions (plain and streaming) with deterministic text
+derived from the request, after a configurable latency and at a configurable token
+rate, and can inject errors. Ollama serves the same protocol under /v1, so the stub
+stands in for either model:
+
+    python -m app.mb.llm_stub_server --port 11435 --latency 0.5 --tokens-per-second 40
+
+and point the service at it in config.yaml:
+
+    local_llm_model: openai/stub
+    local_llm_api_base: http://localhost:11435/v1
+    local_llm_api_key: stub
+    openai_base_url: http://localhost:11435/v1
+
+``--bench N`` starts the stub, sends N requests through the LLM gateway and prints
+latency percentiles, giving repeatable end-to-end numbers without a network.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import statistics
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+from aiohttp import web
+
+from app import logger
+
+WORDS = (
+    "the team reviewed the roadmap and agreed to ship the release after fixing the billing bug "
+    "action items include updating the design doc scheduling a follow up and reviewing the metrics "
+    "decisions were made about hiring priorities budget timelines and the migration plan"
+).split()
+
+
+@dataclass
+class StubSettings:
+    """Latency, throughput and failure behaviour of the stub server."""
+    latency: float = 0.2  # Mean time to first token in seconds
+    latency_jitter: float = 0.0
+    distribution: str = "fixed"  # fixed, uniform, normal or lognormal
+    tokens_per_second: float = 0.0  # 0 streams as fast as possible
+    response_tokens: int = 64
+    error_rate: float = 0.0
+    error_status: int = 500
+    hang_rate: float = 0.0  # Requests that never answer, to exercise client timeouts
+    seed: Optional[int] = 0
+
+
+class LLMStubServer:
+    """aiohttp server speaking the chat-completions protocol with scripted behaviour."""
+
+    def __init__(self, settings: StubSettings = None, host: str = "localhost", port: int = 0):
+        self.settings = settings or StubSettings()
+        self.host = host
+        self.port = port
+        self.random = random.Random(self.settings.seed)
+        self.runner = None
+        self.stats = {"requests": 0, "errors": 0, "hangs": 0, "in_flight": 0, "max_in_flight": 0}
+
+        self.app = web.Application()
+        self.app.router.add_post("/v1/chat/completions", self.chat_completions)
+        self.app.router.add_post("/chat/completions", self.chat_completions)
+        self.app.router.add_get("/v1/models", self.models)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> "LLMStubServer":
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        # Resolve the port when an ephemeral one was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"LLM stub server listening on {self.url}")
+        return self
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def sample_latency(self) -> float:
+        s = self.settings
+        if s.distribution == "uniform":
+            value = self.random.uniform(s.latency - s.latency_jitter, s.latency + s.latency_jitter)
+        elif s.distribution == "normal":
+            value = self.random.gauss(s.latency, s.latency_jitter)
+        elif s.distribution == "lognormal":
+            # Heavy right tail; latency is the median and latency_jitter the sigma
+            value = s.latency * self.random.lognormvariate(0, s.latency_jitter)
+        else:
+            value = s.latency
+        return max(value, 0.0)
+
+    def response_text(self, body: dict) -> List[str]:
+        """Deterministic response tokens derived from the request messages."""
+        digest = hashlib.sha256(json.dumps(body.get("messages", []), sort_keys=True).encode("utf-8")).digest()
+        rng = random.Random(digest)
+        max_tokens = body.get("max_tokens") or self.settings.response_tokens
+        count = min(self.settings.response_tokens, max_tokens)
+        return [("" if i == 0 else " ") + rng.choice(WORDS) for i in range(count)]
+
+    @staticmethod
+    def prompt_tokens(body: dict) -> int:
+        return sum(len(str(m.get("content", ""))) // 4 for m in body.get("messages", []))
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            roll = self.random.random()
+            latency = self.sample_latency()
+            if roll < self.settings.hang_rate:
+                self.stats["hangs"] += 1
+                await asyncio.sleep(3600)
+            await asyncio.sleep(latency)
+            if roll < self.settings.hang_rate + self.settings.error_rate:
+                self.stats["errors"] += 1
+                return web.json_response(
+                    {"error": {"message": "Injected stub error", "type": "server_error"}},
+                    status=self.settings.error_status
+                )
+
+            tokens = self.response_text(body)
+            usage = {
+                "prompt_tokens": self.prompt_tokens(body),
+                "completion_tokens": len(tokens),
+                "total_tokens": self.prompt_tokens(body) + len(tokens),
+            }
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            model = body.get("model", "stub")
+            if body.get("stream"):
+                return await self.stream(request, completion_id, model, tokens, usage,
+                                         (body.get("stream_options") or {}).get("include_usage", False))
+            return web.json_response({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def stream(self, request, completion_id, model, tokens, usage, include_usage) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        def chunk(delta: dict, finish_reason=None, usage_payload=None) -> bytes:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+            }
+            if usage_payload:
+                payload["usage"] = usage_payload
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        delay = 1.0 / self.settings.tokens_per_second if self.settings.tokens_per_second > 0 else 0.0
+        await response.write(chunk({"role": "assistant", "content": ""}))
+        for token in tokens:
+            if delay:
+                await asyncio.sleep(delay)
+            await response.write(chunk({"content": token}))
+        await response.write(chunk({}, finish_reason="stop"))
+        if include_usage:
+            await response.write(chunk(None, usage_payload=usage))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def run_benchmark(server: LLMStubServer, requests: int, concurrency: int, stream: bool) -> dict:
+    """Send requests through the LLM gateway against the stub and report latency percentiles."""
+    from app.mb.config import Config
+    from app.mb.llm_gateway import LLMGateway, LOCAL
+
+    config = Config(local_llm_model="openai/stub", local_llm_api_base=server.url, local_llm_api_key="stub",
+                    llm_max_retries=0,
+                    llm_max_connections=concurrency)
+    gateway = LLMGateway(config)
+    semaphore = asyncio.Semaphore(concurrency)
+    first_token, total, failures = [], [], 0
+
+    async def one(i: int):
+        nonlocal failures
+        started = time.monotonic()
+        seen_first = False
+
+        async def on_delta(delta: str):
+            nonlocal seen_first
+            if not seen_first:
+                seen_first = True
+                first_token.append(time.monotonic() - started)
+
+        async with semaphore:
+            try:
+                await gateway.complete(LOCAL, [{"role": "user", "content": f"benchmark request {i}"}],
+                                       on_delta=on_delta if stream else None)
+                total.append(time.monotonic() - started)
+            except Exception as e:
+                failures += 1
+                logger.debug(f"Benchmark request {i} failed: {e}")
+
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    finally:
+        await gateway.close()
+    elapsed = time.monotonic() - started
+
+    report = {"requests": requests, "failures": failures, "elapsed": elapsed,
+              "throughput": requests / elapsed if elapsed else 0.0}
+    for name, values in (("total", total), ("first_token", first_token)):
+        if values:
+            report[name] = {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95),
+                            "p99": percentile(values, 0.99), "mean": statistics.mean(values)}
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='OpenAI-compatible LLM stub server')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--latency', type=float, default=0.2, help='Mean time to first token (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Latency spread (stddev, or sigma for lognormal)')
+    parser.add_argument('--distribution', choices=['fixed', 'uniform', 'normal', 'lognormal'], default='fixed')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0)
+    parser.add_argument('--response-tokens', type=int, default=64)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--hang-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bench', type=int, default=0, help='Run N benchmark requests against the stub and exit')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--no-stream', action='store_true', help='Benchmark without streaming')
+    args = parser.parse_args()
+
+    settings = StubSettings(
+        latency=args.latency, latency_jitter=args.jitter, distribution=args.distribution,
+        tokens_per_second=args.tokens_per_second, response_tokens=args.response_tokens,
+        error_rate=args.error_rate, error_status=args.error_status, hang_rate=args.hang_rate, seed=args.seed
+    )
+    server = await LLMStubServer(settings, args.host, 0 if args.bench else args.port).start()
+    try:
+        if args.bench:
+            report = await run_benchmark(server, args.bench, args.concurrency, not args.no_stream)
+            print(json.dumps(report, indent=2))
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
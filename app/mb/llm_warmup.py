@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app import logger
+from app.mb.llm_gateway import LLMGateway
+from app.mb.usage_ledger import with_purpose
+
+COLD = 'cold'
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'error'
+
+PING_MESSAGES = [{"role": "user", "content": "Reply with OK."}]
+
+
+class LLMWarmer:
+    """Loads the configured models at session start and keeps them resident.
+
+    warm_up() sends a one-token request to every provider so the model (e.g. an
+    Ollama model) is loaded before the first interim summary. While the meeting runs,
+    a provider that has been idle for keep_alive_interval seconds is pinged again so
+    the server does not unload it. Status changes are reported through on_status.
+    """
+
+    def __init__(self, gateway: LLMGateway, providers: List[str], keep_alive_interval: float = 240.0,
+                 on_status: Optional[Callable[[dict], Awaitable[None]]] = None):
+        self.gateway = gateway
+        self.providers = [p for p in providers if gateway.available(p)]
+        self.keep_alive_interval = keep_alive_interval
+        self.on_status = on_status
+        self.status: Dict[str, dict] = {
+            p: {"state": COLD, "model": gateway.providers[p].model, "latency": None, "error": None}
+            for p in self.providers
+        }
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.providers) and all(s["state"] == READY for s in self.status.values())
+
+    def snapshot(self) -> dict:
+        return {"ready": self.ready, "providers": {p: dict(s) for p, s in self.status.items()}}
+
+    async def _publish(self):
+        if self.on_status is not None:
+            try:
+                await self.on_status(self.snapshot())
+            except Exception as e:
+                logger.error(f"Failed to publish LLM status: {e}")
+
+    async def ping(self, provider: str):
+        status = self.status[provider]
+        if status["state"] != READY:
+            status["state"] = WARMING
+            await self._publish()
+        try:
+            result = await with_purpose("warmup", self.gateway.complete(
+                provider, PING_MESSAGES, temperature=0.0, max_tokens=1
+            ))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            changed = status["state"] != FAILED
+            status.update(state=FAILED, error=str(e))
+            logger.warning(f"LLM {provider} ({status['model']}) is not responding: {e}")
+        else:
+            changed = status["state"] != READY
+            status.update(state=READY, latency=result.latency, error=None)
+            if changed:
+                logger.info(f"LLM {provider} ({status['model']}) is ready after {result.latency:.1f} seconds")
+        if changed:
+            await self._publish()
+
+    async def warm_up(self):
+        await asyncio.gather(*(self.ping(p) for p in self.providers))
+
+    async def run(self):
+        """Warm up every provider, then keep idle ones resident until cancelled."""
+        await self.warm_up()
+        while True:
+            await asyncio.sleep(min(self.keep_alive_interval, 30))
+            now = time.monotonic()
+            for provider in self.providers:
+                if now - self.gateway.last_used.get(provider, 0.0) >= self.keep_alive_interval:
+                    await self.ping(provider)
+
+    def start(self):
+        if self.task is None and self.providers:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
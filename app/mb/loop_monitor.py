@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from app import logger
+from app.mb.metrics import EVENT_LOOP_LAG
+
+
+def collapse_stack(frame, limit: int = 64) -> str:
+    """A frame's stack in collapsed form (outermost first, ';'-separated), as flamegraph tools read it."""
+    names = []
+    while frame is not None and len(names) < limit:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, thread_ids: Optional[List[int]] = None) -> Counter:
+    """Sample the stacks of all threads (or the given ones) for the duration; returns collapsed stack -> samples.
+
+    Stacks are prefixed with the thread name so the loop and worker threads stay apart.
+    """
+    me = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me or (thread_ids is not None and thread_id not in thread_ids):
+                continue
+            stacks[f"{names.get(thread_id, thread_id)};{collapse_stack(frame)}"] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def write_collapsed(stacks: Counter, path: str) -> str:
+    """Write stacks as a collapsed-stack file (flamegraph.pl, speedscope, inferno)."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+class LoopMonitor:
+    """Detects callbacks that block the event loop and records where they were blocking.
+
+    A heartbeat task on the loop stamps the time every interval; a watchdog thread
+    samples the loop thread's stack whenever the heartbeat is older than threshold, so
+    a block of several seconds collects several samples of the code responsible.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, history: int = 50):
+        self.threshold = threshold
+        self.interval = interval
+        self.blocks = deque(maxlen=history)  # Recent blocks: started, seconds, samples per stack
+        self.loop_thread_id = None
+        self.last_beat = time.monotonic()
+        self.heartbeat_task = None
+        self.watchdog = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.stopped.clear()
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+        self.watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self.watchdog.start()
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(loop.time() - expected, 0.0))
+
+    def _watch(self):
+        block = None
+        while not self.stopped.wait(self.interval / 2):
+            stalled = time.monotonic() - self.last_beat
+            # The heartbeat sleeps for one interval, so only time beyond that is blocking
+            if stalled - self.interval < self.threshold:
+                if block is not None:
+                    self._finish(block)
+                    block = None
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            if block is None:
+                block = {"started": time.time() - stalled, "samples": Counter()}
+            block["samples"][collapse_stack(frame)] += 1
+            block["seconds"] = stalled - self.interval
+
+    def _finish(self, block: dict):
+        self.blocks.append(block)
+        stack, _ = block["samples"].most_common(1)[0]
+        logger.warning(f"Event loop blocked for {block['seconds']:.2f}s in "
+                       f"{' <- '.join(reversed(stack.split(';')[-3:]))}")
+
+    def recent_blocks(self, limit: int = 10) -> List[Dict]:
+        """The latest blocks with their most sampled stack, newest first."""
+        return [{"started": round(block["started"], 3), "seconds": round(block["seconds"], 3),
+                 "stack": block["samples"].most_common(1)[0][0]}
+                for block in list(self.blocks)[::-1][:limit]]
+
+    async def stop(self):
+        self.stopped.set()
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            await asyncio.gather(self.heartbeat_task, return_exceptions=True)
+            self.heartbeat_task = None
+        if self.watchdog is not None:
+            await asyncio.to_thread(self.watchdog.join, 1)
+            self.watchdog = None
@@ -24,6 +24,24 @@ class MessageProcessor:
                 elif msg_type == "summary":
                     st.session_state.interim_summary_text = msg_data
 
+                elif msg_type == "reset":
+                    # The service replays the meeting from the start
+                    st.session_state.transcription_text = ""
+                    st.session_state.interim_summary_text = ""
+
+                elif msg_type == "summary_delta":
+                    if msg_data["first"]:
+                        st.session_state.interim_summary_text = ""
+                    st.session_state.interim_summary_text += msg_data["text"]
+
+                elif msg_type == "final_summary_delta":
+                    if msg_data["first"]:
+                        st.session_state.final_summary_text = ""
+                    st.session_state.final_summary_text += msg_data["text"]
+
+                elif msg_type == "llm_status":
+                    st.session_state.llm_status = msg_data
+
                 elif msg_type == "final_summary":
                     st.session_state.final_summary_text = msg_data
                     self.in_queue.put(("download_files", None))
@@ -0,0 +1,84 @@
+"""Prometheus metrics for the recording, transcription, summarization and delivery pipeline.
+
+The service serves them on http://localhost:<metrics_port>/metrics. Metrics live in
+their own registry so nothing else in the process is exported by accident.
+"""
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+from app import logger
+
+REGISTRY = CollectorRegistry()
+
+SEGMENT_LATENCY = Histogram(
+    'meeting_buddy_segment_latency_seconds',
+    'Time from the end of an audio segment capture until its transcription is queued for clients',
+    buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 300),
+    registry=REGISTRY,
+)
+TRANSCRIPTION_RTF = Histogram(
+    'meeting_buddy_transcription_real_time_factor',
+    'Transcription time divided by audio duration; above 1 the transcriber falls behind',
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 4),
+    registry=REGISTRY,
+)
+WATCH_QUEUE_DEPTH = Gauge(
+    'meeting_buddy_watch_queue_depth',
+    'Recorded segments waiting to be transcribed, across sessions',
+    registry=REGISTRY,
+)
+AUDIO_FRAMES_DROPPED = Counter(
+    'meeting_buddy_audio_frames_dropped',
+    'Audio frames lost to input overflow, estimated from wall-clock time against frames read',
+    registry=REGISTRY,
+)
+LLM_LATENCY = Histogram(
+    'meeting_buddy_llm_latency_seconds',
+    'Latency of successful LLM calls',
+    ['provider'],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 180),
+    registry=REGISTRY,
+)
+LLM_TOKENS = Counter(
+    'meeting_buddy_llm_tokens',
+    'Tokens used by LLM calls',
+    ['provider', 'kind'],
+    registry=REGISTRY,
+)
+LLM_ERRORS = Counter(
+    'meeting_buddy_llm_errors',
+    'LLM calls that failed after all retries',
+    ['provider'],
+    registry=REGISTRY,
+)
+CONNECTED_CLIENTS = Gauge(
+    'meeting_buddy_connected_clients',
+    'Websocket clients currently connected',
+    registry=REGISTRY,
+)
+EVENT_LOOP_LAG = Histogram(
+    'meeting_buddy_event_loop_lag_seconds',
+    'How late the service event loop runs a timer; high values mean blocking work on the loop',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    registry=REGISTRY,
+)
+
+
+def record_llm_call(result):
+    """Count the latency and tokens of a completed LLM call (an LLMResult)."""
+    LLM_LATENCY.labels(result.provider).observe(result.latency)
+    LLM_TOKENS.labels(result.provider, 'prompt').inc(result.prompt_tokens)
+    LLM_TOKENS.labels(result.provider, 'completion').inc(result.completion_tokens)
+    LLM_TOKENS.labels(result.provider, 'cached').inc(result.cached_tokens)
+
+
+def start_metrics_server(port: int, address: str = 'localhost'):
+    """Serve /metrics from a background thread; returns the server, or None when disabled or unavailable."""
+    if not port:
+        return None
+    try:
+        server, _ = start_http_server(port, address, registry=REGISTRY)
+    except OSError as e:
+        logger.error(f"Could not start the metrics endpoint on port {port}: {e}")
+        return None
+    logger.info(f"Metrics available on http://{address}:{port}/metrics")
+    return server
@@ -0,0 +1,176 @@
+"""Per-meeting performance report, archived with the meeting's output.
+
+At rollover the service writes performance.json and a readable performance.md into
+the output folder: audio captured against audio transcribed, segment latency and
+real-time factor percentiles, dropped frames, LLM calls, the time from stop to the
+final notes and peak memory. Reports of archived meetings can be compared across
+releases and machines with
+
+    python -m app.mb.performance_report archive/output_*/performance.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app import logger
+from app.mb.tracing import breakdown, distribution
+
+REPORT_FILE = 'performance.json'
+MARKDOWN_FILE = 'performance.md'
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident memory of the service process, or None where the platform does not report it."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MeetingStats:
+    """Counts what the recorder and transcriber did for one meeting."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stopped_at: Optional[float] = None
+        self.segments_recorded = 0
+        self.audio_captured_seconds = 0.0
+        self.dropped_frames = 0
+        self.segments_transcribed = 0
+        self.audio_transcribed_seconds = 0.0
+        self.segment_latencies: List[float] = []
+        self.real_time_factors: List[float] = []
+
+    def record_capture(self, audio_seconds: float, dropped_frames: int):
+        self.segments_recorded += 1
+        self.audio_captured_seconds += audio_seconds
+        self.dropped_frames += dropped_frames
+
+    def record_transcription(self, audio_seconds: float, seconds: float):
+        self.segments_transcribed += 1
+        self.audio_transcribed_seconds += audio_seconds
+        if audio_seconds:
+            self.real_time_factors.append(seconds / audio_seconds)
+
+    def record_latency(self, seconds: float):
+        """Time from the end of a segment's capture until its transcription was queued for clients."""
+        self.segment_latencies.append(seconds)
+
+    def stop(self):
+        if self.stopped_at is None:
+            self.stopped_at = time.time()
+
+
+def build_report(stats: MeetingStats, usage: Optional[dict] = None, spans: Optional[List[dict]] = None,
+                 loop_blocks: Optional[List[Dict]] = None, stop_latency: Optional[float] = None,
+                 **meeting) -> dict:
+    """The report of one meeting.
+
+    usage is the UsageLedger summary, spans the meeting's trace spans (for the stage
+    breakdown) and loop_blocks the LoopMonitor blocks; loop blocks and peak memory are
+    process-wide, so with concurrent meetings they are shared between their reports.
+    """
+    ended_at = stats.stopped_at or time.time()
+    blocks = [block for block in loop_blocks or [] if block["started"] >= stats.started_at]
+    captured = stats.audio_captured_seconds
+    peak_rss = peak_rss_bytes()
+    return {
+        "meeting": meeting,
+        "started_at": stats.started_at,
+        "duration_seconds": round(ended_at - stats.started_at, 1),
+        "audio": {
+            "segments_recorded": stats.segments_recorded,
+            "segments_transcribed": stats.segments_transcribed,
+            "captured_seconds": round(captured, 1),
+            "transcribed_seconds": round(stats.audio_transcribed_seconds, 1),
+            "transcribed_ratio": round(stats.audio_transcribed_seconds / captured, 3) if captured else None,
+            "dropped_frames": stats.dropped_frames,
+        },
+        "segment_latency_seconds": distribution(stats.segment_latencies),
+        "real_time_factor": distribution(stats.real_time_factors),
+        "stages": breakdown(spans) if spans else {},
+        "llm": (usage or {}).get("total", {}),
+        "llm_by_purpose": (usage or {}).get("by_purpose", {}),
+        "stop_to_final_notes_seconds": round(stop_latency, 1) if stop_latency is not None else None,
+        "event_loop_blocks": {"count": len(blocks), "seconds": round(sum(b["seconds"] for b in blocks), 3),
+                              "worst": max(blocks, key=lambda b: b["seconds"]) if blocks else None},
+        "peak_rss_mb": round(peak_rss / 2 ** 20, 1) if peak_rss else None,
+    }
+
+
+def _table(headers: List[str], rows: List[list]) -> List[str]:
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines += ["| " + " | ".join("" if cell is None else str(cell) for cell in row) + " |" for row in rows]
+    return lines
+
+
+def render_markdown(report: dict) -> str:
+    audio = report["audio"]
+    llm = report["llm"]
+    stats = ("count", "mean", "p50", "p95", "max")
+    lines = [
+        f"# Performance: {report['meeting'].get('name') or 'meeting'}",
+        "",
+        f"- Duration: {report['duration_seconds']} s",
+        f"- Audio: {audio['captured_seconds']} s captured in {audio['segments_recorded']} segments, "
+        f"{audio['transcribed_seconds']} s transcribed in {audio['segments_transcribed']} segments "
+        f"({audio['dropped_frames']} frames dropped)",
+        f"- Stop to final notes: {report['stop_to_final_notes_seconds']} s",
+        f"- LLM: {llm.get('calls', 0)} calls, {llm.get('prompt_tokens', 0)} prompt / "
+        f"{llm.get('completion_tokens', 0)} completion / {llm.get('cached_tokens', 0)} cached tokens, "
+        f"{round(llm.get('latency_total', 0.0), 1)} s total, {round(llm.get('latency_max', 0.0), 1)} s max",
+        f"- Event loop blocks: {report['event_loop_blocks']['count']} "
+        f"({report['event_loop_blocks']['seconds']} s)",
+        f"- Peak memory: {report['peak_rss_mb']} MB",
+        "",
+        "## Latency",
+        "",
+    ]
+    rows = [["segment latency (s)"] + [report["segment_latency_seconds"][key] for key in stats],
+            ["real-time factor"] + [report["real_time_factor"][key] for key in stats]]
+    rows += [[name] + [row[key] for key in stats]
+             for name, row in sorted(report["stages"].items(), key=lambda item: -item[1]["mean"])]
+    lines += _table(["", *stats], rows)
+    if report["llm_by_purpose"]:
+        lines += ["", "## LLM calls", ""]
+        lines += _table(["purpose", "calls", "prompt tokens", "completion tokens", "latency max (s)"],
+                        [[purpose, row["calls"], row["prompt_tokens"], row["completion_tokens"],
+                          round(row["latency_max"], 1)] for purpose, row in report["llm_by_purpose"].items()])
+    return '\n'.join(lines) + '\n'
+
+
+def write_report(report: dict, directory: str) -> str:
+    """Write performance.json and performance.md to directory (the meeting's output folder, before rollover)."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, REPORT_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    with open(os.path.join(directory, MARKDOWN_FILE), 'w', encoding='utf-8') as f:
+        f.write(render_markdown(report))
+    logger.info(f"Performance report written to {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the performance reports of archived meetings')
+    parser.add_argument('paths', nargs='+', help='performance.json files')
+    args = parser.parse_args()
+    print(f"{'meeting':32} {'audio s':>8} {'lat p50':>8} {'lat p95':>8} {'rtf p95':>8} {'final s':>8} {'rss MB':>8}")
+    for path in args.paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        name = report["meeting"].get("name") or os.path.basename(os.path.dirname(os.path.abspath(path)))
+        print(f"{name[:32]:32} {report['audio']['captured_seconds']:>8} "
+              f"{report['segment_latency_seconds']['p50']:>8} {report['segment_latency_seconds']['p95']:>8} "
+              f"{report['real_time_factor']['p95']:>8} {str(report['stop_to_final_notes_seconds']):>8} "
+              f"{str(report['peak_rss_mb']):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from typing import Dict, List
+
+from app import logger
+from app.mb.llm_gateway import LLMResult
+
+SYSTEM_PROMPT = (
+    "You are Meeting Buddy, an assistant that turns meeting transcripts into summaries and meeting notes. "
+    "The user provides the meeting context and transcript first; follow the instructions in the final message."
+)
+
+
+class PromptAssembler:
+    """Builds chat messages that keep as long a shared prefix as possible so model-side prompt caches are reused.
+
+    Every request is laid out as:
+        1. the fixed system prompt,
+        2. the meeting context note and the transcript text,
+        3. the per-request parts: retrieved context passages and the task instruction.
+
+    Anything that changes between requests (the 1-minute vs 10-minute prompt, the final
+    notes prompt, retrieved passages) comes last, so local runtimes (llama.cpp/Ollama KV
+    cache) and hosted APIs (OpenAI prompt caching) can serve the shared prefix from cache.
+    A raw transcript only grows by appending, so an earlier request is a prefix of a later
+    one. RollingSummarizer's compact text is not append-only: it is shared only up to its
+    newest summary layer, because summarizing a window replaces that window's raw text
+    and a fold replaces its minute summaries.
+    """
+
+    def __init__(self, prompt_manager):
+        self.prompt_manager = prompt_manager
+        self.usage: Dict[str, Dict[str, int]] = {}
+
+    def build(self, instruction: str, transcript: str, related_context: str = "",
+              include_meeting_context: bool = True, context_directory: str = None) -> List[dict]:
+        meeting_context = self.prompt_manager.load_meeting_context(context_directory) if include_meeting_context else ""
+        stable = f"Meeting context:\n{meeting_context}\n\nTranscription:\n{transcript}" if meeting_context \
+            else f"Transcription:\n{transcript}"
+        task = f"Related context:\n{related_context}\n\n{instruction}" if related_context else instruction
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": stable},
+            {"role": "user", "content": task}
+        ]
+
+    def record(self, result: LLMResult):
+        """Accumulate prompt tokens and the share the backend reports as served from its cache."""
+        usage = self.usage.setdefault(result.provider, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        usage["calls"] += 1
+        usage["prompt_tokens"] += result.prompt_tokens
+        usage["cached_tokens"] += result.cached_tokens
+        if result.cached_tokens:
+            logger.info(f"{result.provider} served {result.cached_tokens} of {result.prompt_tokens} prompt tokens from cache")
+
+    def cache_stats(self) -> Dict[str, dict]:
+        return {
+            provider: dict(usage, cached_ratio=usage["cached_tokens"] / usage["prompt_tokens"] if usage["prompt_tokens"] else 0.0)
+            for provider, usage in self.usage.items()
+        }
@@ -1,36 +1,84 @@
 import os
-from typing import Dict
+import time
+from typing import Dict, List, Optional, Tuple
 from app import logger
 from app.mb.config import Config
 
 class PromptManager:
-    """Manages loading and handling of prompt files and other text content."""
-    
-    def __init__(self, config:Config=None):
+    """Manages loading and handling of prompt files and other text content.
+
+    Prompts and the meeting context note are kept in memory and re-read only when a
+    file's mtime or size changes. Files are stat'ed at most once per reload_interval
+    seconds, so edits take effect live without disk I/O on every request.
+    """
+
+    def __init__(self, config:Config=None, reload_interval: float = None, clock=time.monotonic):
         if not config:
             self.config = Config.load_config() # TODO: maybe we make this some singleton behavior so we aren't passing around everywhere.
         else:
             self.config = config
-        self.prompts = self.load_prompts()
+        self.prompt_directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'prompts')
+        self.reload_interval = self.config.prompt_reload_interval if reload_interval is None else reload_interval
+        self.clock = clock
+        self._prompts: Dict[str, str] = {}
+        self._prompt_stats: Dict[str, Tuple[float, int]] = {}
+        self._prompts_checked_at: Optional[float] = None
+        # Per context directory: when it was checked, the note's stat and its text
+        self._contexts: Dict[str, Tuple[Optional[float], Optional[Tuple[float, int]], str]] = {}
+        self.load_prompts()
+
+    @property
+    def prompts(self) -> Dict[str, str]:
+        self._refresh_prompts()
+        return self._prompts
+
+    def _due(self, checked_at: Optional[float]) -> bool:
+        return checked_at is None or self.clock() - checked_at >= self.reload_interval
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[float, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
 
     def load_prompts(self) -> Dict[str, str]:
-        """Load all prompt files from the prompts directory."""
-        prompts_directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'prompts')
-        if not os.path.exists(prompts_directory):
-            logger.error(f"Prompts directory does not exist: {prompts_directory}")
+        """Load the prompt files from the prompts directory, re-reading only files that changed."""
+        self._prompts_checked_at = self.clock()
+        if not os.path.exists(self.prompt_directory):
+            logger.error(f"Prompts directory does not exist: {self.prompt_directory}")
             # Create the directory if it doesn't exist
-            os.makedirs(prompts_directory, exist_ok=True)
-            return {}
+            os.makedirs(self.prompt_directory, exist_ok=True)
+            self._prompts = {}
+            self._prompt_stats = {}
+            return self._prompts
 
         prompts_dict = {}
-        for root, _, files in os.walk(prompts_directory):
+        stats = {}
+        for root, _, files in os.walk(self.prompt_directory):
             for file in files:
                 if file.endswith(('.md', '.markdown')):
                     file_path = os.path.join(root, file)
                     base_name = os.path.splitext(file)[0]
-                    with open(file_path, 'r') as f:
-                        prompts_dict[base_name] = f.read()
-        return prompts_dict
+                    stat = self._stat(file_path)
+                    if stat is None:
+                        continue
+                    if self._prompt_stats.get(file_path) == stat and base_name in self._prompts:
+                        prompts_dict[base_name] = self._prompts[base_name]
+                    else:
+                        with open(file_path, 'r') as f:
+                            prompts_dict[base_name] = f.read()
+                        if self._prompt_stats:
+                            logger.info(f"Reloaded prompt '{base_name}' from {file_path}")
+                    stats[file_path] = stat
+        self._prompts = prompts_dict
+        self._prompt_stats = stats
+        return self._prompts
+
+    def _refresh_prompts(self):
+        if self._due(self._prompts_checked_at):
+            self.load_prompts()
 
     def read_directory_content(self, directory_path: str) -> str:
         """Read all files in the given directory and concatenate their contents."""
@@ -45,17 +93,31 @@ class PromptManager:
             logger.warning(f"Directory not found: {directory_path}. Ignoring context from this directory.")
         return context
 
-    def load_meeting_context(self) -> str:
-        """Load the user-supplied meeting context note."""
-        meeting_context_path = os.path.join(
-            self.config.context_directory,
-            self.config.user_meeting_context_file
-        )
-        if os.path.exists(meeting_context_path):
-            with open(meeting_context_path, 'r') as f:
-                return f.read()
-        return ""
+    def load_meeting_context(self, directory: str = None) -> str:
+        """Load the user-supplied meeting context note, re-reading it only after it changes.
+
+        directory is the meeting session's context directory, the configured one by default.
+        """
+        directory = directory or self.config.context_directory
+        checked_at, context_stat, context = self._contexts.get(directory, (None, None, ""))
+        if not self._due(checked_at):
+            return context
+        meeting_context_path = os.path.join(directory, self.config.user_meeting_context_file)
+        stat = self._stat(meeting_context_path)
+        if stat != context_stat:
+            if stat is None:
+                context = ""
+            else:
+                with open(meeting_context_path, 'r') as f:
+                    context = f.read()
+                if context_stat is not None:
+                    logger.info(f"Reloaded meeting context from {meeting_context_path}")
+        self._contexts[directory] = (self.clock(), stat, context)
+        return context
 
     def get_prompt(self, prompt_name: str) -> str:
         """Get a specific prompt by name."""
         return self.prompts.get(prompt_name, "")
+
+    def get_available_prompts(self) -> List[str]:
+        return sorted(self.prompts.keys())
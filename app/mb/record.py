@@ -3,16 +3,24 @@ import wave
 import asyncio
 import os
 import sys
+import time
 from typing import Optional
 
 from app import logger
 from app.mb.config import Config
+from app.mb.metrics import AUDIO_FRAMES_DROPPED
+from app.mb.performance_report import MeetingStats
+from app.mb.tracing import Tracer
 from app import logger, WATCH_DIRECTORY
 
 class AudioRecorder:
     """Handles audio recording functionality."""
     
-    def __init__(self):
+    def __init__(self, watch_directory: str = WATCH_DIRECTORY, tracer: Optional[Tracer] = None,
+                 stats: Optional[MeetingStats] = None):
+        self.watch_directory = watch_directory
+        self.tracer = tracer  # Starts a trace for every recorded segment when given
+        self.stats = stats  # Counts captured audio and dropped frames for the meeting's performance report
         self.stream: Optional[pyaudio.Stream] = None
         self.p_audio: Optional[pyaudio.PyAudio] = None
         self.recording = False
@@ -71,6 +79,7 @@ class AudioRecorder:
             logger.info("Skipping recording due to stop event")
             return
 
+        trace = self.tracer.start_segment(file_name, file=os.path.basename(file_name)) if self.tracer else None
         self.p_audio = pyaudio.PyAudio()
         try:
             # Get device info before opening stream
@@ -96,6 +105,8 @@ class AudioRecorder:
             logger.info(f"Successfully opened audio stream")
         except Exception as e:
             logger.error(f"Error opening audio stream: {e}")
+            if trace is not None:
+                self.tracer.take(file_name)
             raise
 
         logger.info(f"Recording: {file_name}")
@@ -104,6 +115,8 @@ class AudioRecorder:
         try:
             self.recording = True
             total_chunks = int(self.config.audio_rate / self.config.audio_chunk_size * self.config.chunk_record_duration)
+            started = time.monotonic()
+            capture_started_ns = time.time_ns()
             
             for i in range(total_chunks):
 
@@ -123,21 +136,47 @@ class AudioRecorder:
                     logger.error(f"IOError during recording: {e}")
                     break
 
+            dropped = self.count_dropped_frames(time.monotonic() - started, len(frames) * self.config.audio_chunk_size, device_rate)
+            if trace is not None:
+                trace.span("record.capture", capture_started_ns, chunks=len(frames), dropped_frames=dropped)
+            if self.stats is not None and frames:
+                self.stats.record_capture(len(frames) * self.config.audio_chunk_size / device_rate, dropped)
+
             if frames:  # Only save if we have recorded data
                 print(f"* Done recording: {file_name}")
                 sample_size = self.p_audio.get_sample_size(format)
                 
-                wf = wave.open(file_name, 'wb')
-                wf.setnchannels(self.config.audio_channels)
-                wf.setsampwidth(sample_size)
-                wf.setframerate(self.config.audio_rate)
-                wf.writeframes(b''.join(frames))
-                wf.close()
+                write_started_ns = time.time_ns()
+                await asyncio.to_thread(self._write_wav, file_name, frames, sample_size)
+                if trace is not None:
+                    trace.span("record.write", write_started_ns)
+            elif trace is not None:
+                self.tracer.take(file_name)
 
 
         finally:
             self._cleanup_audio()
 
+    def _write_wav(self, file_name: str, frames, sample_size: int):
+        wf = wave.open(file_name, 'wb')
+        wf.setnchannels(self.config.audio_channels)
+        wf.setsampwidth(sample_size)
+        wf.setframerate(self.config.audio_rate)
+        wf.writeframes(b''.join(frames))
+        wf.close()
+
+    def count_dropped_frames(self, elapsed: float, frames_read: int, rate: int) -> int:
+        """Estimate frames lost to input overflow: the device produced elapsed * rate, we read frames_read.
+
+        Reads return once a buffer is full, so up to one buffer of difference is expected.
+        """
+        dropped = int(elapsed * rate) - frames_read - self.config.audio_chunk_size
+        if dropped > 0:
+            AUDIO_FRAMES_DROPPED.inc(dropped)
+            logger.warning(f"About {dropped} audio frames were dropped while recording")
+            return dropped
+        return 0
+
     def _cleanup_audio(self):
         """Clean up audio resources."""
         logger.info("Starting audio resource cleanup")
@@ -243,8 +282,8 @@ class AudioRecorder:
         if self._stop_recording.is_set():
             return
 
-        os.makedirs(WATCH_DIRECTORY, exist_ok=True)
-        i = self.get_next_file_number(WATCH_DIRECTORY)
+        os.makedirs(self.watch_directory, exist_ok=True)
+        i = self.get_next_file_number(self.watch_directory)
         
         logger.info("Starting recording service...")
         try:
@@ -257,7 +296,7 @@ class AudioRecorder:
                     break
                     
                 try:
-                    file_name = os.path.join(WATCH_DIRECTORY, f'recording_{i}.wav')
+                    file_name = os.path.join(self.watch_directory, f'recording_{i}.wav')
                     await self.record_audio(file_name=file_name)
                     if self._stop_recording.is_set():
                         break
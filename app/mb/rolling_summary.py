@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from app import logger
+
+SummarizeFn = Callable[..., Awaitable[str]]
+
+
+class RollingSummarizer:
+    """Folds the session transcript into rolling minute and ten-minute summaries.
+
+    Only the summary layers and the not-yet-summarized tail are kept here; the full
+    transcript lives in the session's SessionTranscript. New transcription segments
+    are collected into a window. Once a window is
+    older than ``window_seconds`` it is summarized with the ``create_minute``
+    prompt, and every ``windows_per_fold`` minute summaries are folded into a
+    single ``create_ten_minute`` summary. Interim summaries are then built from
+    these compact layers instead of the full raw transcript. Layers are summarized
+    with ``summarize_layers`` when given (e.g. to queue them behind the final notes),
+    otherwise with ``summarize``.
+    """
+
+    def __init__(self, summarize: SummarizeFn, prompt_manager, window_seconds: int = 60,
+                 windows_per_fold: int = 10, clock: Callable[[], float] = time.monotonic,
+                 summarize_layers: Optional[SummarizeFn] = None):
+        self.summarize = summarize
+        self.summarize_layers = summarize_layers or summarize
+        self.prompt_manager = prompt_manager
+        self.window_seconds = window_seconds
+        self.windows_per_fold = windows_per_fold
+        self.clock = clock
+
+        self.pending: List[str] = []
+        self.window_started_at: Optional[float] = None
+        self.closed_windows: List[List[str]] = []
+        self.minute_summaries: List[str] = []
+        self.ten_minute_summaries: List[str] = []
+
+        self._lock = asyncio.Lock()
+        self._roll_task: Optional[asyncio.Task] = None
+
+    def has_content(self) -> bool:
+        return bool(self.pending or self.closed_windows or self.minute_summaries or self.ten_minute_summaries)
+
+    def add_segment(self, text: str):
+        """Add a transcription segment and roll the window over when it is full."""
+        if not text or not text.strip():
+            return
+        now = self.clock()
+        if self.window_started_at is None:
+            self.window_started_at = now
+        self.pending.append(text)
+
+        if now - self.window_started_at >= self.window_seconds:
+            self._close_window()
+            self._schedule_roll()
+
+    def _close_window(self):
+        if self.pending:
+            self.closed_windows.append(self.pending)
+        self.pending = []
+        self.window_started_at = None
+
+    def _schedule_roll(self):
+        if self._roll_task and not self._roll_task.done():
+            return
+        try:
+            self._roll_task = asyncio.get_running_loop().create_task(self.roll())
+        except RuntimeError:
+            logger.debug("No running event loop, rolling summaries will be computed on demand")
+
+    async def roll(self):
+        """Summarize all closed windows and fold minute summaries when enough have accumulated."""
+        async with self._lock:
+            while self.closed_windows:
+                window_text = "\n".join(self.closed_windows[0])
+                summary = await self._summarize_layer(window_text, 'create_minute')
+                self.closed_windows.pop(0)
+                self.minute_summaries.append(summary)
+                logger.info(f"Rolled minute summary #{len(self.minute_summaries)} "
+                            f"({len(window_text)} chars -> {len(summary)} chars)")
+
+                if len(self.minute_summaries) >= self.windows_per_fold:
+                    folded_text = "\n\n".join(self.minute_summaries)
+                    folded = await self._summarize_layer(folded_text, 'create_ten_minute')
+                    self.ten_minute_summaries.append(folded)
+                    self.minute_summaries = []
+                    logger.info(f"Folded minute summaries into ten-minute summary "
+                                f"#{len(self.ten_minute_summaries)}")
+
+    async def _summarize_layer(self, text: str, prompt_key: str) -> str:
+        """Summarize one layer, keeping the source text if the model call fails."""
+        prompt = self.prompt_manager.get_prompt(prompt_key)
+        try:
+            summary = await self.summarize_layers(text, prompt)
+        except Exception as e:
+            logger.error(f"Error rolling {prompt_key} summary: {e}")
+            summary = ""
+        if not summary or summary.startswith("Error"):
+            logger.warning(f"Keeping raw text for failed {prompt_key} summary")
+            return text
+        return summary
+
+    def compact_text(self) -> str:
+        """Render the summary layers plus the not-yet-summarized tail of the transcript.
+
+        Layers are rendered oldest first with the raw tail last, so the text up to the newest
+        summary stays the same until the next fold; the raw tail is rewritten as it is summarized.
+        """
+        sections = []
+        if self.ten_minute_summaries:
+            sections.append("10-minute summaries:\n" + "\n\n".join(self.ten_minute_summaries))
+        if self.minute_summaries:
+            sections.append("1-minute summaries:\n" + "\n\n".join(self.minute_summaries))
+        raw_tail = [segment for window in self.closed_windows for segment in window] + self.pending
+        if raw_tail:
+            sections.append("Raw transcript:\n" + "\n".join(raw_tail))
+        return "\n\n".join(sections)
+
+    async def interim_summary(self, on_delta=None) -> str:
+        """Produce an interim summary from the compact layers."""
+        if on_delta is None:
+            return await self.summarize(self.compact_text())
+        return await self.summarize(self.compact_text(), on_delta=on_delta)
+
+    async def finalize(self) -> str:
+        """Summarize the last open window and return the compact transcript for the final notes."""
+        self._close_window()
+        await self.roll()
+        return self.compact_text()
+
+    async def close(self):
+        """Cancel any in-flight roll task."""
+        if self._roll_task and not self._roll_task.done():
+            self._roll_task.cancel()
+            try:
+                await self._roll_task
+            except asyncio.CancelledError:
+                pass
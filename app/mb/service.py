@@ -1,67 +1,108 @@
 # service.py
 import asyncio
 import websockets
-import json
 import signal
 import os
-from datetime import datetime, timedelta
+import tempfile
+import time
+from datetime import datetime
+from functools import partial
 
 from websockets.protocol import State
 
-from app import logger, ROOT_PATH, OUTPUT_DIRECTORY, WATCH_DIRECTORY, CONTEXT_DIRECTORY
+from app import logger, ROOT_PATH
 from app.mb.record import AudioRecorder
 from app.mb.prompt_manager import PromptManager
-from app.mb.transcribe import Transcriber
+from app.mb.transcribe import Transcriber, release_whisper_models
 from app.mb.config import Config
-from app.mb.summarizer import run_summarizer
-from litellm import completion
-from app.mb.utils import rollover_directories, read_directory_files
-import queue
+from app.mb.summarizer import MeetingNotesGenerator
+from app.mb.rolling_summary import RollingSummarizer
+from app.mb.summary_trigger import SummaryTrigger
+from app.mb.transcript import SessionTranscript
+from app.mb.session import SessionManager, SessionLimitError
+from app.mb.llm_cache import LLMCache
+from app.mb.context_index import ContextIndex
+from app.mb.prompt_assembly import PromptAssembler
+from app.mb.llm_gateway import LLMGateway, LOCAL
+from app.mb.llm_warmup import LLMWarmer
+from app.mb.usage_ledger import UsageLedger, with_purpose, with_ledger, NEAR, EXCEEDED
+from app.mb.llm_scheduler import LLMScheduler, LLMJobCancelled, FINAL, ROLLING, INTERIM
+from app.mb.file_transfer import send_file, ZLIB
+from app.mb.broadcast import Broadcaster, log_preview
+from app.mb.event_log import EventLog, LOGGED_TYPES
+from app.mb.tracing import Tracer, TRACE_FILE, current_trace, read_spans
+from app.mb.performance_report import MeetingStats, build_report, write_report
+from app.mb.metrics import CONNECTED_CLIENTS, start_metrics_server
+from app.mb.loop_monitor import LoopMonitor, sample_stacks, write_collapsed
+from app.mb.wire import WireCodec, WireError, negotiate, deflate_options
+from app.mb.utils import rollover_directories
 
 class Service:
     def __init__(self):
         self.config = Config.load_config(os.path.join(ROOT_PATH, 'config.yaml'))
-        self.recording = False
-        self.output_queue = queue.Queue()
         self.clients = set()
-        self.recorder = None
-        self.transcriber = None
-        self.transcription_task = None
-        self.recorder_task = None
-        self.summarize_lock = asyncio.Lock()  # Lock for summarization
+        self.codecs = {}  # Wire format negotiated per client; JSON until it says hello
+        self.json_codec = WireCodec()
+        # Per-client bounded send queues so a slow client never holds up the others
+        self.broadcaster = Broadcaster(self.codec, self.config.broadcast_queue_size, self.config.slow_consumer_policy)
+        # Meetings run as sessions with their own pipelines; models and the scheduler are shared
+        self.sessions = SessionManager(self.config.max_sessions)
+        self.client_sessions = {}  # Session each client follows
+        self.llm_scheduler = LLMScheduler(self.config.llm_concurrency)  # Prioritizes final over interim summaries
+        self.summarize_tasks = set()
+        # Records where the event loop blocks; the profile action samples every thread on demand
+        self.loop_monitor = LoopMonitor(self.config.loop_block_threshold)
+        self.profiling = False
+        self.llm_warmer = None
         self.prompt_manager = PromptManager(self.config)
-        self.prompts = self.prompt_manager.load_prompts()  # Explicitly load prompts
+        self.llm_cache = LLMCache.from_config(self.config)
+        self.llm = LLMGateway(self.config)
+        self.context_index = ContextIndex.from_config(self.config)
+        self.prompt_assembler = PromptAssembler(self.prompt_manager)
         self.started_at = datetime.now()
         
-        # Verify prompts loaded correctly and contain required keys
+        # Verify prompts loaded correctly and contain required keys; templates are read through
+        # the prompt manager on every use, so edited prompt files are picked up
+        prompts = self.prompt_manager.prompts
         required_prompts = {'create_minute', 'create_ten_minute'}
-        if not self.prompts:
+        if not prompts:
             logger.error("No prompts were loaded")
-            logger.error(f"Expected prompt files in: {self.prompt_manager.config.prompts_directory}")
+            logger.error(f"Expected prompt files in: {self.prompt_manager.prompt_directory}")
             raise RuntimeError("No prompts were loaded")
             
-        missing_prompts = required_prompts - set(self.prompts.keys())
+        missing_prompts = required_prompts - set(prompts.keys())
         if missing_prompts:
             logger.error(f"Missing required prompts: {missing_prompts}")
-            logger.error(f"Available prompts: {list(self.prompts.keys())}")
+            logger.error(f"Available prompts: {list(prompts.keys())}")
             logger.error(f"Prompt directory: {self.prompt_manager.prompt_directory}")
             raise RuntimeError(f"Required prompts not found: {missing_prompts}")
             
-        logger.info(f"Successfully loaded prompts: {list(self.prompts.keys())}")
+        logger.info(f"Successfully loaded prompts: {list(prompts.keys())}")
+        self.notes_generator = MeetingNotesGenerator(self.config, service=self, prompt_manager=self.prompt_manager)
 
+    @property
+    def recording(self) -> bool:
+        return bool(self.sessions.active)
 
-    def get_running_time_in_minutes(self) -> float:
-        delta = (datetime.now() - self.started_at).total_seconds() / 60
+    def get_running_time_in_minutes(self, started_at: datetime = None) -> float:
+        delta = (datetime.now() - (started_at or self.started_at)).total_seconds() / 60
         return int(delta)
 
-    async def summarize_text(self, content: str, prompt: str=None) -> str:
-        """Generate a summary of the provided text using LLM."""
+    async def summarize_text(self, content: str, prompt: str=None, on_delta=None, started_at: datetime = None,
+                             context_index: ContextIndex = None) -> str:
+        """Generate a summary of the provided text using LLM.
+
+        When on_delta is given and streaming is enabled, each response delta is
+        awaited through it while the summary is being generated. context_index is the
+        meeting session's index; its directory also holds the meeting context note.
+        """
+        context_index = context_index or self.context_index
         if not content.strip():
             logger.warning("Empty content provided to summarize_text")
             return ""
 
         if not prompt:
-            minutes_elapsed = self.get_running_time_in_minutes()
+            minutes_elapsed = self.get_running_time_in_minutes(started_at)
             prompt_key = 'create_minute' if minutes_elapsed < 10 else 'create_ten_minute'
             prompt = self.prompt_manager.get_prompt(prompt_key)
             
@@ -74,279 +115,570 @@ class Service:
 
         try:
             try:
-                meeting_context = self.prompt_manager.load_meeting_context()
+                meeting_context = self.prompt_manager.load_meeting_context(context_index.directory)
                 logger.info(f"Loaded meeting context of length: {len(meeting_context)}")
             except Exception as e:
                 logger.error(f"Error loading meeting context: {e}")
                 meeting_context = ""
             
-            messages = [
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": f"{meeting_context}\n\nTranscription:\n{content}"}
-            ]
-            
-            logger.debug(f"Sending request to LLM with {len(messages)} messages")
-            # Run the blocking LLM call in a thread
-            response = await asyncio.to_thread(
-                completion,
-                model=self.config.local_llm_model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=4000
+            # Only the context passages relevant to this transcript window are sent
+            related_context = await asyncio.to_thread(
+                context_index.related_context, content,
+                self.config.context_top_k, self.config.context_token_budget
             )
-            
-            if not response:
-                logger.error("Received null response from LLM")
-                return "Error: Null response from language model"
-                
-            if not hasattr(response, 'choices'):
-                logger.error(f"Invalid response structure: {response}")
-                return "Error: Invalid response structure from language model"
-                
-            if not response.choices:
-                logger.error("Empty choices in LLM response")
-                return "Error: No choices in language model response"
-                
-            summary = response.choices[0].message.content
+            meeting_context = f"{meeting_context}\n{related_context}"
+
+            # The cache is SQLite and files on disk, so it is read and written off the loop
+            cached = await asyncio.to_thread(self.llm_cache.get, self.config.local_llm_model, prompt,
+                                             meeting_context, content)
+            if cached is not None:
+                if on_delta is not None:
+                    await on_delta(cached)
+                return cached
+
+            # Shared parts (system, context, transcript) first; the prompt that flips at 10 minutes goes last
+            messages = self.prompt_assembler.build(prompt, content, related_context,
+                                                   context_directory=context_index.directory)
+
+            streaming = on_delta is not None and self.config.stream_summaries
+            logger.debug(f"Sending request to LLM with {len(messages)} messages")
+            result = await self.llm.complete(LOCAL, messages, on_delta=on_delta if streaming else None)
+
+            self.prompt_assembler.record(result)
+            summary = result.text
+            if not summary:
+                logger.error("Empty response from LLM")
+                return "Error: Empty response from language model"
+
             logger.info(f"Successfully generated summary of length: {len(summary)}")
+            await asyncio.to_thread(self.llm_cache.set, self.config.local_llm_model, prompt, meeting_context,
+                                    content, summary)
             return summary
             
         except Exception as e:
             logger.error(f"Summarization error: {str(e)}", exc_info=True)
             return f"Error generating summary: {str(e)}"
 
+    async def summarize_layer(self, content: str, prompt: str = None, on_delta=None, started_at: datetime = None,
+                              context_index: ContextIndex = None) -> str:
+        """Summarize one rolling-summary layer; recorded as rolling work unless part of an interim summary."""
+        return await with_purpose("rolling", self.summarize_text(content, prompt, on_delta, started_at, context_index))
+
+    async def schedule_layer(self, session, content: str, prompt: str = None) -> str:
+        """Summarize one rolling layer as a scheduler job, after the final notes and before interim summaries."""
+        session.rolling_layers += 1
+        return await self.llm_scheduler.submit(
+            lambda: with_ledger(session.usage_ledger, self.summarize_layer(
+                content, prompt, started_at=session.started_at, context_index=session.context_index)),
+            priority=ROLLING,
+            key=session.job_key(f"rolling:{session.rolling_layers}")
+        )
+
+    async def on_budget(self, session, state: str):
+        """Spend less once the meeting nears or exceeds its token budget."""
+        if state == NEAR and session.summary_trigger is not None:
+            session.summary_trigger.slow_down(self.config.meeting_budget_throttle_factor)
+        elif state == EXCEEDED and session.summary_trigger is not None:
+            session.summary_trigger.pause()
+        if state in (NEAR, EXCEEDED):
+            # This meeting's final notes use the cheaper local model; other meetings are unaffected
+            session.preferred_provider = LOCAL
+
+    def delta_sender(self, websocket, message_type: str):
+        """Build an on_delta callback that queues summary deltas for a single client.
+
+        Deltas go through the client's send queue, so a stalled tab cannot hold up the LLM job.
+        """
+        first = True
+
+        async def send_delta(delta: str):
+            nonlocal first
+            self.broadcaster.publish([websocket], {"type": message_type, "text": delta, "first": first})
+            first = False
+        return send_delta
+
+    def codec(self, websocket) -> WireCodec:
+        return self.codecs.get(websocket) or self.json_codec
+
+    async def send_message(self, websocket, message: dict):
+        """Send a message to one client in its negotiated wire format."""
+        await websocket.send(self.codec(websocket).encode(message))
+
+    def delta_broadcaster(self, message_type: str, session):
+        """Build an on_delta callback that forwards summary deltas to every client of the session."""
+        first = True
+
+        async def broadcast_delta(delta: str):
+            nonlocal first
+            self.publish(session, {"type": message_type, "text": delta, "first": first})
+            first = False
+        return broadcast_delta
+
+    def publish(self, session, message: dict) -> int:
+        """Record the message in the session's event log when it is replayable and queue it for its clients."""
+        if message.get("type") in LOGGED_TYPES:
+            session.events.append(message)
+        return self.broadcaster.publish(session.clients, message)
+
+    def reset_event_log(self, session):
+        """Start a new event log for a new meeting; tokens from the previous one get a full replay."""
+        session.events.close()
+        session.events = EventLog(self.config.event_log_size, os.path.join(tempfile.gettempdir(), "meeting_buddy_events"))
+
+    async def stop_when_abandoned(self, session):
+        """Stop a meeting whose clients all left, unless one reconnects within the grace period."""
+        try:
+            await asyncio.sleep(self.config.reconnect_grace_seconds)
+        except asyncio.CancelledError:
+            return
+        session.abandon_task = None
+        if not session.clients:
+            logger.info(f"No client reconnected to meeting session {session.session_id}. Stopping services.")
+            await self.stop_services(session, "unknown", include_context=True)
+            self.sessions.discard(session)
+
+    async def handle_summarize(self, websocket, session, since_seq: int = 0):
+        """Generate an interim summary for one client through the LLM scheduler.
+
+        since_seq selects the part of the session transcript to summarize: 0 for the whole
+        meeting, otherwise only the segments after that sequence number.
+        """
+        logger.info("Performing local LLM summarization")
+        rolling_summary = session.rolling_summary
+        use_rolling = since_seq == 0 and rolling_summary is not None and rolling_summary.has_content()
+        text = "" if use_rolling else session.transcript.since(since_seq)
+        if not use_rolling and not text.strip():
+            logger.warning("Received empty text for summarization")
+            self.broadcaster.publish([websocket], {"type": "error", "text": "Cannot summarize empty text"})
+            return
+
+        on_delta = self.delta_sender(websocket, "summary_delta")
+        if use_rolling:
+            # The service keeps its own transcript, so summarize the compact layers.
+            # Every client gets the same summary, so one queued job serves all of them.
+            logger.debug("Summarizing from rolling summary layers")
+            run = lambda: with_ledger(session.usage_ledger, with_purpose(
+                "interim", rolling_summary.interim_summary(on_delta=on_delta)))
+            key = session.job_key("interim")
+        else:
+            logger.debug(f"Attempting to summarize text of length: {len(text)}")
+            run = lambda: with_ledger(session.usage_ledger, with_purpose(
+                "interim", self.summarize_text(text, on_delta=on_delta, started_at=session.started_at,
+                                               context_index=session.context_index)))
+            # A newer request for the same range replaces a queued one, which would summarize fewer segments
+            key = session.job_key(f"interim:{since_seq}")
+
+        try:
+            summary = await self.llm_scheduler.submit(run, priority=INTERIM, key=key)
+            # Queued behind this client's deltas, so the summary arrives after them
+            if summary:
+                logger.info(f"Successfully generated summary of length: {len(summary)}")
+                self.broadcaster.publish([websocket], {"type": "summary", "text": summary})
+            else:
+                logger.error("Empty summary received from summarize_text")
+                self.broadcaster.publish([websocket], {"type": "error",
+                                                       "text": "Failed to generate summary: empty response"})
+        except LLMJobCancelled as e:
+            logger.info(f"Interim summary dropped: {e}")
+        except Exception as e:
+            error_msg = f"Error: Failed to generate summary - {str(e)}"
+            logger.error(f"Error in summarize handler: {str(e)}", exc_info=True)
+            self.broadcaster.publish([websocket], {"type": "error", "text": error_msg})
+
     async def handler(self, websocket):
-        client_failure = False
         self.clients.add(websocket)
+        CONNECTED_CLIENTS.set(len(self.clients))
         try:
             async for message in websocket:
-                logger.info(f"Socket Message Received: {message}")
-                command = json.loads(message)
+                try:
+                    command = self.codec(websocket).decode(message)
+                except WireError as e:
+                    logger.warning(f"Rejected client message: {e}")
+                    await self.send_message(websocket, {"type": "error", "text": f"Invalid message: {e}"})
+                    continue
+                logger.info(f"Socket Message Received: {log_preview(command)}")
+                if command.get("action") == "hello":
+                    try:
+                        codec, reply = negotiate(command)
+                    except WireError as e:
+                        await self.send_message(websocket, {"type": "error", "text": str(e)})
+                        continue
+                    # The reply still goes out in JSON; everything after it uses the chosen format
+                    await self.send_message(websocket, reply)
+                    self.codecs[websocket] = codec
+                    logger.info(f"Client negotiated wire format {codec.format} v{reply['version']}")
+                    continue
+                if command.get("action") == "llm_status":
+                    status = self.llm_warmer.snapshot() if self.llm_warmer else {"ready": False, "providers": {}}
+                    await self.send_message(websocket, {"type": "llm_status", **status})
+                    continue
+                if command.get("action") == "sessions":
+                    await self.send_message(websocket, {"type": "sessions", **self.sessions.usage()})
+                    continue
+                if command.get("action") == "profile":
+                    task = asyncio.create_task(self.send_profile(websocket, command.get("seconds") or 10))
+                    self.summarize_tasks.add(task)
+                    task.add_done_callback(self.summarize_tasks.discard)
+                    continue
+                session = self.session_for(websocket, command.get("session"))
+                if command.get("action") == "resume":
+                    # A reconnecting client gets only the events it missed, queued ahead of new ones
+                    events, reset = await self.missed_events(websocket, session, command.get("token"))
+                    resumed = {"type": "resumed", "session": session.session_id, "recording": session.recording,
+                               "reset": reset, "replayed": len(events), "event_log": session.events.log_id}
+                    self.broadcaster.replay(websocket, [resumed] + events)
+                    logger.info(f"Client resumed meeting session {session.session_id} with {len(events)} missed event(s)")
+                    continue
                 if command.get("action") == "start":
-                    logger.info("Starting transcription service")
-                    self.recording = True
+                    if session.recording:
+                        # Another client joins the running meeting instead of restarting it, and catches up
+                        events, _ = await self.missed_events(websocket, session)
+                        self.broadcaster.replay(websocket, events)
+                        logger.info(f"Client joined running meeting session {session.session_id}, "
+                                    f"replaying {len(events)} event(s)")
+                        await self.send_message(websocket, {"type": "recording", "recording": True,
+                                                            "session": session.session_id,
+                                                            "event_log": session.events.log_id})
+                        continue
+                    try:
+                        self.sessions.check_capacity(session)
+                    except SessionLimitError as e:
+                        logger.warning(f"Refused to start meeting session {session.session_id}: {e}")
+                        await self.send_message(websocket, {"type": "error", "text": str(e)})
+                        continue
+                    logger.info(f"Starting transcription service for meeting session {session.session_id}")
+                    session.mark_started()
+                    self.reset_event_log(session)
                     # Send response before starting services
-                    await websocket.send(json.dumps({"recording": True}))
+                    await self.send_message(websocket, {"type": "recording", "recording": True,
+                                                        "session": session.session_id,
+                                                        "event_log": session.events.log_id})
                     # Start services after responding
-                    await self.start_services()
+                    await self.start_services(session)
                 elif command.get("action") == "stop":
                     meeting_name = command.get("meeting_name", "")
                     logger.info(f"Stopping transcription service with meeting name: {meeting_name}")
                     # Send response before stopping services
-                    await websocket.send(json.dumps({"recording": False}))
+                    await self.send_message(websocket, {"type": "recording", "recording": False,
+                                                        "session": session.session_id})
                     # Stop services after responding
                     try:
-                        await self.stop_services(meeting_name, include_context=True)
+                        await self.stop_services(session, meeting_name, include_context=True)
                     except Exception as e:
                         logger.error(f"Error during stop_services: {e}", exc_info=True)
                         # Send error message to client
                         if websocket.state == State.OPEN:
-                            await websocket.send(json.dumps({
+                            await self.send_message(websocket, {
                                 "type": "error",
                                 "text": f"Error stopping services: {str(e)}"
-                            }))
+                            })
                 elif command.get("action") == "summarize":
-                    async with self.summarize_lock:
-                        logger.info("Performing local LLM summarization")
-                        text = command.get("text", "")
-                        if not text.strip():
-                            logger.warning("Received empty text for summarization")
-                            await websocket.send(json.dumps({
-                                "type": "error",
-                                "text": "Cannot summarize empty text"
-                            }))
-                            continue
-                            
-                        try:
-                            logger.debug(f"Attempting to summarize text of length: {len(text)}")
-                            summary = await self.summarize_text(text)
-                            if summary:
-                                logger.info(f"Successfully generated summary of length: {len(summary)}")
-                                try:
-                                    if websocket.state == State.OPEN:
-                                        await websocket.send(json.dumps({
-                                            "type": "summary", 
-                                            "text": summary
-                                        }))
-                                except Exception as ws_err:
-                                    logger.error(f"Failed to send summary: {ws_err}")
-                            else:
-                                logger.error("Empty summary received from summarize_text")
-                                try:
-                                    if websocket.state == State.OPEN:
-                                        await websocket.send(json.dumps({
-                                            "type": "error",
-                                            "text": "Failed to generate summary: empty response"
-                                        }))
-                                except Exception as ws_err:
-                                    logger.error(f"Failed to send error message: {ws_err}")
-                        except Exception as e:
-                            error_msg = f"Error: Failed to generate summary - {str(e)}"
-                            logger.error(f"Error in summarize handler: {str(e)}", exc_info=True)
-                            try:
-                                if not websocket.closed:
-                                    await websocket.send(json.dumps({
-                                        "type": "error",
-                                        "text": error_msg
-                                    }))
-                            except Exception as ws_err:
-                                logger.error(f"Failed to send error message: {ws_err}")
+                    # Run in the background so a stop from this client is not stuck behind the summary
+                    task = asyncio.create_task(
+                        self.handle_summarize(websocket, session, int(command.get("since_seq") or 0))
+                    )
+                    self.summarize_tasks.add(task)
+                    task.add_done_callback(self.summarize_tasks.discard)
                 elif command.get("action") == "download_files":
                     logger.info("Handling download_files request")
                     try:
-                        # Get most recent transcription file
-                        transcription_files = [f for f in os.listdir(OUTPUT_DIRECTORY) if f.endswith('transcription.txt')]
-                        if transcription_files:
-                            latest_transcription = max(transcription_files, key=lambda x: os.path.getmtime(os.path.join(OUTPUT_DIRECTORY, x)))
-                            transcription_path = os.path.join(OUTPUT_DIRECTORY, latest_transcription)
-                            if os.path.exists(transcription_path):
-                                with open(transcription_path, 'rb') as f:
-                                    transcription_data = f.read()
-                                if websocket.state == State.OPEN:
-                                    await websocket.send(json.dumps({
-                                        "type": "file_data",
-                                        "file_type": "transcription",
-                                        "data": transcription_data.hex(),
-                                        "filename": latest_transcription
-                                    }))
-                                logger.info("Sent transcription file data")
-                            else:
-                                logger.error(f"Transcription file not found: {transcription_path}")
-                        else:
-                            logger.error("No transcription files found")
-                        
-                        # Get most recent summary file from context directory
-                        summary_file = os.path.join(CONTEXT_DIRECTORY, self.config.meeting_notes_file)
-                        if os.path.exists(summary_file):
-                            with open(summary_file, 'rb') as f:
-                                summary_data = f.read()
-                                try:
-                                    if websocket.state == State.OPEN:
-                                        await websocket.send(json.dumps({
-                                            "type": "file_data",
-                                            "file_type": "summary",
-                                            "data": summary_data.hex(),
-                                            "filename": self.config.meeting_notes_file
-                                        }))
-                                except Exception as ws_err:
-                                    logger.error(f"Failed to send summary data: {ws_err}")
+                        await self.send_download_files(websocket, session, command)
                     except Exception as e:
                         logger.error(f"Error handling download_files request: {e}")
-                        await websocket.send(json.dumps({
+                        await self.send_message(websocket, {
                             "type": "error",
                             "message": f"Error retrieving files: {str(e)}"
-                        }))
+                        })
         except websockets.ConnectionClosed:
             logger.warning("Websocket connection closed!")
-            client_failure = True
         except Exception as e:
             logger.error(f"Error in websocket handler: {e}")
-            client_failure = True
         finally:
-            if client_failure:
-                self.clients.remove(websocket)
-                logger.info("Client connection cleaned up")
-                if len(self.clients) == 0:
-                    logger.info("No active clients. Stopping services.")
-                    await self.stop_services("unknown", include_context=True)
-
-    async def start_services(self):
+            self.broadcaster.remove(websocket)
+            self.clients.discard(websocket)
+            CONNECTED_CLIENTS.set(len(self.clients))
+            self.codecs.pop(websocket, None)
+            session = self.client_sessions.pop(websocket, None)
+            logger.info("Client connection cleaned up")
+            if session is not None:
+                session.clients.discard(websocket)
+                if not session.clients and session.recording:
+                    # Keep recording through a brief UI disconnect; the client resumes with its token
+                    logger.info(f"No active clients in meeting session {session.session_id}. "
+                                f"Stopping services in {self.config.reconnect_grace_seconds}s unless one reconnects.")
+                    session.abandon_task = asyncio.create_task(self.stop_when_abandoned(session))
+                else:
+                    self.sessions.discard(session)
+
+    async def missed_events(self, websocket, session, token: str = None):
+        """The events a client holding token missed, and whether it must reset; see EventLog.resume.
+
+        Spilled events are read back off the loop. Live events are held back from the client
+        meanwhile and come with the result instead, so the caller must replay it without awaiting.
+        Events are marked replayed, so clients can tell a past error from a new one.
+        """
+        session.clients.discard(websocket)
+        try:
+            events, reset = await session.events.resume(token)
+            return [dict(event, replayed=True) for event in events], reset
+        finally:
+            if self.client_sessions.get(websocket) is session:
+                session.clients.add(websocket)
+
+    def session_for(self, websocket, session_id: str = None):
+        """The session a client's command applies to, subscribing the client when it names one."""
+        current = self.client_sessions.get(websocket)
+        if current is not None and (session_id is None or self.sessions.normalize_id(session_id) == current.session_id):
+            return current
+        session = self.sessions.get(session_id)
+        if current is not None:
+            current.clients.discard(websocket)
+            self.sessions.discard(current)
+        if session.abandon_task is not None:
+            session.abandon_task.cancel()
+            session.abandon_task = None
+        session.clients.add(websocket)
+        self.client_sessions[websocket] = session
+        return session
+
+    async def send_profile(self, websocket, seconds: float):
+        """Sample every thread for a few seconds and send the collapsed stacks to the client as a file."""
+        if self.profiling:
+            await self.send_message(websocket, {"type": "error", "text": "A profile is already being recorded"})
+            return
+        seconds = min(max(float(seconds), 1.0), 60.0)
+        self.profiling = True
+        try:
+            logger.info(f"Profiling the service for {seconds:.0f} seconds")
+            stacks = await asyncio.to_thread(sample_stacks, seconds)
+            path = os.path.join(tempfile.gettempdir(), "meeting_buddy_profiles",
+                                f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed")
+            await asyncio.to_thread(write_collapsed, stacks, path)
+        finally:
+            self.profiling = False
+        if websocket.state != State.OPEN:
+            return
+        await self.send_message(websocket, {"type": "profile", "seconds": seconds, "samples": sum(stacks.values()),
+                                            "blocks": self.loop_monitor.recent_blocks()})
+        await send_file(websocket, path, "profile", chunk_size=self.config.file_chunk_size,
+                        encode=self.codec(websocket).encode)
+
+    def download_file_list(self, session):
+        """The session's latest transcription and meeting notes as (file type, path); scans the disk."""
+        files = []
+        output_directory = session.output_directory
+        # Get most recent transcription file
+        transcription_files = [f for f in os.listdir(output_directory) if f.endswith('transcription.txt')] \
+            if os.path.exists(output_directory) else []
+        if transcription_files:
+            latest_transcription = max(transcription_files, key=lambda x: os.path.getmtime(os.path.join(output_directory, x)))
+            files.append(("transcription", os.path.join(output_directory, latest_transcription)))
+        else:
+            logger.error("No transcription files found")
+        summary_file = os.path.join(session.context_directory, self.config.meeting_notes_file)
+        if os.path.exists(summary_file):
+            files.append(("summary", summary_file))
+        return files
+
+    async def send_download_files(self, websocket, session, command):
+        """Stream the session's latest transcription and meeting notes to one client as chunked binary frames."""
+        compression = ZLIB if command.get("compression") else None
+        resume = command.get("resume") or {}
+        files = await asyncio.to_thread(self.download_file_list, session)
+        file_types = command.get("file_types")  # Only these, e.g. the downloads a reconnect cut off
+
+        for file_type, path in files:
+            if file_types is not None and file_type not in file_types:
+                continue
+            if websocket.state != State.OPEN:
+                break
+            await send_file(
+                websocket, path, file_type,
+                chunk_size=self.config.file_chunk_size,
+                compression=compression,
+                resume=resume.get(file_type),
+                encode=self.codec(websocket).encode
+            )
+
+    def context_index_for(self, session) -> ContextIndex:
+        """The session's context index; other rooms index their own context directory."""
+        if session.context_index is not None:
+            return session.context_index
+        if os.path.abspath(session.context_directory) == os.path.abspath(self.context_index.directory):
+            return self.context_index
+        return ContextIndex.from_config(self.config, session.context_directory)
+
+    @staticmethod
+    def prepare_directories(session):
         # Check if output directory has content and rollover if needed
         if (
-                (os.path.exists(OUTPUT_DIRECTORY) and any(os.listdir(OUTPUT_DIRECTORY))) or
-                (os.path.exists(WATCH_DIRECTORY) and any(os.listdir(WATCH_DIRECTORY)))
+                (os.path.exists(session.output_directory) and any(os.listdir(session.output_directory))) or
+                (os.path.exists(session.watch_directory) and any(os.listdir(session.watch_directory)))
         ):
             logger.info("Output directory not empty, probably due to a crash, rolling over files")
-            rollover_directories("")
+            rollover_directories(session.archive_name(""), watch_directory=session.watch_directory,
+                                 output_directory=session.output_directory)
+        session.make_directories()
 
-        # Initialize transcriber
-        self.transcriber = Transcriber()
+    @staticmethod
+    def read_watch_transcripts(watch_directory: str) -> str:
+        """Transcription text files of the watch directory, in order, joined by line feeds."""
+        # Get all .txt files and sort them (to maintain order)
+        txt_files = sorted([f for f in os.listdir(watch_directory) if f.endswith('.txt')])
+        transcription_parts = []
+        for txt_file in txt_files:
+            file_path = os.path.join(watch_directory, txt_file)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read().strip()
+                    if content:  # Only add non-empty content
+                        transcription_parts.append(content)
+            except Exception as e:
+                logger.error(f"Error reading file {txt_file}: {e}")
+
+        # Join all parts with line feeds
+        return '\n'.join(transcription_parts)
 
-        # Create tasks for recorder and transcriber
-        self.recorder_task = asyncio.create_task(self.run_recorder())
-        self.transcription_task = asyncio.create_task(
-            self.transcriber.run_transcriber(self.broadcast_transcription)
+    async def start_services(self, session):
+        # Disk scans, moves and the model load run off the loop so other meetings keep streaming
+        await asyncio.to_thread(self.prepare_directories, session)
+
+        # Initialize transcriber
+        # Segment traces go to the output folder so they are archived with the meeting
+        session.tracer = Tracer(os.path.join(session.output_directory, TRACE_FILE)) if self.config.tracing_enabled else None
+        session.last_trace = None
+        session.stats = MeetingStats()
+        session.preferred_provider = None
+        session.context_index = self.context_index_for(session)
+        session.last_stop_latency = None
+        session.transcriber = await asyncio.to_thread(Transcriber, session.watch_directory, session.tracer,
+                                                      session.stats)
+        session.transcript = SessionTranscript()
+        # Record every LLM call of this meeting, with the optional token budget
+        session.usage_ledger = UsageLedger.from_config(self.config, on_budget=partial(self.on_budget, session))
+        session.rolling_layers = 0
+        session.rolling_summary = RollingSummarizer(
+            partial(self.summarize_layer, started_at=session.started_at, context_index=session.context_index),
+            self.prompt_manager,
+            window_seconds=self.config.rolling_window_seconds,
+            windows_per_fold=self.config.rolling_windows_per_fold,
+            summarize_layers=partial(self.schedule_layer, session)
         )
+        session.summary_trigger = SummaryTrigger.from_config(self.config)
+        session.trigger_task = asyncio.create_task(self.run_summary_trigger(session))
+
+        # Load the local model now so the first interim summary does not pay the cold start;
+        # sessions that start later find it warm. The hosted model has no cold start, so it is not pinged.
+        if self.llm_warmer is None:
+            self.llm_warmer = LLMWarmer(self.llm, [LOCAL], self.config.llm_keep_alive_interval,
+                                        on_status=self.broadcast_llm_status)
+            if self.config.llm_warm_up:
+                self.llm_warmer.start()
 
-    async def stop_services(self, meeting_name: str = "", include_context: bool = False):
-        if self.recording:
-            logger.info("Beginning stop_services process")
-            self.recording = False
+        # Create tasks for recorder and transcriber; LLM work they start is charged to the session
+        session.recorder_task = asyncio.create_task(self.run_recorder(session))
+        session.transcription_task = asyncio.create_task(with_ledger(
+            session.usage_ledger, session.transcriber.run_transcriber(partial(self.on_transcription, session))
+        ))
+
+    async def stop_services(self, session, meeting_name: str = "", include_context: bool = False):
+        if session.recording:
+            logger.info(f"Beginning stop_services process for meeting session {session.session_id}")
+            stop_started_at = time.monotonic()
+            session.mark_stopped()
+            if session.stats is not None:
+                session.stats.stop()
+            # Interim summaries are stale once the meeting ends; free the model for the final summary.
+            # Queued rolling layers are kept: finalizing below waits for them, then cancels any left over.
+            self.llm_scheduler.cancel(priority=INTERIM, prefix=session.job_key(""))
+            if session.trigger_task:
+                session.trigger_task.cancel()
+                session.trigger_task = None
+            session.summary_trigger = None
+            if self.llm_warmer and not self.sessions.active:
+                await self.llm_warmer.stop()
+                self.llm_warmer = None
             
             # First stop the recorder and transcriber services
-            if self.recorder:
+            if session.recorder:
                 try:
                     logger.info("Stopping recorder...")
-                    await self.recorder.stop_recording()
+                    await session.recorder.stop_recording()
                     logger.info("Recorder stopped successfully")
                 except Exception as e:
                     logger.error(f"Error stopping recorder: {e}", exc_info=True)
                     raise RuntimeError(f"Failed to stop recorder: {e}")
             
-            if self.transcriber:
+            if session.transcriber:
                 try:
                     logger.info("Stopping transcriber...")
-                    await self.transcriber.stop_transcriber()
+                    await session.transcriber.stop_transcriber()
                     logger.info("Transcriber stopped successfully")
                 except Exception as e:
                     logger.error(f"Error stopping transcriber: {e}", exc_info=True)
                     raise RuntimeError(f"Failed to stop transcriber: {e}")
 
             # Then cancel their tasks with proper error handling
-            if self.transcription_task:
+            if session.transcription_task:
                 logger.info("Canceling transcription task...")
-                self.transcription_task.cancel()
+                session.transcription_task.cancel()
                 try:
-                    await self.transcription_task
+                    await session.transcription_task
                 except asyncio.CancelledError:
                     logger.info("Transcription task cancelled successfully")
                 except Exception as e:
                     logger.error(f"Error during transcription task cancellation: {e}", exc_info=True)
                     
-            if self.recorder_task:
+            if session.recorder_task:
                 logger.info("Canceling recorder task...")
-                self.recorder_task.cancel()
+                session.recorder_task.cancel()
                 try:
-                    await self.recorder_task
+                    await session.recorder_task
                 except asyncio.CancelledError:
                     logger.info("Recorder task cancelled successfully")
                 except Exception as e:
                     logger.error(f"Error during recorder task cancellation: {e}", exc_info=True)
 
-            # Get transcription content from watch directory - only .txt files
             transcription_text = ""
-            if os.path.exists(WATCH_DIRECTORY):
-                # Get all .txt files and sort them (to maintain order)
-                txt_files = sorted([f for f in os.listdir(WATCH_DIRECTORY) if f.endswith('.txt')])
-                transcription_parts = []
-                for txt_file in txt_files:
-                    file_path = os.path.join(WATCH_DIRECTORY, txt_file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read().strip()
-                            if content:  # Only add non-empty content
-                                transcription_parts.append(content)
-                    except Exception as e:
-                        logger.error(f"Error reading file {txt_file}: {e}")
-                
-                # Join all parts with line feeds
-                transcription_text = '\n'.join(transcription_parts)
+            if session.rolling_summary is not None and session.rolling_summary.has_content():
+                # Rolling summaries were computed during the meeting, so only the last window is left
+                logger.info("Finalizing rolling summaries for final meeting notes")
+                try:
+                    # Allow up to a minute for the last window; the final notes have their own timeout
+                    transcription_text = await asyncio.wait_for(
+                        with_ledger(session.usage_ledger, session.rolling_summary.finalize()), timeout=60.0
+                    )
+                except Exception as e:
+                    logger.error(f"Finalizing rolling summaries failed ({e!r}), using the full transcript", exc_info=True)
+                    transcription_text = session.transcript.text()
+                finally:
+                    # Finalizing flushed the layers it needed; drop any left over from a timed-out roll
+                    self.llm_scheduler.cancel(priority=ROLLING, prefix=session.job_key(""))
+            elif len(session.transcript):
+                transcription_text = session.transcript.text()
+            elif os.path.exists(session.watch_directory):
+                # No session transcript (e.g. recovering after a crash), so read it back from the watch directory
+                transcription_text = await asyncio.to_thread(self.read_watch_transcripts, session.watch_directory)
 
             if transcription_text:
                 try:
-                    # Generate final summary using create_meeting_notes with timeout protection
-                    from mb.create_meeting_notes import run_summarizer
+                    # Generate final summary on the service loop with timeout protection
                     logger.info("Starting final summary generation...")
+                    final_started_ns = time.time_ns()
                     
                     try:
                         # Allow up to 3 minutes for summarization
                         final_summary = await asyncio.wait_for(
-                            asyncio.to_thread(
-                                run_summarizer,
-                                transcription_text,
-                                self.config,
-                                service=self,
-                                prompt_manager=self.prompt_manager
+                            self.llm_scheduler.submit(
+                                lambda: with_ledger(session.usage_ledger, with_purpose(
+                                    "final", self.notes_generator.generate_notes(
+                                        transcription_text,
+                                        on_delta=self.delta_broadcaster("final_summary_delta", session),
+                                        notes_path=os.path.join(session.context_directory, self.config.meeting_notes_file),
+                                        prefer=session.preferred_provider,
+                                        context_index=session.context_index
+                                    ))),
+                                priority=FINAL
                             ),
                             timeout=180.0
                         )
@@ -357,58 +689,31 @@ class Service:
                         if final_summary.startswith("Error"):
                             raise RuntimeError(final_summary)
                             
-                        logger.info("Final summary generated successfully")
-                        data = {"type": "final_summary", "text": final_summary}
-                        message = json.dumps(data)
-                        
-                        # Keep trying to send summary for up to 30 seconds
-                        send_attempts = 3
-                        while send_attempts > 0:
-                            active_clients = [
-                                client for client in self.clients
-                                if client.state == State.OPEN
-                            ]
-                            if active_clients:
-                                try:
-                                    tasks = []
-                                    for client in active_clients:
-                                        try:
-                                            tasks.append(asyncio.create_task(client.send(message)))
-                                        except Exception as client_err:
-                                            logger.error(f"Error creating send task for client: {client_err}")
-                                            continue
-                                            
-                                    if tasks:
-                                        await asyncio.wait_for(
-                                            asyncio.gather(*tasks, return_exceptions=True),
-                                            timeout=10.0
-                                        )
-                                        break  # Successfully sent to clients
-                                    else:
-                                        logger.error("No valid clients to send summary to")
-                                        break
-                                except asyncio.TimeoutError:
-                                    logger.warning(f"Timeout sending summary, attempts left: {send_attempts}")
-                                    send_attempts -= 1
-                                except Exception as e:
-                                    logger.error(f"Error sending summary: {e}", exc_info=True)
-                                    send_attempts -= 1
-                            else:
-                                logger.warning("No active clients to send summary to")
-                                break
-                                
+                        session.last_stop_latency = time.monotonic() - stop_started_at
+                        logger.info(f"Final summary generated successfully {session.last_stop_latency:.1f} seconds after stop")
+                        if session.last_trace is not None:
+                            session.last_trace.span("summarize.final", final_started_ns)
+                        data = {
+                            "type": "final_summary",
+                            "text": final_summary,
+                            "stop_latency_seconds": round(session.last_stop_latency, 3)
+                        }
+                        # Queued per client and logged, so a client that reconnects during the stop still gets it
+                        if not self.publish(session, data):
+                            logger.warning("No active clients to send summary to")
+
                     except asyncio.TimeoutError:
                         error_msg = "Error: Timeout while generating final summary"
                         logger.error(error_msg)
-                        await self.broadcast_error(error_msg)
+                        await self.broadcast_error(error_msg, session)
                     except Exception as e:
                         error_msg = f"Error: Failed to generate final summary - {str(e)}"
                         logger.error(error_msg, exc_info=True)
-                        await self.broadcast_error(error_msg)
+                        await self.broadcast_error(error_msg, session)
                         
                 except Exception as outer_e:
                     logger.error(f"Critical error in summary generation: {outer_e}", exc_info=True)
-                    await self.broadcast_error(f"Critical error in summary generation: {str(outer_e)}")
+                    await self.broadcast_error(f"Critical error in summary generation: {str(outer_e)}", session)
             
             # Now roll over directories with sanitized meeting name
             meeting_name = meeting_name.strip() if meeting_name else "Untitled_Meeting"
@@ -416,46 +721,147 @@ class Service:
             safe_meeting_name = ''.join(c if c.isalnum() or c == '_' else '_' for c in meeting_name)
             if not safe_meeting_name:
                 safe_meeting_name = "Untitled_Meeting"
+            if session.usage_ledger is not None:
+                # Written into the output folder so it is archived with the meeting
+                try:
+                    await asyncio.to_thread(session.usage_ledger.write, session.output_directory)
+                except Exception as e:
+                    logger.error(f"Error writing LLM usage: {e}")
+            logger.info(f"Meeting session usage: {session.usage()}")
+            if session.tracer is not None:
+                await asyncio.to_thread(session.tracer.close)
+                session.tracer = None
+            if session.stats is not None:
+                # Also archived with the meeting, after the trace file is complete
+                try:
+                    await asyncio.to_thread(self.write_performance_report, session, safe_meeting_name)
+                except Exception as e:
+                    logger.error(f"Error writing performance report: {e}")
+                session.stats = None
+            session.usage_ledger = None
             logger.info(f"Rolling over directories with meeting name: {safe_meeting_name}")
-            rollover_directories(safe_meeting_name, include_context)
+            await asyncio.to_thread(rollover_directories, session.archive_name(safe_meeting_name), include_context,
+                                    session.watch_directory, session.output_directory, session.context_directory)
+            if session.rolling_summary is not None:
+                await session.rolling_summary.close()
+                session.rolling_summary = None
+            session.recorder = None
+            session.transcriber = None
+            if not self.sessions.active:
+                await asyncio.to_thread(release_whisper_models)
+            logger.info(f"LLM cache stats: {self.llm_cache.stats()}")
+            logger.info(f"LLM scheduler stats: {self.llm_scheduler.stats}")
+            logger.info(f"Client send queues: {self.broadcaster.stats()}")
+            logger.info(f"Prompt cache usage: {self.prompt_assembler.cache_stats()}")
 
 
-    async def run_recorder(self):
-        self.recorder = AudioRecorder()
-        await self.recorder.run_recorder()
+    def write_performance_report(self, session, meeting_name: str):
+        """Write the meeting's performance report into its output folder; reads the trace file."""
+        trace_path = os.path.join(session.output_directory, TRACE_FILE)
+        spans = read_spans(trace_path) if os.path.exists(trace_path) else None
+        report = build_report(
+            session.stats,
+            usage=session.usage_ledger.summary() if session.usage_ledger is not None else None,
+            spans=spans,
+            loop_blocks=list(self.loop_monitor.blocks),
+            stop_latency=session.last_stop_latency,
+            name=meeting_name, session=session.session_id,
+        )
+        write_report(report, session.output_directory)
+
+    async def run_recorder(self, session):
+        # Device discovery talks to the audio driver, so it runs off the loop
+        session.recorder = await asyncio.to_thread(AudioRecorder, session.watch_directory, session.tracer,
+                                                   session.stats)
+        await session.recorder.run_recorder()
+
+    async def on_transcription(self, session, text: str):
+        """Record a new transcription segment in the session state and broadcast it."""
+        if not text:
+            return
+        seq = session.transcript.append(text)
+        if session.rolling_summary is not None:
+            session.rolling_summary.add_segment(text)
+        trace = current_trace.get()
+        broadcast_started_ns = time.time_ns()
+        await self.broadcast_transcription(session, text, seq, trace)
+        if trace is not None:
+            trace.span("broadcast", broadcast_started_ns, seq=seq, clients=len(session.clients))
+            session.last_trace = trace
+        if session.summary_trigger is not None:
+            session.summary_trigger.add(text)
+            self.check_summary_trigger(session)
 
-    async def broadcast_transcription(self, text: str):
-        """Broadcast transcription to all connected clients."""
+    def check_summary_trigger(self, session):
+        """Start an interim summary when the trigger policy says enough has changed."""
+        if session.recording and session.summary_trigger.should_summarize():
+            session.summary_trigger.mark_summarized()
+            task = asyncio.create_task(self.broadcast_interim_summary(session))
+            self.summarize_tasks.add(task)
+            task.add_done_callback(self.summarize_tasks.discard)
+
+    async def run_summary_trigger(self, session):
+        """Re-check the trigger periodically so the max interval applies between segments."""
+        try:
+            while session.recording:
+                await asyncio.sleep(1)
+                if session.summary_trigger is not None:
+                    self.check_summary_trigger(session)
+        except asyncio.CancelledError:
+            pass
+
+    async def broadcast_interim_summary(self, session):
+        """Summarize the rolling layers and send the interim summary to every client of the session."""
+        rolling_summary = session.rolling_summary
+        if rolling_summary is None or not rolling_summary.has_content():
+            return
+        session.interim_summaries += 1
+        logger.info(f"Triggering interim summary #{session.interim_summaries} for meeting session {session.session_id}")
+        trace = session.last_trace  # Charged to the newest segment it covers
+        started_ns = time.time_ns()
+        try:
+            summary = await self.llm_scheduler.submit(
+                lambda: with_ledger(session.usage_ledger, with_purpose("interim", rolling_summary.interim_summary(
+                    on_delta=self.delta_broadcaster("summary_delta", session)
+                ))),
+                priority=INTERIM,
+                key=session.job_key("interim")
+            )
+        except LLMJobCancelled as e:
+            logger.info(f"Interim summary dropped: {e}")
+            return
+        except Exception as e:
+            logger.error(f"Error generating interim summary: {e}", exc_info=True)
+            await self.broadcast_error(f"Error: Failed to generate summary - {str(e)}", session)
+            return
+        if not summary:
+            logger.error("Empty interim summary received")
+            return
+        if trace is not None:
+            trace.span("summarize.interim", started_ns, summary=session.interim_summaries)
+        self.publish(session, {"type": "summary", "text": summary})
+
+    async def broadcast_transcription(self, session, text: str, seq: int = None, trace=None):
+        """Broadcast transcription to all clients of the session, with the segment's trace context."""
         if text:
-            data = {"type": "transcription", "text": text}
-            message = json.dumps(data)
-            # Filter out closed connections first
-            active_clients = [client for client in self.clients if client.state != State.CLOSED]
-            if active_clients:
-                try:
-                    # Create tasks for each send operation
-                    tasks = [asyncio.create_task(client.send(message)) for client in active_clients]
-                    logger.info(f"Writing message to active clients: {message}")
-                    await asyncio.gather(*tasks, return_exceptions=True)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to clients: {e}")
+            data = {"type": "transcription", "text": text, "seq": seq}
+            if trace is not None:
+                data["trace"] = trace.context()
+            if self.publish(session, data):
+                logger.info(f"Writing message to active clients: {log_preview(data)}")
             else:
                 logger.warning("No active clients")
 
-    async def broadcast_error(self, error: str):
-        """Broadcast error message to all connected clients."""
+    async def broadcast_llm_status(self, status: dict):
+        """Send model readiness to every connected client."""
+        self.broadcaster.publish(self.clients, {"type": "llm_status", **status})
+
+    async def broadcast_error(self, error: str, session=None):
+        """Broadcast error message to the clients of a session, or to all connected clients."""
         data = {"type": "error", "text": error}
-        message = json.dumps(data)
-        # Filter out closed connections first
-        active_clients = [client for client in self.clients if client.state != State.CLOSED]
-        if active_clients:
-            try:
-                # Create tasks for each send operation
-                tasks = [asyncio.create_task(client.send(message)) for client in active_clients]
-                logger.info(f"Writing error message to active clients: {message}")
-                await asyncio.gather(*tasks, return_exceptions=True)
-            except Exception as e:
-                logger.error(f"Error broadcasting error to clients: {e}")
+        sent = self.publish(session, data) if session is not None else self.broadcaster.publish(self.clients, data)
+        if sent:
+            logger.info(f"Writing error message to active clients: {log_preview(data)}")
         else:
             logger.warning("No active clients")
 
@@ -468,13 +874,24 @@ class Service:
                     s, lambda s=s: asyncio.create_task(self.shutdown(s))
                 )
 
-        server = await websockets.serve(self.handler, "localhost", self.config.websocket_port)
+        server = await websockets.serve(self.handler, "localhost", self.config.websocket_port,
+                                        **deflate_options(self.config.websocket_compression))
         logger.info(f"Websocket server started on ws://localhost:{self.config.websocket_port}")
+        metrics_server = start_metrics_server(self.config.metrics_port)
+        self.loop_monitor.start()
         try:
             await self.stop  # Wait until shutdown signal
         finally:
+            await self.loop_monitor.stop()
+            if metrics_server is not None:
+                metrics_server.shutdown()
             server.close()
             await server.wait_closed()
+            await self.llm_scheduler.close()
+            await self.llm.close()
+            # Give queued messages a moment to reach clients before closing them
+            await self.broadcaster.drain(self.clients, timeout=2.0)
+            await self.broadcaster.close()
             # Ensure all clients are closed
             for client in self.clients:
                 if not client.closed:
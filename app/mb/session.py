@@ -0,0 +1,149 @@
+import asyncio
+import os
+import re
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from app import logger, ROOT_PATH, WATCH_DIRECTORY, OUTPUT_DIRECTORY, CONTEXT_DIRECTORY
+from app.mb.event_log import EventLog
+from app.mb.transcript import SessionTranscript
+
+DEFAULT_SESSION = 'default'
+
+
+class SessionLimitError(Exception):
+    """Raised when starting a session would exceed the configured maximum."""
+
+
+class MeetingSession:
+    """One meeting: its directories, recording pipeline, transcript and subscribed clients.
+
+    Models, the LLM gateway and the LLM scheduler are shared by the service; everything
+    that belongs to a single meeting lives here, so several rooms can be recorded at once.
+    """
+
+    def __init__(self, session_id: str, watch_directory: str, output_directory: str, context_directory: str):
+        self.session_id = session_id
+        self.watch_directory = watch_directory
+        self.output_directory = output_directory
+        self.context_directory = context_directory
+        self.clients: Set = set()
+        self.recording = False
+        self.recorder = None
+        self.transcriber = None
+        self.recorder_task: Optional[asyncio.Task] = None
+        self.transcription_task: Optional[asyncio.Task] = None
+        self.transcript = SessionTranscript()
+        self.events = EventLog()
+        self.abandon_task: Optional[asyncio.Task] = None  # Pending stop after the last client left
+        self.rolling_summary = None
+        self.summary_trigger = None
+        self.trigger_task: Optional[asyncio.Task] = None
+        self.usage_ledger = None
+        self.context_index = None  # Index of this session's context directory
+        self.preferred_provider = None  # LLM provider for the final notes once the meeting nears its budget
+        self.tracer = None  # Segment traces of the current meeting
+        self.last_trace = None  # Trace of the newest segment, which summaries are added to
+        self.stats = None  # Pipeline counts of the current meeting, for its performance report
+        self.started_at = datetime.now()
+        self.recording_started: Optional[float] = None
+        self.recording_seconds = 0.0
+        self.interim_summaries = 0
+        self.rolling_layers = 0  # Rolling summary layers queued, numbering their scheduler jobs
+        self.last_stop_latency = None
+
+    @classmethod
+    def create(cls, session_id: str, root: str) -> "MeetingSession":
+        """The default session uses the configured directories; others get their own under root."""
+        if session_id == DEFAULT_SESSION:
+            return cls(session_id, WATCH_DIRECTORY, OUTPUT_DIRECTORY, CONTEXT_DIRECTORY)
+        base = os.path.join(root, session_id)
+        return cls(session_id, os.path.join(base, 'data'), os.path.join(base, 'output'), os.path.join(base, 'context'))
+
+    def make_directories(self):
+        for directory in (self.watch_directory, self.output_directory, self.context_directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def archive_name(self, meeting_name: str) -> str:
+        """Meeting name for archived directories, tagged with the session so rooms do not collide."""
+        return meeting_name if self.session_id == DEFAULT_SESSION else f"{self.session_id}_{meeting_name}"
+
+    def job_key(self, name: str) -> str:
+        """LLM scheduler key for this session's jobs, so coalescing and cancelling stay per session."""
+        return f"{self.session_id}:{name}"
+
+    def mark_started(self):
+        self.recording = True
+        self.started_at = datetime.now()
+        self.recording_started = time.monotonic()
+
+    def mark_stopped(self):
+        self.recording = False
+        if self.recording_started is not None:
+            self.recording_seconds += time.monotonic() - self.recording_started
+            self.recording_started = None
+
+    def usage(self) -> dict:
+        """Resources used by this session so far."""
+        recording_seconds = self.recording_seconds
+        if self.recording_started is not None:
+            recording_seconds += time.monotonic() - self.recording_started
+        ledger = self.usage_ledger
+        return {
+            "session": self.session_id,
+            "recording": self.recording,
+            "clients": len(self.clients),
+            "recording_seconds": round(recording_seconds, 1),
+            "segments": len(self.transcript),
+            "words": sum(len(text.split()) for _, text in self.transcript.segments),
+            "interim_summaries": self.interim_summaries,
+            "llm_calls": len(ledger.records) if ledger is not None else 0,
+            "llm_tokens": ledger.total_tokens if ledger is not None else 0,
+        }
+
+
+class SessionManager:
+    """Creates meeting sessions on demand and enforces the limit on concurrently recording sessions."""
+
+    def __init__(self, max_sessions: int = 4, root: str = None):
+        self.max_sessions = max(max_sessions, 1)
+        self.root = root or os.path.join(ROOT_PATH, 'sessions')
+        self.sessions: Dict[str, MeetingSession] = {}
+
+    @staticmethod
+    def normalize_id(session_id: Optional[str]) -> str:
+        session_id = (session_id or DEFAULT_SESSION).strip()
+        # Session ids become directory names
+        return re.sub(r'[^A-Za-z0-9_-]', '_', session_id)[:64] or DEFAULT_SESSION
+
+    def get(self, session_id: Optional[str]) -> MeetingSession:
+        """Return the session, creating it (without starting it) when it does not exist yet."""
+        session_id = self.normalize_id(session_id)
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = MeetingSession.create(session_id, self.root)
+            self.sessions[session_id] = session
+        return session
+
+    @property
+    def active(self):
+        return [s for s in self.sessions.values() if s.recording]
+
+    def check_capacity(self, session: MeetingSession):
+        if not session.recording and len(self.active) >= self.max_sessions:
+            raise SessionLimitError(f"{len(self.active)} meetings are already running (maximum {self.max_sessions})")
+
+    def discard(self, session: MeetingSession):
+        """Forget a stopped session once no client follows it."""
+        if not session.recording and not session.clients and session.session_id in self.sessions:
+            del self.sessions[session.session_id]
+            session.events.close()
+            logger.info(f"Closed meeting session {session.session_id}")
+
+    def usage(self) -> dict:
+        return {
+            "max_sessions": self.max_sessions,
+            "active": len(self.active),
+            "sessions": [s.usage() for s in self.sessions.values()],
+        }
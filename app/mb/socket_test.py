@@ -45,11 +45,11 @@ class WebSocketTestClient:
         response = await self._send_and_receive(message)
         print(f"Response: {response}")
 
-    async def request_summary(self, text: str):
-        """Request a summary of provided text."""
+    async def request_summary(self, since_seq: int = 0):
+        """Request a summary of the session transcript after since_seq (0 for the whole meeting)."""
         message = {
             "action": "summarize",
-            "text": text
+            "since_seq": since_seq
         }
         response = await self._send_and_receive(message)
         print(f"Response: {response}")
@@ -83,10 +83,7 @@ async def handle_command(client: WebSocketTestClient, command: str, meeting_name
     elif command == "stop":
         await client.stop_recording(meeting_name)
     elif command == "summarize":
-        if not text:
-            print("Error: Text required for summarize command")
-            return
-        await client.request_summary(text)
+        await client.request_summary(int(text) if text else 0)
     elif command == "listen":
         await client.listen_for_messages()
     elif command == "stoplisten":
@@ -97,7 +94,7 @@ async def interactive_loop(client: WebSocketTestClient):
     print("\nAvailable commands:")
     print("  start - Start recording")
     print("  stop [meeting_name] - Stop recording")
-    print("  summarize <text> - Request summary of text")
+    print("  summarize [since_seq] - Request summary of the transcript after since_seq")
     print("  listen - Listen for messages")
     print("  stoplisten - Stop listening for messages")
     print("  quit - Exit the program")
@@ -120,8 +117,8 @@ async def interactive_loop(client: WebSocketTestClient):
             
             if command == "stop" and len(parts) > 1:
                 await client.stop_recording(parts[1])
-            elif command == "summarize" and len(parts) > 1:
-                await client.request_summary(parts[1])
+            elif command == "summarize":
+                await client.request_summary(int(parts[1]) if len(parts) > 1 else 0)
             elif command == "start":
                 await client.start_recording()
             elif command == "listen":
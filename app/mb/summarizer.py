@@ -1,14 +1,23 @@
 import asyncio
+import contextvars
 import os
 import time
-from openai import OpenAI
 import logging
-from mb.config import Config
+from app.mb.config import Config
 from app import CONTEXT_DIRECTORY
-from mb.prompt_manager import PromptManager
+from app.mb.prompt_manager import PromptManager
+from app.mb.token_budget import TokenBudget
+from app.mb.llm_cache import LLMCache
+from app.mb.context_index import ContextIndex
+from app.mb.prompt_assembly import PromptAssembler
+from app.mb.llm_gateway import LLMGateway, HOSTED, LOCAL
+from app.mb.llm_router import LLMRouter
 
 logger = logging.getLogger(__name__)
 
+# Router of the notes being generated, when a meeting prefers another provider; see generate_notes
+_router = contextvars.ContextVar('notes_router', default=None)
+
 class MeetingNotesGenerator:
     """Handles the generation of meeting notes from transcriptions using OpenAI."""
 
@@ -23,95 +32,182 @@ class MeetingNotesGenerator:
         self.config = config or Config.load_config()
         self.service = service
         self.prompt_manager = prompt_manager or PromptManager(self.config)
-        self.client = None
-        if config.openai_api_key or os.getenv('OPENAI_API_KEY'):
-            self.client = OpenAI(
-                api_key=config.openai_api_key or os.getenv('OPENAI_API_KEY'),
-                timeout=60.0
-            )
-        else:
+        # Reuse the service's gateway so connections are pooled across interim and final summaries
+        self.owns_llm = getattr(service, 'llm', None) is None
+        self.llm = LLMGateway(self.config) if self.owns_llm else service.llm
+        if not self.llm.available(HOSTED):
             logging.warning(f'OPENAI_API_KEY environment variable is not set. Final summary will be created using {self.config.local_llm_model}.')
+        self.router = LLMRouter.from_config(self.llm, self.config)
 
-        self.prompt_manager = PromptManager()
+        # Share the service's response cache so interim and final summaries hit the same store
+        self.llm_cache = getattr(service, 'llm_cache', None) or LLMCache.from_config(self.config)
+        self.context_index = getattr(service, 'context_index', None) or ContextIndex.from_config(self.config)
+        self.prompt_assembler = getattr(service, 'prompt_assembler', None) or PromptAssembler(self.prompt_manager)
         self.meeting_notes_path = os.path.join(CONTEXT_DIRECTORY, self.config.meeting_notes_file)
 
-    def send_to_openai(self, prompt: str, content: str) -> str:
-        """Send the content to OpenAI API and return the response."""
-        if not self.client:
-            logging.error("OpenAI client not initialized")
-            return ""
-
-        try:
-            response = self.client.chat.completions.create(
-                model=self.config.openai_model,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": content}
-                ],
-                temperature=0.7,
-                max_tokens=4000
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            logging.error(f"Error when calling OpenAI API: {e}")
-            return ""
-
-    def backup_meeting_notes(self):
+    async def send_to_llm(self, prompt: str, content: str, on_delta=None, related_context: str = "",
+                          include_meeting_context: bool = False, context_directory: str = None) -> str:
+        """Send the content through the LLM router and return the response, streaming deltas through on_delta when given."""
+        router = _router.get() or self.router
+        messages = self.prompt_assembler.build(prompt, content, related_context, include_meeting_context,
+                                               context_directory)
+        cache_model = "|".join(self.llm.providers[p].model for p in router.providers)
+        system, stable, task = (message["content"] for message in messages)
+        cached = await asyncio.to_thread(self.llm_cache.get, cache_model, task, system, stable)
+        if cached is not None:
+            if on_delta is not None:
+                await on_delta(cached)
+            return cached
+
+        result = await router.complete(messages, on_delta=on_delta)
+        self.prompt_assembler.record(result)
+        response = result.text.strip()
+        await asyncio.to_thread(self.llm_cache.set, cache_model, task, system, stable, response)
+        return response
+
+    async def close(self):
+        """Close the LLM gateway if this generator created it."""
+        if self.owns_llm:
+            await self.llm.close()
+
+    def backup_meeting_notes(self, notes_path: str = None):
         """Back up the existing meeting notes file before overwriting."""
-        if os.path.exists(self.meeting_notes_path):
-            base_dir = os.path.dirname(self.meeting_notes_path)
-            base_name = os.path.splitext(os.path.basename(self.meeting_notes_path))[0]
-            ext = os.path.splitext(self.meeting_notes_path)[1]
+        notes_path = notes_path or self.meeting_notes_path
+        if os.path.exists(notes_path):
+            base_dir = os.path.dirname(notes_path)
+            base_name = os.path.splitext(os.path.basename(notes_path))[0]
+            ext = os.path.splitext(notes_path)[1]
             N = 1
             while True:
                 backup_filename = os.path.join(base_dir, f"{base_name}{N}{ext}")
                 if not os.path.exists(backup_filename):
-                    os.rename(self.meeting_notes_path, backup_filename)
-                    logging.info(f"Backed up {self.meeting_notes_path} to {backup_filename}")
+                    os.rename(notes_path, backup_filename)
+                    logging.info(f"Backed up {notes_path} to {backup_filename}")
                     break
                 else:
                     N += 1
         else:
             logging.debug("No existing meeting notes to back up.")
 
-    async def generate_notes(self, transcription: str) -> str:
-        big_model_available = True
-        """Generate meeting notes from the transcription."""
-        if not self.client:
-            logging.warning(f"OPENAI_API_KEY environment variable not set. Using local model {self.config.local_llm_model} instead for final summarization.")
-            big_model_available = False
+    async def fit_transcription(self, prompt: str, meeting_context: str, transcription: str) -> str:
+        """Map-reduce the transcription into chunk summaries when it does not fit the model's context."""
+        router = _router.get() or self.router
+        # Budget for the smallest context window the router may end up using
+        budget = TokenBudget.for_model(self.config, hosted=LOCAL not in router.providers)
+        if budget.fits(transcription, prompt, meeting_context):
+            return transcription
+
+        chunk_prompt = self.prompt_manager.get_prompt("create_ten_minute") or prompt
+        chunk_budget = budget.input_budget(chunk_prompt, meeting_context)
+        final_budget = budget.input_budget(prompt, meeting_context)
+        if chunk_budget <= 0 or final_budget <= 0:
+            raise Exception("Prompt and meeting context leave no room for the transcription in the model context")
+
+        chunks = budget.split(transcription, chunk_budget, self.config.chunk_overlap_tokens)
+        parallelism = max(self.config.summary_parallelism, 1)
+        logging.info(f"Transcription of {budget.count(transcription)} tokens exceeds the {final_budget} token budget, "
+                     f"summarizing {len(chunks)} chunks with parallelism {parallelism}")
+        semaphore = asyncio.Semaphore(parallelism)
+
+        async def summarize_chunk(chunk: str) -> str:
+            async with semaphore:
+                try:
+                    summary = await self.send_to_llm(chunk_prompt, chunk)
+                except Exception as e:
+                    logging.warning(f"Chunk summary failed ({e}), keeping the chunk text")
+                    return chunk
+            return summary
+
+        start_time = time.time()
+        summaries = await asyncio.gather(*(summarize_chunk(chunk) for chunk in chunks))
+
+        # Reduce hierarchically until the combined chunk summaries fit the final request
+        level = 1
+        while budget.count("\n\n".join(summaries)) > final_budget:
+            groups = budget.group(summaries, chunk_budget)
+            if len(groups) >= len(summaries):
+                logging.warning("Chunk summaries cannot be reduced further, truncating to fit the model context")
+                summaries = [budget.split("\n\n".join(summaries), final_budget)[0]]
+                break
+            level += 1
+            logging.info(f"Reducing {len(summaries)} summaries into {len(groups)} (level {level})")
+            summaries = await asyncio.gather(*(summarize_chunk(group) for group in groups))
+
+        logging.info(f"Map-reduce summarization finished in {time.time() - start_time:.1f} seconds over {level} level(s)")
+        return "Segment summaries:\n" + "\n\n".join(summaries)
+
+    async def generate_notes(self, transcription: str, on_delta=None, notes_path: str = None,
+                             prefer: str = None, context_index: ContextIndex = None) -> str:
+        """Generate meeting notes from the transcription.
+
+        When on_delta is given and streaming is enabled, response deltas are awaited
+        through it and written to the notes file as they arrive. notes_path and
+        context_index override the notes file and the context, e.g. for a meeting
+        session with its own directories. prefer makes that provider the primary for
+        these notes only.
+        """
+        notes_path = notes_path or self.meeting_notes_path
+        router = self.router.preferring(prefer)
+        logging.info(f"Generating meeting notes with {' then '.join(router.providers)} ({router.policy} policy)")
+        token = _router.set(router)
+        try:
+            return await self._generate_notes(transcription, on_delta, notes_path, context_index or self.context_index)
+        finally:
+            _router.reset(token)
+
+    async def _generate_notes(self, transcription: str, on_delta, notes_path: str, context_index: ContextIndex) -> str:
 
         try:
             # Load the prompt and meeting context
             prompt = self.prompt_manager.get_prompt("meeting_prompt")
-            meeting_context = self.prompt_manager.load_meeting_context()
-
-            # Read additional context from directories
-            additional_context_content = ""
-
-            # Combine content and context
-            full_content = f"{additional_context_content}\n{meeting_context}\n{transcription}"
+            meeting_context = self.prompt_manager.load_meeting_context(context_index.directory)
 
             if not transcription.strip():
                 logging.warn("Error in meeting notes generator: No content found in transcription.")
                 return "Error in meeting notes generator: No content found in transcription."
 
-            if big_model_available:
-                logging.info("Sending content to OpenAI API.")
-                try:
-                    response = self.send_to_openai(prompt, full_content)
-                except Exception as e:
-                    logging.error(f"Error when calling OpenAI API: {e} - switching to local")
-                    response = await self.service.summarize_text(full_content, prompt)
-            else:
-                response = await self.service.summarize_text(full_content, prompt)
+            # Read the most relevant passages from the context directory
+            additional_context_content = await asyncio.to_thread(
+                context_index.related_context, transcription,
+                self.config.context_top_k, self.config.context_token_budget
+            )
+
+            transcription = await self.fit_transcription(
+                prompt, f"{additional_context_content}\n{meeting_context}", transcription
+            )
+
+            streaming = on_delta is not None and self.config.stream_summaries
+            notes_file = None
+            stream_delta = None
+            if streaming:
+                # Write the notes file incrementally while the response streams in
+                self.backup_meeting_notes(notes_path)
+                notes_file = open(notes_path, 'w')
+
+                async def stream_delta(delta: str):
+                    notes_file.write(delta.replace('•', '*'))
+                    notes_file.flush()
+                    await on_delta(delta)
+
+            try:
+                # Context and transcript first, instruction last, so the part shared with interim requests can be cached
+                response = await self.send_to_llm(prompt, transcription, stream_delta,
+                                                  related_context=additional_context_content,
+                                                  include_meeting_context=True,
+                                                  context_directory=context_index.directory)
+            finally:
+                if notes_file:
+                    notes_file.close()
+                logging.info(f"LLM latency by provider: {self.router.latency_snapshot()}")
+                logging.info(f"Prompt cache usage by provider: {self.prompt_assembler.cache_stats()}")
 
             if response:
-                self.backup_meeting_notes()
+                if not streaming:
+                    self.backup_meeting_notes(notes_path)
                 response_adjusted_markdown = response.replace('•', '*')
-                with open(self.meeting_notes_path, 'w') as f:
+                with open(notes_path, 'w') as f:
                     f.write(response_adjusted_markdown)
-                logging.info(f"Meeting notes saved to {self.meeting_notes_path}")
+                logging.info(f"Meeting notes saved to {notes_path}")
                 return response_adjusted_markdown
             else:
                 logging.error("No response received from final-summarization model api.")
@@ -121,21 +217,25 @@ class MeetingNotesGenerator:
             logging.error(f"Error in meeting notes generator: {e}")
             raise Exception(f"Error in meeting notes generator: {e}")
 
-def run_summarizer(transcription: str, config, service=None, prompt_manager=None) -> str:
-    """Main summarization function designed to run in a thread."""
+def run_summarizer(transcription: str, config, service=None, prompt_manager=None, on_delta=None) -> str:
+    """Standalone summarization entry point that runs the generator on its own event loop.
+
+    The service awaits MeetingNotesGenerator.generate_notes directly on its loop instead.
+    """
     try:
         generator = MeetingNotesGenerator(config, service, prompt_manager)
         # Don't create a new event loop if we're already in one
         try:
             loop = asyncio.get_running_loop()
-            return loop.run_until_complete(generator.generate_notes(transcription))
+            return loop.run_until_complete(generator.generate_notes(transcription, on_delta))
         except RuntimeError:
             # No event loop exists, create a new one
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
-                return loop.run_until_complete(generator.generate_notes(transcription))
+                return loop.run_until_complete(generator.generate_notes(transcription, on_delta))
             finally:
+                loop.run_until_complete(generator.close())
                 loop.close()
     except Exception as e:
         logging.error(f"Error in run_summarizer: {str(e)}", exc_info=True)
@@ -0,0 +1,68 @@
+import time
+
+
+class SummaryTrigger:
+    """Decides when new transcription warrants an interim summary.
+
+    A summary is triggered by the amount of new speech rather than a fixed timer:
+        - never sooner than min_interval seconds after the previous summary;
+        - as soon as min_new_words words have arrived since the previous summary;
+        - after max_interval seconds for any smaller amount of new speech, unless the
+          meeting has been idle (no new words) for idle_seconds, so a few stray words
+          before a silence do not cost a model call.
+    """
+
+    def __init__(self, min_new_words: int = 40, min_interval: float = 5.0, max_interval: float = 120.0,
+                 idle_seconds: float = 60.0, clock=time.monotonic):
+        self.min_new_words = min_new_words
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self.new_words = 0
+        self.last_summary = clock()
+        self.last_activity = self.last_summary
+        self.summaries = 0
+        self.paused = False
+
+    @classmethod
+    def from_config(cls, config) -> "SummaryTrigger":
+        return cls(
+            min_new_words=config.summary_min_new_words,
+            min_interval=config.summary_interval,
+            max_interval=config.summary_max_interval,
+            idle_seconds=config.summary_idle_seconds
+        )
+
+    def add(self, text: str):
+        """Record a transcription segment."""
+        words = len(text.split())
+        if words:
+            self.new_words += words
+            self.last_activity = self.clock()
+
+    def slow_down(self, factor: float):
+        """Require proportionally more new speech and time between summaries."""
+        self.min_new_words = int(self.min_new_words * factor)
+        self.min_interval *= factor
+        self.max_interval *= factor
+
+    def pause(self):
+        self.paused = True
+
+    def should_summarize(self) -> bool:
+        if self.paused or self.new_words == 0:
+            return False
+        now = self.clock()
+        since_summary = now - self.last_summary
+        if since_summary < self.min_interval:
+            return False
+        if self.new_words >= self.min_new_words:
+            return True
+        return since_summary >= self.max_interval and now - self.last_activity < self.idle_seconds
+
+    def mark_summarized(self):
+        """Reset the new-content counter once a summary has been requested."""
+        self.new_words = 0
+        self.last_summary = self.clock()
+        self.summaries += 1
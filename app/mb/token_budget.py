@@ -0,0 +1,99 @@
+from functools import lru_cache
+from typing import List
+
+from app import logger
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is in requirements.txt
+    tiktoken = None
+
+# Rough characters-per-token ratio used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+class TokenBudget:
+    """Counts tokens and splits oversized inputs so requests fit a model's context window."""
+
+    def __init__(self, context_tokens: int, max_output_tokens: int, model: str = "", safety_margin: int = 256):
+        self.context_tokens = context_tokens
+        self.max_output_tokens = max_output_tokens
+        self.safety_margin = safety_margin
+        self.encoding = self._load_encoding(model)
+
+    @classmethod
+    def for_model(cls, config, hosted: bool) -> "TokenBudget":
+        """Build the budget for either the hosted (OpenAI) or the local model."""
+        if hosted:
+            return cls(config.openai_context_tokens, config.llm_max_output_tokens, config.openai_model)
+        return cls(config.local_llm_context_tokens, config.llm_max_output_tokens, config.local_llm_model)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _load_encoding(model: str):
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model.split('/')[-1])
+        except KeyError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load tokenizer for {model}: {e}")
+            return None
+        try:
+            # Local models (mistral, llama) have their own tokenizers; cl100k is a close enough estimate
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"Could not load cl100k_base tokenizer, estimating tokens from characters: {e}")
+            return None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is None:
+            return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def input_budget(self, *fixed_parts: str) -> int:
+        """Tokens left for content once the fixed parts (prompt, context) and the reply are accounted for."""
+        used = sum(self.count(part) for part in fixed_parts)
+        return max(self.context_tokens - self.max_output_tokens - self.safety_margin - used, 0)
+
+    def fits(self, text: str, *fixed_parts: str) -> bool:
+        return self.count(text) <= self.input_budget(*fixed_parts)
+
+    def split(self, text: str, chunk_tokens: int, overlap_tokens: int = 0) -> List[str]:
+        """Split text into chunks of at most chunk_tokens, each overlapping the previous one."""
+        if chunk_tokens <= 0:
+            raise ValueError("chunk_tokens must be positive")
+        overlap_tokens = min(max(overlap_tokens, 0), chunk_tokens // 2)
+        step = chunk_tokens - overlap_tokens
+
+        if self.encoding is None:
+            chunk_chars = chunk_tokens * CHARS_PER_TOKEN
+            step_chars = step * CHARS_PER_TOKEN
+            return [text[i:i + chunk_chars] for i in range(0, max(len(text) - overlap_tokens * CHARS_PER_TOKEN, 1), step_chars)]
+
+        tokens = self.encoding.encode(text, disallowed_special=())
+        chunks = []
+        for start in range(0, max(len(tokens) - overlap_tokens, 1), step):
+            chunks.append(self.encoding.decode(tokens[start:start + chunk_tokens]))
+        return chunks
+
+    def group(self, parts: List[str], budget_tokens: int, separator: str = "\n\n") -> List[str]:
+        """Greedily pack parts into groups that each stay within budget_tokens."""
+        groups = []
+        current = []
+        current_tokens = 0
+        separator_tokens = self.count(separator)
+        for part in parts:
+            part_tokens = self.count(part)
+            if current and current_tokens + separator_tokens + part_tokens > budget_tokens:
+                groups.append(separator.join(current))
+                current = []
+                current_tokens = 0
+            current.append(part)
+            current_tokens += part_tokens + (separator_tokens if len(current) > 1 else 0)
+        if current:
+            groups.append(separator.join(current))
+        return groups
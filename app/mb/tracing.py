@@ -0,0 +1,175 @@
+"""Per-segment tracing across recording, transcription, broadcast and summarization.
+
+Every recorded segment starts a trace. Each pipeline stage adds a timestamped span
+to it, and the trace context travels with the transcription message to the clients,
+which add their own spans. Spans are appended to a JSONL file, one span per line in
+the OpenTelemetry OTLP/JSON span layout (traceId, spanId, parentSpanId, name,
+startTimeUnixNano, endTimeUnixNano, attributes), so they can be loaded into tracing
+tools or summarized with
+
+    python -m app.mb.tracing output/trace.jsonl
+"""
+import argparse
+import contextvars
+import json
+import os
+import secrets
+import time
+from typing import Awaitable, Dict, List, Optional
+
+from app import logger
+
+TRACE_FILE = 'trace.jsonl'
+
+# Trace of the segment the current task is working on; see with_trace
+current_trace = contextvars.ContextVar('segment_trace', default=None)
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def make_span(trace_id: str, name: str, start_ns: int, end_ns: int, parent_id: Optional[str] = None,
+              span_id: Optional[str] = None, **attributes) -> dict:
+    """A span in OTLP/JSON layout."""
+    span = {
+        "traceId": trace_id,
+        "spanId": span_id or secrets.token_hex(8),
+        "name": name,
+        "kind": "SPAN_KIND_INTERNAL",
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(max(end_ns, start_ns)),
+        "attributes": [_attribute(k, v) for k, v in attributes.items() if v is not None],
+    }
+    if parent_id:
+        span["parentSpanId"] = parent_id
+    return span
+
+
+class SegmentTrace:
+    """The trace of one audio segment; stage spans are children of the segment span."""
+
+    def __init__(self, tracer: "Tracer", **attributes):
+        self.tracer = tracer
+        self.trace_id = secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.started_ns = time.time_ns()
+        self.attributes = attributes
+        self.ended = False
+
+    def span(self, name: str, start_ns: int, end_ns: Optional[int] = None, **attributes):
+        self.tracer.export(make_span(self.trace_id, name, start_ns, end_ns or time.time_ns(), self.span_id, **attributes))
+
+    def context(self) -> dict:
+        """Trace context sent along with the segment's messages."""
+        return {"trace_id": self.trace_id, "span_id": self.span_id, "sent_ns": time.time_ns()}
+
+    def end(self, **attributes):
+        """Write the segment span, covering capture start until now, and flush the trace file."""
+        if self.ended:
+            return
+        self.ended = True
+        self.attributes.update(attributes)
+        self.tracer.export(make_span(self.trace_id, "segment", self.started_ns, time.time_ns(),
+                                     span_id=self.span_id, **self.attributes))
+        self.tracer.flush()
+
+
+class Tracer:
+    """Collects segment traces of one meeting and appends their spans to a JSONL file.
+
+    Segments are handed from the recorder to the transcriber by file path, since both
+    run in the service process but only share the watch directory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pending: Dict[str, SegmentTrace] = {}
+        self.buffer: List[dict] = []
+        self.closed = False
+
+    def start_segment(self, key: str, **attributes) -> SegmentTrace:
+        trace = SegmentTrace(self, **attributes)
+        self.pending[key] = trace
+        return trace
+
+    def take(self, key: str) -> Optional[SegmentTrace]:
+        """The trace started for key (e.g. a wav file), removing it from the pending traces."""
+        return self.pending.pop(key, None)
+
+    def export(self, span: dict):
+        if not self.closed:  # The meeting's files may already be archived
+            self.buffer.append(span)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        spans, self.buffer = self.buffer, []
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(span) + '\n' for span in spans))
+        except OSError as e:
+            logger.error(f"Failed to write {len(spans)} trace spans to {self.path}: {e}")
+
+    def close(self):
+        self.pending.clear()
+        self.flush()
+        self.closed = True
+
+
+async def with_trace(trace: Optional[SegmentTrace], awaitable: Awaitable):
+    """Await work done for one segment, e.g. broadcasting its transcription, with its trace current."""
+    token = current_trace.set(trace)
+    try:
+        return await awaitable
+    finally:
+        current_trace.reset(token)
+
+
+def read_spans(path: str) -> List[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def distribution(values: List[float]) -> dict:
+    """Count, mean, p50, p95 and max of values."""
+    values = sorted(values)
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(values[len(values) // 2], 3),
+        "p95": round(values[min(int(len(values) * 0.95), len(values) - 1)], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def breakdown(spans: List[dict]) -> Dict[str, dict]:
+    """Latency per span name: count, mean, p50, p95 and max in seconds."""
+    durations: Dict[str, List[float]] = {}
+    for span in spans:
+        seconds = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e9
+        durations.setdefault(span["name"], []).append(seconds)
+    return {name: distribution(values) for name, values in durations.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency breakdown of a meeting trace file')
+    parser.add_argument('paths', nargs='+', help='trace.jsonl files (service and client traces can be combined)')
+    args = parser.parse_args()
+    spans = [span for path in args.paths for span in read_spans(path)]
+    print(f"{'span':24} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}")
+    for name, row in sorted(breakdown(spans).items(), key=lambda item: -item[1]["mean"]):
+        print(f"{name:24} {row['count']:>6} {row['mean']:>8} {row['p50']:>8} {row['p95']:>8} {row['max']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import os
 import time
 import re
 import sys
+import threading
 import traceback
 
 import torch
@@ -12,6 +13,9 @@ import whisper
 from tqdm import tqdm
 
 from app import logger, WATCH_DIRECTORY
+from app.mb.metrics import SEGMENT_LATENCY, TRANSCRIPTION_RTF, WATCH_QUEUE_DEPTH
+from app.mb.performance_report import MeetingStats
+from app.mb.tracing import SegmentTrace, Tracer, with_trace
 
 # Set environment variables to limit threading and multiprocessing
 os.environ["FFMPEG_BINARY"] = "/opt/homebrew/bin/ffmpeg"  # Explicitly set ffmpeg path
@@ -27,33 +31,60 @@ torch.set_num_threads(1)
 # torch.set_num_interop_threads(1)
 
 
+_models = {}
+# Whisper installs per-call KV-cache hooks on the decoder, so a model runs one transcription at a time
+_model_locks = {}
+
+
+def load_whisper_model(name: str = "base"):
+    """Load a Whisper model once per process so concurrent sessions share it."""
+    if name not in _models:
+        _models[name] = whisper.load_model(name)
+        _model_locks.setdefault(name, threading.Lock())
+        logger.info(f"Whisper model {name} loaded successfully")
+    return _models[name]
+
+
+def whisper_model_lock(name: str = "base") -> threading.Lock:
+    """The lock to hold while transcribing with the shared model name."""
+    return _model_locks.setdefault(name, threading.Lock())
+
+
+def release_whisper_models():
+    """Drop the shared Whisper models, e.g. once no session is recording."""
+    _models.clear()
+    import gc
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
 class Transcriber:
     """Handles audio transcription functionality."""
 
-    def __init__(self):
+    def __init__(self, watch_directory: str = WATCH_DIRECTORY, tracer: Tracer = None, stats: MeetingStats = None):
+        self.watch_directory = watch_directory
+        self.tracer = tracer  # Continues the traces the recorder started, by file path
+        self.stats = stats  # Transcribed audio, real-time factor and latency for the meeting's performance report
         self.processed_files = set()
         self.model = None
+        self.model_lock = whisper_model_lock("base")
         self._load_model()
         self.running = False
+        self.queue_depth = 0  # This transcriber's share of the watch-queue depth gauge
 
     def _load_model(self):
-        """Load the Whisper model."""
+        """Load the shared Whisper model."""
         try:
-            if self.model is not None:
-                del self.model
-                self.model = None
-                # Force garbage collection to clean up CUDA memory
-                import gc
-                gc.collect()
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-
-            self.model = whisper.load_model("base")
-            logger.info("Whisper model loaded successfully")
+            self.model = load_whisper_model("base")
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {e}")
             self.model = None
 
+    def set_queue_depth(self, depth: int):
+        WATCH_QUEUE_DEPTH.inc(depth - self.queue_depth)
+        self.queue_depth = depth
+
     @staticmethod
     def extract_number(file_name):
         """Extract the number from the filename like 'recording_1.wav'."""
@@ -62,21 +93,21 @@ class Transcriber:
 
     def get_unprocessed_wav_files(self):
         """Return a list of unprocessed wav files in the directory, sorted by number."""
-        if not os.path.exists(WATCH_DIRECTORY):
-            print(f"Directory {WATCH_DIRECTORY} does not exist.")
+        if not os.path.exists(self.watch_directory):
+            print(f"Directory {self.watch_directory} does not exist.")
             return []
 
-        wav_files = [f for f in os.listdir(WATCH_DIRECTORY) if f.endswith('.wav')]
+        wav_files = [f for f in os.listdir(self.watch_directory) if f.endswith('.wav')]
         unprocessed_files = []
         for wav_file in wav_files:
             txt_file = wav_file.replace('.wav', '.txt')
-            if txt_file not in self.processed_files and not os.path.exists(os.path.join(WATCH_DIRECTORY, txt_file)):
+            if txt_file not in self.processed_files and not os.path.exists(os.path.join(self.watch_directory, txt_file)):
                 unprocessed_files.append(wav_file)
 
         # Sort files based on the number in the filename
         return sorted(unprocessed_files, key=self.extract_number)
 
-    async def process_file(self, file):
+    async def process_file(self, file, trace: SegmentTrace = None):
         """Process the .wav file using whisper and mark it as processed."""
         if self.model is None:
             logger.error("Whisper model not loaded, attempting to reload...")
@@ -85,32 +116,38 @@ class Transcriber:
                 logger.error("Failed to reload model, skipping transcription")
                 return
 
-        file_path = os.path.join(WATCH_DIRECTORY, file)
-        output_path = os.path.join(WATCH_DIRECTORY, file.replace('.wav', '.txt'))
+        file_path = os.path.join(self.watch_directory, file)
+        output_path = os.path.join(self.watch_directory, file.replace('.wav', '.txt'))
 
         try:
             start_time = datetime.now()
             logger.info(f"Starting transcription of {file_path}")
 
-            # Run the CPU-intensive transcription in a thread pool
+            # Run the ffmpeg decode and the CPU-intensive transcription in a thread pool
             loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: self.model.transcribe(
-                    file_path, 
-                    fp16=False, 
-                    language="English", 
-                    no_speech_threshold=0.8,
-                    logprob_threshold=-1.0,
-                    compression_ratio_threshold=2.4
-                )
-            )
+            decode_started_ns = time.time_ns()
+            audio = await loop.run_in_executor(None, whisper.load_audio, file_path)
+            audio_seconds = len(audio) / whisper.audio.SAMPLE_RATE
+            if trace is not None:
+                trace.span("transcribe.decode", decode_started_ns, audio_seconds=round(audio_seconds, 2))
+            inference_started_ns = time.time_ns()
+            result = await loop.run_in_executor(None, self._transcribe, audio)
+
+            if trace is not None:
+                trace.span("transcribe.inference", inference_started_ns)
 
             # Write the transcription to a text file
+            write_started_ns = time.time_ns()
             async with aiofiles.open(output_path, 'w', encoding='utf-8') as f:
                 await f.write(result["text"])
+            if trace is not None:
+                trace.span("transcribe.write", write_started_ns)
 
             duration = datetime.now() - start_time
+            if audio_seconds:
+                TRANSCRIPTION_RTF.observe(duration.total_seconds() / audio_seconds)
+            if self.stats is not None:
+                self.stats.record_transcription(audio_seconds, duration.total_seconds())
             logger.info(f"Completed transcription of {file} in {duration.total_seconds():.1f} seconds")
             self.processed_files.add(file.replace('.wav', '.txt'))
             return result["text"]
@@ -122,6 +159,18 @@ class Transcriber:
                 logger.error(f"Error processing {file}: {e}")
             return None
 
+    def _transcribe(self, audio):
+        # Sessions share the model; concurrent calls would corrupt each other's decoding
+        with self.model_lock:
+            return self.model.transcribe(
+                audio,
+                fp16=False,
+                language="English",
+                no_speech_threshold=0.8,
+                logprob_threshold=-1.0,
+                compression_ratio_threshold=2.4
+            )
+
     async def run_transcriber(self, callback):
         """Main transcription loop using async/await."""
         logger.info("Starting transcription service")
@@ -129,35 +178,47 @@ class Transcriber:
         
         while self.running:
             try:
-                unprocessed_files = self.get_unprocessed_wav_files()
+                unprocessed_files = await asyncio.to_thread(self.get_unprocessed_wav_files)
+                self.set_queue_depth(len(unprocessed_files))
                 if unprocessed_files:
                     logger.info(f"Found {len(unprocessed_files)} new files to process")
-                    for file in tqdm(unprocessed_files):
+                    for index, file in enumerate(tqdm(unprocessed_files)):
                         if not self.running:
                             break
-                        text = await self.process_file(file)
+                        file_path = os.path.join(self.watch_directory, file)
+                        # The wav file is written when its capture ends
+                        captured_at_ns = os.stat(file_path).st_mtime_ns
+                        trace = self.tracer.take(file_path) if self.tracer else None
+                        if trace is None and self.tracer:
+                            # Recorded before a restart; trace it from the file onwards
+                            trace = SegmentTrace(self.tracer, file=file)
+                        if trace is not None:
+                            trace.span("transcribe.wait", captured_at_ns)
+                        text = await self.process_file(file, trace)
                         if text:
-                            await callback(text)
+                            # The trace is current while the service broadcasts this segment
+                            await with_trace(trace, callback(text))
+                            latency = (time.time_ns() - captured_at_ns) / 1e9
+                            SEGMENT_LATENCY.observe(latency)
+                            if self.stats is not None:
+                                self.stats.record_latency(latency)
+                        if trace is not None:
+                            trace.end(transcribed=bool(text))
+                        self.set_queue_depth(len(unprocessed_files) - index - 1)
                 await asyncio.sleep(1)
             except Exception as e:
                 logger.error(f"Transcription error: {e}")
                 await asyncio.sleep(1)
 
+        self.set_queue_depth(0)
         logger.info("Transcription service stopped")
 
     async def stop_transcriber(self):
         """Stop the transcription process cleanly."""
         self.running = False
         logger.info("Transcription service stopping...")
-        # Clean up Whisper model resources
-        if self.model:
-            del self.model
-            self.model = None
-            # Force garbage collection
-            import gc
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+        # The model is shared with other sessions; the service releases it when the last one stops
+        self.model = None
 
 
 def main():
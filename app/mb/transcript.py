@@ -0,0 +1,35 @@
+from typing import List, Tuple
+
+
+class SessionTranscript:
+    """The canonical transcript of the current meeting, as numbered segments.
+
+    Every segment gets the next sequence number (starting at 1) and that number is sent
+    with the transcription message, so clients can refer to a range of the transcript
+    ("everything after seq N") instead of uploading the text back to the service.
+    """
+
+    def __init__(self):
+        self.segments: List[Tuple[int, str]] = []
+
+    @property
+    def last_seq(self) -> int:
+        return self.segments[-1][0] if self.segments else 0
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def append(self, text: str) -> int:
+        """Add a segment and return its sequence number."""
+        seq = self.last_seq + 1
+        self.segments.append((seq, text))
+        return seq
+
+    def since(self, seq: int = 0) -> str:
+        """Text of all segments after seq, joined by line feeds."""
+        # Sequence numbers are contiguous, so the range starts at a known index
+        start = max(0, min(seq, len(self.segments)))
+        return "\n".join(text for _, text in self.segments[start:])
+
+    def text(self) -> str:
+        return self.since(0)
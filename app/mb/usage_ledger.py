@@ -0,0 +1,138 @@
+import contextvars
+import json
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app import logger
+from app.mb.llm_gateway import LLMResult, current_ledger
+
+OK = 'ok'
+NEAR = 'near'
+EXCEEDED = 'exceeded'
+
+USAGE_FILE = 'llm_usage.json'
+
+_purpose = contextvars.ContextVar('llm_purpose', default=None)
+
+
+async def with_purpose(purpose: str, awaitable: Awaitable):
+    """Await an LLM operation with its calls tagged as purpose in the ledger.
+
+    The outermost tag wins, so the layer summaries inside an interim summary are
+    recorded as part of the interim summary.
+    """
+    token = _purpose.set(purpose) if _purpose.get() is None else None
+    try:
+        return await awaitable
+    finally:
+        if token is not None:
+            _purpose.reset(token)
+
+
+async def with_ledger(ledger: Optional["UsageLedger"], awaitable: Awaitable):
+    """Await an LLM operation with its calls recorded in ledger, e.g. the ledger of one meeting session.
+
+    Tasks created inside inherit the ledger, so background work such as rolling summaries
+    is charged to the session that started it.
+    """
+    token = current_ledger.set(ledger)
+    try:
+        return await awaitable
+    finally:
+        current_ledger.reset(token)
+
+
+@dataclass
+class UsageRecord:
+    """One LLM call."""
+    timestamp: float
+    purpose: str
+    provider: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    latency: float
+
+
+class UsageLedger:
+    """Per-meeting record of every LLM call with an optional token budget.
+
+    When total tokens cross budget_tokens * near_ratio the ledger reports NEAR, and
+    EXCEEDED once the budget is spent; on_budget is awaited on each change so the
+    service can slow interim summaries or switch to the cheaper model.
+    """
+
+    def __init__(self, budget_tokens: int = 0, near_ratio: float = 0.8,
+                 on_budget: Optional[Callable[[str], Awaitable[None]]] = None):
+        self.budget_tokens = budget_tokens
+        self.near_ratio = near_ratio
+        self.on_budget = on_budget
+        self.records: List[UsageRecord] = []
+        self.started_at = time.time()
+        self.budget_state = OK
+
+    @classmethod
+    def from_config(cls, config, on_budget=None) -> "UsageLedger":
+        return cls(config.meeting_token_budget, config.meeting_budget_near_ratio, on_budget)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(r.prompt_tokens + r.completion_tokens for r in self.records)
+
+    async def record(self, result: LLMResult):
+        self.records.append(UsageRecord(
+            time.time(), _purpose.get() or 'other', result.provider, result.model,
+            result.prompt_tokens, result.completion_tokens, result.cached_tokens, result.latency
+        ))
+        state = self._budget_state()
+        if state != self.budget_state:
+            self.budget_state = state
+            logger.warning(f"Meeting token budget {state}: {self.total_tokens} of {self.budget_tokens} tokens used")
+            if self.on_budget is not None:
+                await self.on_budget(state)
+
+    def _budget_state(self) -> str:
+        if self.budget_tokens <= 0:
+            return OK
+        used = self.total_tokens
+        if used >= self.budget_tokens:
+            return EXCEEDED
+        if used >= self.budget_tokens * self.near_ratio:
+            return NEAR
+        return OK
+
+    def summary(self) -> dict:
+        def aggregate(records: List[UsageRecord]) -> dict:
+            latencies = sorted(r.latency for r in records)
+            return {
+                "calls": len(records),
+                "prompt_tokens": sum(r.prompt_tokens for r in records),
+                "completion_tokens": sum(r.completion_tokens for r in records),
+                "cached_tokens": sum(r.cached_tokens for r in records),
+                "latency_total": sum(latencies),
+                "latency_max": latencies[-1] if latencies else 0.0,
+            }
+
+        by_key: Dict[str, Dict[str, List[UsageRecord]]] = {"by_provider": {}, "by_purpose": {}}
+        for record in self.records:
+            by_key["by_provider"].setdefault(record.provider, []).append(record)
+            by_key["by_purpose"].setdefault(record.purpose, []).append(record)
+        return {
+            "started_at": self.started_at,
+            "budget_tokens": self.budget_tokens,
+            "budget_state": self.budget_state,
+            "total": aggregate(self.records),
+            **{key: {name: aggregate(records) for name, records in groups.items()} for key, groups in by_key.items()},
+        }
+
+    def write(self, directory: str) -> str:
+        """Write the summary and every call to directory (the meeting's output folder, before rollover)."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, USAGE_FILE)
+        with open(path, 'w') as f:
+            json.dump({"summary": self.summary(), "calls": [asdict(r) for r in self.records]}, f, indent=2)
+        logger.info(f"LLM usage written to {path}: {self.summary()['total']}")
+        return path
@@ -4,12 +4,15 @@ from datetime import datetime
 from app import logger, WATCH_DIRECTORY, OUTPUT_DIRECTORY, CONTEXT_DIRECTORY, ROOT_PATH
 
 
-def rollover_directories(meeting_name: str = "", include_context: bool = False):
+def rollover_directories(meeting_name: str = "", include_context: bool = False,
+                         watch_directory: str = None, output_directory: str = None, context_directory: str = None):
     """Archive existing directory contents with timestamp and meeting name.
     
     Args:
         meeting_name: Name of the meeting for archival
-        include_context: Whether to include CONTEXT_DIRECTORY in rollover (typically True only on stop)
+        include_context: Whether to include the context directory in rollover (typically True only on stop)
+        watch_directory, output_directory, context_directory: The meeting session's directories,
+            the global directories when not given
     """
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     # Sanitize meeting name for file system
@@ -17,9 +20,9 @@ def rollover_directories(meeting_name: str = "", include_context: bool = False):
     safe_meeting_name = ''.join(c if c.isalnum() or c == '_' else '_' for c in safe_meeting_name)
     prefix = f"{safe_meeting_name}_" if safe_meeting_name else ""
 
-    directories = [WATCH_DIRECTORY, OUTPUT_DIRECTORY]
+    directories = [watch_directory or WATCH_DIRECTORY, output_directory or OUTPUT_DIRECTORY]
     if include_context:
-        directories.append(CONTEXT_DIRECTORY)
+        directories.append(context_directory or CONTEXT_DIRECTORY)
 
     for directory in directories:
         if os.path.exists(directory) and os.listdir(directory):
@@ -29,7 +32,7 @@ def rollover_directories(meeting_name: str = "", include_context: bool = False):
 
             # Create timestamped directory
             timestamped_dir = os.path.join(archive_dir, f'{os.path.basename(directory)}_{prefix}{timestamp}')
-            os.makedirs(timestamped_dir)
+            os.makedirs(timestamped_dir, exist_ok=True)
 
             # Move all files to archived directory
             for item in os.listdir(directory):
@@ -1,142 +1,258 @@
 import asyncio
-import json
 import logging
+import os
+import tempfile
 import time
 import websockets
-from websockets.protocol import State
+
+from app.mb.event_log import resume_token
+from app.mb.file_transfer import FileReceiver, FileTransferError, is_chunk_frame
+from app.mb.tracing import Tracer, make_span
+from app.mb.wire import WireCodec, WireError, deflate_options, hello_message
 
 logger = logging.getLogger(__name__)
 
 async def websocket_client(in_message_queue, out_message_queue, config):
-    """Handle WebSocket client connection and message processing."""
+    """Handle WebSocket client connection and message processing.
+
+    When the connection drops, the client reconnects for up to reconnect_grace_seconds
+    and resumes from the last event it received, so a brief outage loses nothing.
+    """
     ws_url = f"ws://localhost:{config.websocket_port}"
+    compression = getattr(config, "websocket_compression", True)
+    grace_seconds = getattr(config, "reconnect_grace_seconds", 0)
+
+    waiting_for_final_summary = False
+    stop_requested = False
+    received_final_summary = False
+    last_seq = 0
+    session_id = None
+    event_log = None  # The service's event log for this meeting, known once it acknowledges start
+    last_event_seq = 0
+    disconnected_at = None
+    expected_file_types = {"transcription": False, "summary": False}
+    pending_downloads = set()  # File types requested but not yet received, requested again after resuming
+    receiver = FileReceiver(os.path.join(tempfile.gettempdir(), "meeting_buddy_downloads"))
+    # Continues the service's segment traces up to the UI queue
+    tracer = Tracer(os.path.join(tempfile.gettempdir(), "meeting_buddy_traces", "client_trace.jsonl")) \
+        if getattr(config, "tracing_enabled", False) else None
+
+    def finished():
+        out_message_queue.put(("state_update", {"transcribing": False}))
+        out_message_queue.put(("stopped", None))
+
     try:
-        async with websockets.connect(ws_url) as websocket:
-            await websocket.send(json.dumps({"action": "start"}))
-            out_message_queue.put(("state_update", {"transcribing": True}))
-
-            last_summary_time = time.time()
-            current_text = ""
-            waiting_for_final_summary = False
-            stop_requested = False
-            received_final_summary = False
-            expected_file_types = {"transcription": False, "summary": False}
-
-            async def stopping(meeting_name):
-                nonlocal waiting_for_final_summary, stop_requested
-                logger.info(f"Stop message received with meeting name: {meeting_name}")
-                await websocket.send(json.dumps({
-                    "action": "stop",
-                    "meeting_name": meeting_name
-                }))
-                await websocket.send(json.dumps({
-                    "action": "download_files"
-                }))
-                logger.info("Requested file contents for download after stop")
-                waiting_for_final_summary = True
-                stop_requested = True
-                logger.info("Waiting for final summary and files before closing connection...")
-
-            while True:
-                try:
-                    timeout = 60 if (waiting_for_final_summary or stop_requested) else 1
-                    data = await asyncio.wait_for(websocket.recv(), timeout=timeout)
-                    message = json.loads(data)
-
-                    logger.debug(f"Message over socket-in-thread-to-queue: {message}")
-                    
-                    if message.get("type") == "transcription":
-                        text = message.get("text", "")
-                        current_text += text + '\n'
-                        out_message_queue.put(("transcription", text))
-                        logger.info(f"Put transcription on queue: {text}")
-
-                        current_time = time.time()
-                        if current_time - last_summary_time >= config.summary_interval:
-                            await websocket.send(json.dumps({
-                                "action": "summarize",
-                                "text": current_text
-                            }))
-                            last_summary_time = current_time
-
-                    elif message.get("type") == "summary":
-                        summary = message.get("text", "")
-                        out_message_queue.put(("summary", summary))
-                        logger.info(f"Put summary on queue: {summary}")
-
-                    elif message.get("type") == "final_summary":
-                        final_summary = message.get("text", "")
-                        out_message_queue.put(("final_summary", final_summary))
-                        logger.info("Received final summary")
-                        received_final_summary = True
-
-                    elif message.get("type") == "error":
-                        error_text = message.get("text", "Unknown error")
-                        logger.error(f"Received error from server: {error_text}")
-                        out_message_queue.put(("error", error_text))
-                        if waiting_for_final_summary:
-                            out_message_queue.put(("state_update", {"transcribing": False}))
-                            out_message_queue.put(("stopped", None))
-                            break
-
-                    elif message.get("type") == "file_data":
-                        file_type = message.get("file_type")
-                        data = bytes.fromhex(message.get("data", ""))
-                        filename = message.get("filename", "")
-                        out_message_queue.put(("file_data", {
-                            "type": file_type,
-                            "data": data,
-                            "filename": filename
+        while True:
+            try:
+                async with websockets.connect(ws_url, **deflate_options(compression)) as websocket:
+                    # Messages are JSON until the service answers hello with the negotiated format
+                    codec = WireCodec()
+                    await websocket.send(codec.encode(hello_message(getattr(config, "websocket_wire_format", "msgpack"))))
+                    if event_log is None:
+                        await websocket.send(codec.encode({"action": "start"}))
+                        out_message_queue.put(("state_update", {"transcribing": True}))
+                    else:
+                        await websocket.send(codec.encode({
+                            "action": "resume",
+                            "session": session_id,
+                            "token": resume_token(event_log, last_event_seq)
+                        }))
+                        logger.info(f"Reconnected, resuming after event {last_event_seq}")
+                    disconnected_at = None
+
+                    async def request_files(file_types=None):
+                        file_types = sorted(file_types or expected_file_types)
+                        pending_downloads.update(file_types)
+                        await websocket.send(codec.encode({
+                            "action": "download_files",
+                            "compression": getattr(config, "file_transfer_compression", False),
+                            "file_types": file_types,
+                            "resume": receiver.resume_state()
+                        }))
+
+                    async def stopping(meeting_name):
+                        nonlocal waiting_for_final_summary, stop_requested
+                        logger.info(f"Stop message received with meeting name: {meeting_name}")
+                        await websocket.send(codec.encode({
+                            "action": "stop",
+                            "meeting_name": meeting_name
                         }))
-                        logger.info(f"Received {file_type} file data for download")
-                        
-                        expected_file_types[file_type] = True
-                        
-                        if all(expected_file_types.values()) and stop_requested:
-                            logger.info("All expected files received, closing connection")
-                            out_message_queue.put(("state_update", {"transcribing": False}))
-                            out_message_queue.put(("stopped", None))
-                            break
-
-                    while not in_message_queue.empty():
-                        cmd_type, payload = in_message_queue.get_nowait()
-                        if cmd_type == "stop":
-                            await stopping(payload)
-                        elif cmd_type == "download_files":
-                            await websocket.send(json.dumps({
-                                "action": "download_files"
-                            }))
-                            logger.info("Requested file contents for download")
-
-                    if received_final_summary and all(expected_file_types.values()):
-                        logger.info("Received final summary and all expected files, closing connection")
-                        out_message_queue.put(("state_update", {"transcribing": False}))
-                        out_message_queue.put(("stopped", None))
-                        break
-
-                except asyncio.TimeoutError:
-                    if waiting_for_final_summary:
-                        logger.warning("Timeout while waiting for final summary")
-                        if stop_requested:
-                            logger.error("Timed out waiting for final summary, closing connection")
-                            out_message_queue.put(("error", "Timed out waiting for final summary"))
-                            out_message_queue.put(("state_update", {"transcribing": False}))
-                            out_message_queue.put(("stopped", None))
-                            break
-                    continue
-                except websockets.ConnectionClosed:
-                    logger.warning("Websocket connection closed")
+                        await request_files()
+                        logger.info("Requested file contents for download after stop")
+                        waiting_for_final_summary = True
+                        stop_requested = True
+                        logger.info("Waiting for final summary and files before closing connection...")
+
+                    while True:
+                        try:
+                            timeout = 60 if (waiting_for_final_summary or stop_requested) else 1
+                            data = await asyncio.wait_for(websocket.recv(), timeout=timeout)
+                            if is_chunk_frame(data):
+                                receiver.add_chunk(data)
+                                continue
+                            try:
+                                message = codec.decode(data)
+                            except WireError as e:
+                                logger.warning(f"Ignoring message from server: {e}")
+                                continue
+
+                            logger.debug(f"Message over socket-in-thread-to-queue: {message}")
+
+                            event_seq = message.get("event_seq")
+                            if event_seq is not None:
+                                if event_seq <= last_event_seq:
+                                    continue  # Already received before reconnecting
+                                last_event_seq = event_seq
+
+                            if message.get("type") == "hello":
+                                codec = WireCodec(message["format"])
+                                logger.info(f"Using wire format {codec.format} v{message['version']}")
+
+                            elif message.get("type") == "recording":
+                                session_id = message.get("session") or session_id
+                                event_log = message.get("event_log") or event_log
+
+                            elif message.get("type") == "resumed":
+                                event_log = message["event_log"]
+                                if message["reset"]:
+                                    # Not the meeting we were following (e.g. the service restarted): start over
+                                    last_seq = 0
+                                    last_event_seq = 0
+                                    out_message_queue.put(("reset", None))
+                                logger.info(f"Resumed meeting, {message['replayed']} missed event(s) replayed")
+                                if pending_downloads:
+                                    # Downloads cut off by the disconnect continue from the bytes already on disk
+                                    await request_files(pending_downloads)
+                                    logger.info(f"Resuming download of {', '.join(sorted(pending_downloads))}")
+
+                            elif message.get("type") == "transcription":
+                                # Interim summaries are triggered by the service as new speech arrives.
+                                # The service owns the transcript; seq lets us ask for ranges of it.
+                                text = message.get("text", "")
+                                seq = message.get("seq")
+                                if seq is not None:
+                                    if last_seq and seq != last_seq + 1:
+                                        logger.warning(f"Missed transcription segments {last_seq + 1} to {seq - 1}")
+                                    last_seq = seq
+                                out_message_queue.put(("transcription", text))
+                                logger.info(f"Put transcription on queue: {text}")
+                                trace = message.get("trace")
+                                if tracer is not None and trace:
+                                    # From the service queueing the segment until it is on the UI queue
+                                    tracer.export(make_span(trace["trace_id"], "client.deliver", trace["sent_ns"],
+                                                            time.time_ns(), trace["span_id"], seq=seq))
+                                    tracer.flush()
+
+                            elif message.get("type") == "summary":
+                                summary = message.get("text", "")
+                                out_message_queue.put(("summary", summary))
+                                logger.info(f"Put summary on queue: {summary}")
+
+                            elif message.get("type") in ("summary_delta", "final_summary_delta"):
+                                # Streamed tokens; the complete text follows as a summary/final_summary message
+                                out_message_queue.put((message["type"], {
+                                    "text": message.get("text", ""),
+                                    "first": message.get("first", False)
+                                }))
+
+                            elif message.get("type") == "llm_status":
+                                out_message_queue.put(("llm_status", {
+                                    "ready": message.get("ready", False),
+                                    "providers": message.get("providers", {})
+                                }))
+                                logger.info(f"LLM ready: {message.get('ready')}")
+
+                            elif message.get("type") == "final_summary":
+                                final_summary = message.get("text", "")
+                                out_message_queue.put(("final_summary", final_summary))
+                                stop_latency = message.get("stop_latency_seconds")
+                                if stop_latency is not None:
+                                    logger.info(f"Received final summary {stop_latency:.1f} seconds after stop")
+                                else:
+                                    logger.info("Received final summary")
+                                received_final_summary = True
+
+                            elif message.get("type") == "error":
+                                error_text = message.get("text", "Unknown error")
+                                logger.error(f"Received error from server: {error_text}")
+                                out_message_queue.put(("error", error_text))
+                                # A replayed error happened before the disconnect, not to the stop we wait on
+                                if waiting_for_final_summary and not message.get("replayed"):
+                                    finished()
+                                    return
+
+                            elif message.get("type") == "file_manifest":
+                                receiver.start(message)
+                                logger.info(f"Receiving {message['file_type']} file {message['filename']} "
+                                            f"({message['size']} bytes in {message['chunks']} chunks)")
+
+                            elif message.get("type") == "file_complete":
+                                try:
+                                    manifest, path = receiver.complete(message["transfer_id"])
+                                except FileTransferError as e:
+                                    logger.error(f"File download failed: {e}")
+                                    out_message_queue.put(("error", f"File download failed: {e}"))
+                                    continue
+                                file_type = manifest["file_type"]
+                                pending_downloads.discard(file_type)
+                                with open(path, 'rb') as f:
+                                    data = f.read()
+                                out_message_queue.put(("file_data", {
+                                    "type": file_type,
+                                    "data": data,
+                                    "filename": manifest["filename"]
+                                }))
+                                logger.info(f"Received {file_type} file data for download")
+
+                                expected_file_types[file_type] = True
+
+                                if all(expected_file_types.values()) and stop_requested:
+                                    logger.info("All expected files received, closing connection")
+                                    finished()
+                                    return
+
+                            while not in_message_queue.empty():
+                                cmd_type, payload = in_message_queue.get_nowait()
+                                if cmd_type == "stop":
+                                    await stopping(payload)
+                                elif cmd_type == "download_files":
+                                    await request_files()
+                                    logger.info("Requested file contents for download")
+
+                            if received_final_summary and all(expected_file_types.values()):
+                                logger.info("Received final summary and all expected files, closing connection")
+                                finished()
+                                return
+
+                        except asyncio.TimeoutError:
+                            if waiting_for_final_summary:
+                                logger.warning("Timeout while waiting for final summary")
+                                if stop_requested:
+                                    logger.error("Timed out waiting for final summary, closing connection")
+                                    out_message_queue.put(("error", "Timed out waiting for final summary"))
+                                    finished()
+                                    return
+                            continue
+            except (websockets.ConnectionClosed, OSError) as e:
+                # Partial downloads are flushed to disk and resumed after reconnecting
+                receiver.abort()
+                if event_log is None and not isinstance(e, websockets.ConnectionClosed):
+                    raise  # The service was never reached
+                if disconnected_at is None:
+                    logger.warning(f"Websocket connection closed: {e}")
+                    disconnected_at = time.monotonic()
+                if event_log is None or time.monotonic() - disconnected_at >= grace_seconds:
                     if not waiting_for_final_summary:
                         logger.error("Unexpected connection closure")
                         out_message_queue.put(("error", "Connection closed unexpectedly"))
-                    out_message_queue.put(("state_update", {"transcribing": False}))
-                    out_message_queue.put(("stopped", None))
-                    break
+                    finished()
+                    return
+                # The service keeps recording for the grace period; try to get back in
+                await asyncio.sleep(1)
     except Exception as e:
         logger.error(f"Error in websocket client: {str(e)}", exc_info=True)
         out_message_queue.put(("error", f"Connection error: {str(e)}"))
-        out_message_queue.put(("state_update", {"transcribing": False}))
-        out_message_queue.put(("stopped", None))
+        finished()
 
 def websocket_client_thread(in_message_queue, out_message_queue, config):
     """Run the WebSocket client in a separate thread."""
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Versioned websocket message format shared by the service and its clients.
+
+Messages are dicts with an "action" (client to service) or a "type" (service to
+client) and are checked against the schemas below when decoded. Two encodings are
+supported: compact JSON text frames (orjson when installed) and msgpack binary
+frames. A connection starts in JSON; the client sends
+
+    {"action": "hello", "version": 1, "formats": ["msgpack", "json"]}
+
+and the service answers {"type": "hello", "version": 1, "format": "msgpack"} with the
+first format it supports, after which both sides use that format. Clients that never
+send hello keep receiving JSON. Permessage-deflate is negotiated by the websocket
+handshake on top of either format.
+
+``python -m app.mb.wire --bench`` compares encode/decode throughput and bytes per
+meeting against plain json.dumps.
+"""
+import argparse
+import json
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is in requirements.txt
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+WIRE_VERSION = 1
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+Frame = Union[str, bytes]
+
+# Field name -> (type, required); optional fields may also be None.
+# Logged events sent again to a resuming or joining client carry replayed: true.
+# Meeting actions may name the session they apply to; the default session otherwise.
+CLIENT_MESSAGES: Dict[str, Dict[str, Tuple[type, bool]]] = {
+    "hello": {"version": (int, True), "formats": (list, False)},
+    "start": {"session": (str, False)},
+    "resume": {"token": (str, False), "session": (str, False)},
+    "stop": {"meeting_name": (str, False), "session": (str, False)},
+    "summarize": {"since_seq": (int, False), "session": (str, False)},
+    "llm_status": {},
+    "sessions": {},
+    "profile": {"seconds": (float, False)},
+    "download_files": {"compression": (bool, False), "resume": (dict, False), "session": (str, False)},
+}
+
+SERVER_MESSAGES: Dict[str, Dict[str, Tuple[type, bool]]] = {
+    "hello": {"version": (int, True), "format": (str, True)},
+    "recording": {"recording": (bool, True), "session": (str, False), "event_log": (str, False)},
+    "resumed": {"session": (str, True), "recording": (bool, True), "reset": (bool, True),
+                "replayed": (int, True), "event_log": (str, True)},
+    "sessions": {"max_sessions": (int, True), "active": (int, True), "sessions": (list, True)},
+    "profile": {"seconds": (float, True), "samples": (int, True), "blocks": (list, True)},
+    "transcription": {"text": (str, True), "seq": (int, False), "event_seq": (int, False), "trace": (dict, False),
+                      "replayed": (bool, False)},
+    "summary": {"text": (str, True), "event_seq": (int, False), "replayed": (bool, False)},
+    "summary_delta": {"text": (str, True), "first": (bool, False)},
+    "final_summary_delta": {"text": (str, True), "first": (bool, False)},
+    "final_summary": {"text": (str, True), "stop_latency_seconds": (float, False), "event_seq": (int, False),
+                      "replayed": (bool, False)},
+    "llm_status": {"ready": (bool, True), "providers": (dict, True)},
+    "error": {"text": (str, False), "message": (str, False), "event_seq": (int, False), "replayed": (bool, False)},
+    "file_manifest": {"transfer_id": (str, True), "file_type": (str, True), "filename": (str, True),
+                      "size": (int, True), "sha256": (str, True), "chunk_size": (int, True),
+                      "chunks": (int, True), "start_chunk": (int, True), "compression": (str, False)},
+    "file_complete": {"transfer_id": (str, True)},
+}
+
+
+class WireError(Exception):
+    """Raised for frames that cannot be decoded or do not match the message schema."""
+
+
+def available_formats() -> List[str]:
+    return [MSGPACK, JSON] if msgpack is not None else [JSON]
+
+
+def validate(message) -> dict:
+    """Check a decoded message against its schema and return it."""
+    if not isinstance(message, dict):
+        raise WireError(f"Message must be an object, got {type(message).__name__}")
+    if "action" in message:
+        name, schemas = message["action"], CLIENT_MESSAGES
+    elif "type" in message:
+        name, schemas = message["type"], SERVER_MESSAGES
+    else:
+        raise WireError("Message has neither an action nor a type")
+    schema = schemas.get(name)
+    if schema is None:
+        raise WireError(f"Unknown message {name!r}")
+    for field, (expected, required) in schema.items():
+        value = message.get(field)
+        if value is None:
+            if required:
+                raise WireError(f"{name} message is missing {field!r}")
+            continue
+        # bool is an int subclass, and JSON may encode a whole float as an int
+        if expected in (int, float):
+            valid = isinstance(value, (int, float) if expected is float else int) and not isinstance(value, bool)
+        else:
+            valid = isinstance(value, expected)
+        if not valid:
+            raise WireError(f"{name} field {field!r} must be {expected.__name__}, got {type(value).__name__}")
+    return message
+
+
+def _dumps(message: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(message).decode('utf-8')
+    return json.dumps(message, separators=(',', ':'))
+
+
+def _loads(frame: Frame):
+    return orjson.loads(frame) if orjson is not None else json.loads(frame)
+
+
+class WireCodec:
+    """Encodes messages in one wire format and decodes frames in either format."""
+
+    def __init__(self, format: str = JSON):
+        if format not in (JSON, MSGPACK):
+            raise WireError(f"Unknown wire format {format!r}")
+        if format == MSGPACK and msgpack is None:
+            raise WireError("msgpack is not installed")
+        self.format = format
+
+    def encode(self, message: dict) -> Frame:
+        if self.format == MSGPACK:
+            return msgpack.packb(message, use_bin_type=True)
+        return _dumps(message)
+
+    def decode(self, frame: Frame) -> dict:
+        """Decode a text frame as JSON or a binary frame as msgpack and validate it."""
+        try:
+            if isinstance(frame, (bytes, bytearray)):
+                if msgpack is None:
+                    raise WireError("Received a msgpack frame but msgpack is not installed")
+                message = msgpack.unpackb(frame, raw=False)
+            else:
+                message = _loads(frame)
+        except WireError:
+            raise
+        except Exception as e:
+            raise WireError(f"Cannot decode {self.format} frame: {e}") from e
+        return validate(message)
+
+
+def hello_message(preferred: str = MSGPACK) -> dict:
+    """The client's opening message, listing the formats it accepts in order of preference."""
+    formats = available_formats()
+    if preferred in formats:
+        formats = [preferred] + [f for f in formats if f != preferred]
+    return {"action": "hello", "version": WIRE_VERSION, "formats": formats}
+
+
+def negotiate(hello: dict) -> Tuple[WireCodec, dict]:
+    """Pick the format for a client from its hello message; returns the codec and the reply."""
+    if hello.get("version", 0) < 1:
+        raise WireError(f"Unsupported wire version {hello.get('version')}")
+    supported = available_formats()
+    chosen = next((f for f in hello.get("formats") or [JSON] if f in supported), JSON)
+    reply = {"type": "hello", "version": min(hello["version"], WIRE_VERSION), "format": chosen}
+    return WireCodec(chosen), reply
+
+
+def deflate_options(enabled: bool) -> dict:
+    """Keyword arguments for websockets.serve/connect to negotiate permessage-deflate.
+
+    The websockets defaults keep a 4 KiB window (12 bits) and memLevel 5 per connection,
+    which keeps most of the ratio on short repetitive JSON at a fraction of zlib's memory.
+    """
+    return {"compression": "deflate" if enabled else None}
+
+
+def sample_meeting(segments: int = 200) -> List[dict]:
+    """A representative stream of service messages for a meeting of the given length."""
+    sentence = ("so the plan is to finish the migration this sprint and then review the billing "
+                "metrics with the finance team before we commit to the new pricing")
+    messages = []
+    for seq in range(1, segments + 1):
+        messages.append({"type": "transcription", "text": f"{sentence} ({seq})", "seq": seq})
+        if seq % 10 == 0:
+            first = True
+            for word in sentence.split():
+                messages.append({"type": "summary_delta", "text": word + " ", "first": first})
+                first = False
+            messages.append({"type": "summary", "text": f"## Summary\n- {sentence}\n" * 5})
+    messages.append({"type": "llm_status", "ready": True,
+                     "providers": {"local": {"state": "ready", "model": "mistral", "latency": 1.2, "error": None}}})
+    return messages
+
+
+def _deflated_size(frames: List[bytes]) -> int:
+    # Streaming compression with context takeover, as permessage-deflate does per connection
+    compressor = zlib.compressobj(wbits=-12, memLevel=5)
+    return sum(len(compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4 for frame in frames)
+
+
+def run_benchmark(messages: Optional[List[dict]] = None, rounds: int = 20) -> Dict[str, dict]:
+    """Encode/decode throughput and bytes for today's json.dumps and each wire format."""
+    messages = messages or sample_meeting()
+    codecs = {
+        "json.dumps (before)": (json.dumps, json.loads),
+        **{f"wire {f}": (WireCodec(f).encode, WireCodec(f).decode) for f in available_formats()},
+    }
+    report = {}
+    for name, (encode, decode) in codecs.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            frames = [encode(m) for m in messages]
+        encode_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for frame in frames:
+                decode(frame)
+        decode_seconds = time.perf_counter() - start
+        raw = [f.encode('utf-8') if isinstance(f, str) else f for f in frames]
+        count = len(messages) * rounds
+        report[name] = {
+            "encode_per_second": round(count / encode_seconds),
+            "decode_per_second": round(count / decode_seconds),
+            "bytes": sum(len(f) for f in raw),
+            "deflated_bytes": _deflated_size(raw),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Websocket wire format benchmark')
+    parser.add_argument('--bench', action='store_true', help='Compare wire formats on a sample meeting')
+    parser.add_argument('--segments', type=int, default=200, help='Transcription segments in the sample meeting')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+    messages = sample_meeting(args.segments)
+    print(f"{len(messages)} messages, {args.rounds} rounds")
+    for name, row in run_benchmark(messages, args.rounds).items():
+        print(f"{name:22} encode {row['encode_per_second']:>9}/s  decode {row['decode_per_second']:>9}/s  "
+              f"{row['bytes']:>8} bytes  {row['deflated_bytes']:>7} deflated")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import os
+# Keep cached LLM responses from leaking between test runs
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
 import pytest
 import yaml
 from app import ROOT_PATH
 from app.mb.config import Config
+from app.mb.llm_gateway import LLMGateway
+from app.mb.llm_stub_server import LLMStubServer, StubSettings
 
 os.environ.setdefault("OPENAI_API_KEY", "")
 @pytest.fixture(scope="function")
@@ -16,3 +20,21 @@ def test_config():
 
     test_config = Config.load_config(config_file_path=test_config_file)
     return test_config
+
+@pytest.fixture
+def start_stub():
+    """Starts an LLM stub server with the given StubSettings; the test stops it."""
+    async def start(**settings):
+        return await LLMStubServer(StubSettings(**settings)).start()
+    return start
+
+@pytest.fixture
+def gateway_for():
+    """Builds an LLMGateway whose local model, and hosted API when given, are stub servers."""
+    def build(local_server, hosted_server=None, **overrides):
+        config = Config(openai_api_key="stub-key" if hosted_server else "",
+                        openai_base_url=hosted_server.url if hosted_server else "",
+                        local_llm_model="openai/stub", local_llm_api_base=local_server.url, local_llm_api_key="stub",
+                        **overrides)
+        return LLMGateway(config)
+    return build
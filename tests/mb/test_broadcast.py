@@ -0,0 +1,114 @@
+import asyncio
+import json
+import pytest
+from websockets.protocol import State
+from app.mb.broadcast import Broadcaster, DROP, LATEST, DISCONNECT, log_preview
+from app.mb.wire import WireCodec
+
+class FakeWebSocket:
+    def __init__(self, stalled=False):
+        self.state = State.OPEN
+        self.frames = []
+        self.close_code = None
+        self.unblock = asyncio.Event()
+        if not stalled:
+            self.unblock.set()
+
+    async def send(self, frame):
+        await self.unblock.wait()
+        self.frames.append(json.loads(frame))
+
+    async def close(self, code=1000, reason=""):
+        self.state = State.CLOSED
+        self.close_code = code
+
+def make_broadcaster(policy, max_queue=3):
+    return Broadcaster(lambda client: WireCodec(), max_queue=max_queue, policy=policy)
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_stalled_client_does_not_delay_others():
+    broadcaster = make_broadcaster(DROP)
+    fast, stalled = FakeWebSocket(), FakeWebSocket(stalled=True)
+
+    for seq in range(1, 3):
+        assert broadcaster.publish([fast, stalled], {"type": "transcription", "text": f"t{seq}", "seq": seq}) == 2
+    await settle()
+
+    assert [m["seq"] for m in fast.frames] == [1, 2]
+    assert stalled.frames == []
+    stalled.unblock.set()
+    await broadcaster.drain([stalled], timeout=1)
+    assert [m["seq"] for m in stalled.frames] == [1, 2]
+    await broadcaster.close()
+
+@pytest.mark.asyncio
+async def test_drop_policy_discards_intermediate_updates_first():
+    broadcaster = make_broadcaster(DROP)
+    client = FakeWebSocket(stalled=True)
+    broadcaster.publish([client], {"type": "transcription", "text": "first", "seq": 1})
+    await settle()  # The sender now holds the first frame
+
+    broadcaster.publish([client], {"type": "summary_delta", "text": "a", "first": True})
+    broadcaster.publish([client], {"type": "transcription", "text": "second", "seq": 2})
+    broadcaster.publish([client], {"type": "summary", "text": "interim"})
+    # Full: a new transcription replaces a queued intermediate update, a new delta is discarded
+    broadcaster.publish([client], {"type": "transcription", "text": "third", "seq": 3})
+    broadcaster.publish([client], {"type": "summary_delta", "text": "b"})
+    stats = broadcaster.stats()["client1"]
+
+    client.unblock.set()
+    await broadcaster.drain([client], timeout=1)
+    assert [(m["type"], m["text"]) for m in client.frames] == [
+        ("transcription", "first"), ("transcription", "second"), ("summary", "interim"), ("transcription", "third")
+    ]
+    assert stats["dropped"] == 2 and stats["max_depth"] == 3
+    await broadcaster.close()
+
+@pytest.mark.asyncio
+async def test_latest_policy_keeps_newest_messages():
+    broadcaster = make_broadcaster(LATEST, max_queue=2)
+    client = FakeWebSocket(stalled=True)
+    for seq in range(1, 6):
+        broadcaster.publish([client], {"type": "transcription", "text": f"t{seq}", "seq": seq})
+        await settle()
+
+    client.unblock.set()
+    await broadcaster.drain([client], timeout=1)
+    assert [m["seq"] for m in client.frames] == [1, 4, 5]
+    await broadcaster.close()
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_slow_client():
+    broadcaster = make_broadcaster(DISCONNECT, max_queue=1)
+    slow, fast = FakeWebSocket(stalled=True), FakeWebSocket()
+    for seq in range(1, 4):
+        broadcaster.publish([slow, fast], {"type": "transcription", "text": f"t{seq}", "seq": seq})
+        await settle()
+
+    assert slow.close_code == 1008
+    assert [m["seq"] for m in fast.frames] == [1, 2, 3]
+    await broadcaster.close()
+
+def test_log_preview_is_size_limited():
+    preview = log_preview({"type": "final_summary", "text": "x" * 5000}, limit=20)
+
+    assert len(preview) < 80
+    assert "5000 chars" in preview
+
+@pytest.mark.asyncio
+async def test_replay_is_queued_ahead_of_new_messages_beyond_the_limit():
+    broadcaster = make_broadcaster(DROP, max_queue=2)
+    client = FakeWebSocket(stalled=True)
+    history = [{"type": "transcription", "text": f"t{seq}", "seq": seq, "event_seq": seq} for seq in range(1, 5)]
+
+    assert broadcaster.replay(client, history) == 4
+    broadcaster.publish([client], {"type": "transcription", "text": "t5", "seq": 5, "event_seq": 5})
+
+    client.unblock.set()
+    await broadcaster.drain([client], timeout=1)
+    assert [m["event_seq"] for m in client.frames] == [1, 2, 3, 4, 5]
+    await broadcaster.close()
@@ -0,0 +1,58 @@
+import os
+import pytest
+from app.mb.context_index import ContextIndex
+from app.mb.token_budget import TokenBudget
+
+@pytest.fixture
+def context_dir(tmp_path):
+    (tmp_path / "agenda.md").write_text(
+        "Agenda for the billing review.\n\nDiscuss invoice retries and payment gateway timeouts."
+    )
+    (tmp_path / "design.md").write_text(
+        "Search service design.\n\nThe indexer shards documents by tenant and rebuilds nightly."
+    )
+    (tmp_path / "meeting_context_note.txt").write_text("invoice invoice invoice")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG")
+    return tmp_path
+
+def make_index(directory, **kwargs):
+    budget = TokenBudget(context_tokens=8000, max_output_tokens=1000)
+    return ContextIndex(str(directory), budget, chunk_tokens=20, exclude=("meeting_context_note.txt",),
+                        refresh_interval=0, **kwargs)
+
+def test_search_ranks_relevant_passages_first(context_dir):
+    index = make_index(context_dir)
+
+    chunks = index.search("the invoice retries keep hitting gateway timeouts", top_k=2)
+
+    assert chunks[0].source == "agenda.md"
+    assert "invoice retries" in chunks[0].text
+    assert all(chunk.source != "meeting_context_note.txt" for chunk in chunks)
+
+def test_search_respects_token_budget(context_dir):
+    index = make_index(context_dir)
+    budget = TokenBudget(context_tokens=8000, max_output_tokens=1000)
+
+    chunks = index.search("billing invoice search indexer tenant", top_k=10, budget_tokens=15)
+
+    assert sum(budget.count(chunk.text) for chunk in chunks) <= 15
+
+def test_refresh_picks_up_changed_and_removed_files(context_dir):
+    index = make_index(context_dir)
+    assert index.search("kubernetes migration") == []
+
+    (context_dir / "notes.md").write_text("Plan the kubernetes migration for the search cluster.")
+    os.remove(context_dir / "design.md")
+
+    chunks = index.search("kubernetes migration")
+    assert [chunk.source for chunk in chunks] == ["notes.md"]
+    assert all(not path.endswith("design.md") for path in index.files)
+    assert index.document_frequency["indexer"] == 0
+
+def test_related_context_renders_sources(context_dir):
+    index = make_index(context_dir)
+
+    rendered = index.related_context("payment gateway timeouts", top_k=1)
+
+    assert rendered.startswith("[agenda.md]\n")
+    assert index.related_context("nothing matches zebra") == ""
@@ -0,0 +1,52 @@
+import os
+import pytest
+from app.mb.event_log import EventLog, parse_resume_token, resume_token
+
+def fill(log, count):
+    for seq in range(1, count + 1):
+        log.append({"type": "transcription", "text": f"segment {seq}", "seq": seq})
+
+@pytest.mark.asyncio
+async def test_events_are_numbered_and_replayed_after_a_token():
+    log = EventLog(capacity=10)
+    fill(log, 3)
+
+    assert log.last_seq == 3
+    assert [e["event_seq"] for e in await log.since(0)] == [1, 2, 3]
+    events, reset = await log.resume(resume_token(log.log_id, 1))
+    assert reset is False
+    assert [e["text"] for e in events] == ["segment 2", "segment 3"]
+    assert await log.resume(log.token) == ([], False)
+
+@pytest.mark.asyncio
+async def test_full_buffer_spills_to_disk_and_is_read_back(tmp_path):
+    log = EventLog(capacity=4, spill_directory=str(tmp_path))
+    fill(log, 10)  # Spilled from worker threads while the test awaits
+
+    assert len(log.events) <= 4
+    assert [e["event_seq"] for e in await log.since(0)] == list(range(1, 11))
+    assert [e["event_seq"] for e in await log.since(5)] == list(range(6, 11))
+    assert os.path.exists(log.spill_path)
+
+    log.close()
+    assert not os.path.exists(log.spill_path)
+
+def test_spills_are_written_directly_without_an_event_loop(tmp_path):
+    log = EventLog(capacity=4, spill_directory=str(tmp_path))
+    fill(log, 10)
+
+    assert log.spill_task is None
+    with open(log.spill_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == log.spilled
+    log.close()
+
+@pytest.mark.asyncio
+async def test_unknown_token_gets_a_full_replay():
+    log = EventLog()
+    fill(log, 2)
+
+    for token in (None, "garbage", resume_token("other-meeting", 1), resume_token(log.log_id, 99)):
+        events, reset = await log.resume(token)
+        assert reset is True
+        assert len(events) == 2
+    assert parse_resume_token("abc:def:7") == ("abc:def", 7)
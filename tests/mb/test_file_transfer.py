@@ -0,0 +1,89 @@
+import json
+import os
+import pytest
+from app.mb.file_transfer import (
+    FileReceiver, FileTransferError, ZLIB, decode_chunk, is_chunk_frame, send_file
+)
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, frame):
+        self.frames.append(frame)
+
+def receive(receiver, frames):
+    """Feed sent frames into the receiver; returns the completed manifest and path."""
+    result = None
+    for frame in frames:
+        if is_chunk_frame(frame):
+            receiver.add_chunk(frame)
+            continue
+        message = json.loads(frame)
+        if message["type"] == "file_manifest":
+            receiver.start(message)
+        elif message["type"] == "file_complete":
+            result = receiver.complete(message["transfer_id"])
+    return result
+
+@pytest.fixture
+def transcript(tmp_path):
+    path = tmp_path / "meeting_transcription.txt"
+    path.write_bytes(b"".join(f"line {i} of the meeting\n".encode() for i in range(2000)))
+    return str(path)
+
+@pytest.mark.asyncio
+async def test_round_trip_in_binary_chunks(transcript, tmp_path):
+    websocket = FakeWebSocket()
+
+    manifest = await send_file(websocket, transcript, "transcription", chunk_size=4096)
+    manifest_out, path = receive(FileReceiver(str(tmp_path / "downloads")), websocket.frames)
+
+    chunks = [f for f in websocket.frames if isinstance(f, bytes)]
+    assert len(chunks) == manifest["chunks"] == -(-os.path.getsize(transcript) // 4096)
+    assert manifest_out["file_type"] == "transcription"
+    assert open(path, 'rb').read() == open(transcript, 'rb').read()
+
+@pytest.mark.asyncio
+async def test_compressed_chunks_are_smaller(transcript, tmp_path):
+    websocket = FakeWebSocket()
+
+    await send_file(websocket, transcript, "transcription", chunk_size=4096, compression=ZLIB)
+    _, path = receive(FileReceiver(str(tmp_path / "downloads")), websocket.frames)
+
+    sent = sum(len(f) for f in websocket.frames if isinstance(f, bytes))
+    assert sent < os.path.getsize(transcript) / 2
+    assert open(path, 'rb').read() == open(transcript, 'rb').read()
+
+@pytest.mark.asyncio
+async def test_resume_skips_received_chunks(transcript, tmp_path):
+    receiver = FileReceiver(str(tmp_path / "downloads"))
+    first = FakeWebSocket()
+    await send_file(first, transcript, "transcription", chunk_size=4096)
+    # The connection drops after three chunks
+    receive(receiver, first.frames[:4])
+    receiver.abort()
+    resume = receiver.resume_state()
+    assert resume["transcription"]["offset"] == 3 * 4096
+    assert receiver.transfers == {}
+
+    second = FakeWebSocket()
+    manifest = await send_file(second, transcript, "transcription", chunk_size=4096,
+                               resume=resume["transcription"])
+    _, path = receive(receiver, second.frames)
+
+    assert manifest["start_chunk"] == 3
+    assert receiver.resume_state() == {}
+    assert decode_chunk(second.frames[1])[1] == 3
+    assert open(path, 'rb').read() == open(transcript, 'rb').read()
+
+@pytest.mark.asyncio
+async def test_corrupted_file_fails_verification(transcript, tmp_path):
+    websocket = FakeWebSocket()
+    await send_file(websocket, transcript, "transcription", chunk_size=4096)
+    frame = bytearray(websocket.frames[1])
+    frame[-1] ^= 0xFF
+    websocket.frames[1] = bytes(frame)
+
+    with pytest.raises(FileTransferError):
+        receive(FileReceiver(str(tmp_path / "downloads")), websocket.frames)
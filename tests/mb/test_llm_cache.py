@@ -0,0 +1,48 @@
+import time
+import pytest
+from app.mb.llm_cache import LLMCache
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm'), size_limit_mb=1, ttl_seconds=60)
+    yield cache
+    cache.close()
+
+def test_miss_then_hit(cache):
+    assert cache.get("model", "prompt", "context", "content") is None
+    cache.set("model", "prompt", "context", "content", "summary")
+
+    assert cache.get("model", "prompt", "context", "content") == "summary"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+def test_key_covers_model_prompt_context_and_content(cache):
+    cache.set("model", "prompt", "context", "content", "summary")
+
+    assert cache.get("other-model", "prompt", "context", "content") is None
+    assert cache.get("model", "other prompt", "context", "content") is None
+    assert cache.get("model", "prompt", "other context", "content") is None
+    assert cache.get("model", "prompt", "context", "other content") is None
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm'), ttl_seconds=1)
+    cache.set("model", "prompt", "", "content", "summary")
+    time.sleep(1.1)
+
+    assert cache.get("model", "prompt", "", "content") is None
+    cache.close()
+
+def test_empty_responses_are_not_cached(cache):
+    cache.set("model", "prompt", "", "content", "")
+
+    assert cache.get("model", "prompt", "", "content") is None
+
+def test_disabled_cache_is_a_no_op(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm'), enabled=False)
+    cache.set("model", "prompt", "", "content", "summary")
+
+    assert cache.get("model", "prompt", "", "content") is None
+    assert not (tmp_path / 'llm').exists()
+    assert cache.stats()["enabled"] is False
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.mb.config import Config
+from app.mb.llm_gateway import LLMGateway, LLMGatewayError, LOCAL, HOSTED
+
+def make_response(content, prompt_tokens=10, completion_tokens=5):
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=content))]
+    response.usage = MagicMock(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                               prompt_tokens_details=None)
+    return response
+
+def make_chunk(content=None, usage=None):
+    chunk = MagicMock()
+    chunk.usage = usage
+    chunk.choices = [MagicMock(delta=MagicMock(content=content))] if content is not None else []
+    return chunk
+
+async def stream_of(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+@pytest.fixture
+async def gateway():
+    config = Config(openai_api_key="", llm_max_retries=1, local_llm_timeout=0.5)
+    gateway = LLMGateway(config)
+    yield gateway
+    await gateway.close()
+
+@pytest.mark.asyncio
+async def test_local_completion_returns_text_and_usage(gateway):
+    with patch('app.mb.llm_gateway.acompletion', new_callable=AsyncMock) as mock_acompletion:
+        mock_acompletion.return_value = make_response("summary", prompt_tokens=42, completion_tokens=7)
+
+        result = await gateway.complete(LOCAL, [{"role": "user", "content": "hi"}])
+
+    assert result.text == "summary"
+    assert result.provider == LOCAL
+    assert result.prompt_tokens == 42
+    assert result.completion_tokens == 7
+    assert result.latency >= 0
+    assert mock_acompletion.call_args[1]['stream'] is False
+
+@pytest.mark.asyncio
+async def test_local_completion_streams_deltas(gateway):
+    usage = MagicMock(prompt_tokens=3, completion_tokens=2, prompt_tokens_details=None)
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+
+    with patch('app.mb.llm_gateway.acompletion', new_callable=AsyncMock) as mock_acompletion:
+        mock_acompletion.return_value = stream_of(make_chunk("Hel"), make_chunk("lo"), make_chunk(usage=usage))
+
+        result = await gateway.complete(LOCAL, [{"role": "user", "content": "hi"}], on_delta=on_delta)
+
+    assert deltas == ["Hel", "lo"]
+    assert result.text == "Hello"
+    assert result.completion_tokens == 2
+
+@pytest.mark.asyncio
+async def test_failed_call_is_retried(gateway):
+    with patch('app.mb.llm_gateway.acompletion', new_callable=AsyncMock) as mock_acompletion:
+        mock_acompletion.side_effect = [ConnectionError("refused"), make_response("second try")]
+
+        result = await gateway.complete(LOCAL, [{"role": "user", "content": "hi"}])
+
+    assert result.text == "second try"
+    assert mock_acompletion.call_count == 2
+
+@pytest.mark.asyncio
+async def test_timeout_raises_after_retries(gateway):
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(5)
+
+    with patch('app.mb.llm_gateway.acompletion', side_effect=slow) as mock_acompletion:
+        with pytest.raises(LLMGatewayError):
+            await gateway.complete(LOCAL, [{"role": "user", "content": "hi"}])
+
+    assert mock_acompletion.call_count == 2
+
+@pytest.mark.asyncio
+async def test_hosted_provider_requires_api_key(gateway):
+    assert not gateway.available(HOSTED)
+    with pytest.raises(LLMGatewayError):
+        await gateway.complete(HOSTED, [{"role": "user", "content": "hi"}])
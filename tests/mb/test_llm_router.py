@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from app.mb.llm_gateway import LLMGatewayError, LLMResult, LOCAL, HOSTED
+from app.mb.llm_router import LLMRouter, FALLBACK, HEDGE
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+class FakeGateway:
+    """Gateway whose providers answer after a fixed delay, streaming word by word."""
+
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = failing
+        self.started = []
+        self.cancelled = []
+
+    def available(self, provider):
+        return provider in self.delays
+
+    async def complete(self, provider, messages, on_delta=None, **kwargs):
+        self.started.append(provider)
+        try:
+            await asyncio.sleep(self.delays[provider])
+            if provider in self.failing:
+                raise LLMGatewayError(f"{provider} is down")
+            text = f"{provider} answer"
+            if on_delta:
+                for word in text.split(" "):
+                    await on_delta(word)
+                    await asyncio.sleep(0.05)
+            return LLMResult(text, provider, provider, self.delays[provider])
+        except asyncio.CancelledError:
+            self.cancelled.append(provider)
+            raise
+
+@pytest.mark.asyncio
+async def test_fallback_after_primary_error():
+    gateway = FakeGateway({HOSTED: 0.01, LOCAL: 0.01}, failing=(HOSTED,))
+    router = LLMRouter(gateway, FALLBACK)
+
+    result = await router.complete(MESSAGES)
+
+    assert result.provider == LOCAL
+    assert router.histograms[HOSTED].failures == 1
+    assert router.histograms[LOCAL].count == 1
+
+@pytest.mark.asyncio
+async def test_fallback_after_primary_misses_deadline():
+    gateway = FakeGateway({HOSTED: 5, LOCAL: 0.01})
+    router = LLMRouter(gateway, FALLBACK, deadline=0.1)
+
+    result = await router.complete(MESSAGES)
+
+    assert result.provider == LOCAL
+    assert gateway.cancelled == [HOSTED]
+
+@pytest.mark.asyncio
+async def test_streaming_primary_is_kept_past_deadline():
+    gateway = FakeGateway({HOSTED: 0.01, LOCAL: 0.01})
+    router = LLMRouter(gateway, FALLBACK, deadline=0.03)
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+
+    result = await router.complete(MESSAGES, on_delta=on_delta)
+
+    assert result.provider == HOSTED
+    assert deltas == ["hosted", "answer"]
+    assert gateway.started == [HOSTED]
+
+@pytest.mark.asyncio
+async def test_hedge_returns_faster_provider_and_cancels_slower():
+    gateway = FakeGateway({HOSTED: 5, LOCAL: 0.05})
+    router = LLMRouter(gateway, HEDGE)
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+
+    result = await router.complete(MESSAGES, on_delta=on_delta)
+
+    assert result.provider == LOCAL
+    assert deltas == ["local", "answer"]
+    assert gateway.cancelled == [HOSTED]
+
+@pytest.mark.asyncio
+async def test_unavailable_provider_is_dropped():
+    gateway = FakeGateway({LOCAL: 0.01})
+    router = LLMRouter(gateway, HEDGE)
+
+    result = await router.complete(MESSAGES)
+
+    assert router.providers == [LOCAL]
+    assert result.provider == LOCAL
+    snapshot = router.latency_snapshot()
+    assert snapshot[LOCAL]["count"] == 1
+    assert snapshot[LOCAL]["buckets"]["+Inf"] == 1
+
+@pytest.mark.asyncio
+async def test_preferring_switches_primary_to_cheaper_provider():
+    gateway = FakeGateway({HOSTED: 0.01, LOCAL: 0.01})
+    router = LLMRouter(gateway, FALLBACK)
+
+    preferred = router.preferring(LOCAL)
+    result = await preferred.complete(MESSAGES)
+
+    assert preferred.providers == [LOCAL, HOSTED]
+    assert result.provider == LOCAL
+    assert router.providers == [HOSTED, LOCAL]  # Other meetings keep the configured order
+    assert router.latency_snapshot()[LOCAL]["count"] == 1
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from app.mb.llm_scheduler import LLMScheduler, LLMJobCancelled, TokenBucket, FINAL, INTERIM
+
+def job(name, log, delay=0.05):
+    async def run():
+        log.append(f"start {name}")
+        await asyncio.sleep(delay)
+        return name
+    return run
+
+@pytest.fixture
+async def scheduler():
+    scheduler = LLMScheduler(concurrency=1)
+    yield scheduler
+    await scheduler.close()
+
+@pytest.mark.asyncio
+async def test_final_runs_before_queued_interim(scheduler):
+    log = []
+    first = asyncio.create_task(scheduler.submit(job("busy", log), INTERIM))
+    await asyncio.sleep(0.01)
+    interim = asyncio.create_task(scheduler.submit(job("interim", log), INTERIM))
+    final = asyncio.create_task(scheduler.submit(job("final", log), FINAL))
+
+    await asyncio.gather(first, interim, final)
+
+    assert log == ["start busy", "start final", "start interim"]
+
+@pytest.mark.asyncio
+async def test_queued_interim_jobs_are_coalesced(scheduler):
+    log = []
+    busy = asyncio.create_task(scheduler.submit(job("busy", log), INTERIM))
+    await asyncio.sleep(0.01)
+    stale = asyncio.create_task(scheduler.submit(job("stale", log), INTERIM, key="interim"))
+    await asyncio.sleep(0)
+    fresh = asyncio.create_task(scheduler.submit(job("fresh", log), INTERIM, key="interim"))
+
+    results = await asyncio.gather(busy, stale, fresh)
+
+    assert results == ["busy", "fresh", "fresh"]
+    assert "start stale" not in log
+    assert scheduler.stats["coalesced"] == 1
+
+@pytest.mark.asyncio
+async def test_cancel_stops_running_and_queued_interim_jobs(scheduler):
+    log = []
+    running = asyncio.create_task(scheduler.submit(job("running", log, delay=5), INTERIM))
+    await asyncio.sleep(0.01)
+    queued = asyncio.create_task(scheduler.submit(job("queued", log), INTERIM, key="interim"))
+    await asyncio.sleep(0)
+
+    assert scheduler.cancel(priority=INTERIM) == 2
+    final = await scheduler.submit(job("final", log), FINAL)
+
+    assert final == "final"
+    for task in (running, queued):
+        with pytest.raises(LLMJobCancelled):
+            await task
+    assert log == ["start running", "start final"]
+
+@pytest.mark.asyncio
+async def test_job_errors_reach_the_caller(scheduler):
+    async def failing():
+        raise ValueError("model unavailable")
+
+    with pytest.raises(ValueError):
+        await scheduler.submit(failing, FINAL)
+    assert scheduler.stats["failed"] == 1
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=2)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    for _ in range(4):
+        await bucket.acquire()
+
+    # Two tokens are available immediately, the next two refill at 20 per second
+    assert loop.time() - start >= 0.09
+    assert TokenBucket.per_minute(0) is None
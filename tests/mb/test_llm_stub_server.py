@@ -0,0 +1,64 @@
+import pytest
+from app.mb.llm_gateway import LLMGatewayError, LOCAL, HOSTED
+from app.mb.llm_stub_server import run_benchmark
+
+MESSAGES = [{"role": "system", "content": "summarize"}, {"role": "user", "content": "we shipped it"}]
+
+@pytest.mark.asyncio
+async def test_hosted_completion_is_deterministic(start_stub, gateway_for):
+    server = await start_stub(latency=0.01, response_tokens=12)
+    gateway = gateway_for(server, server)
+    try:
+        first = await gateway.complete(HOSTED, MESSAGES)
+        second = await gateway.complete(HOSTED, MESSAGES)
+    finally:
+        await gateway.close()
+        await server.stop()
+
+    assert first.text == second.text
+    assert len(first.text.split()) == 12
+    assert first.completion_tokens == 12
+    assert server.stats["requests"] == 2
+
+@pytest.mark.asyncio
+async def test_streaming_through_local_provider(start_stub, gateway_for):
+    server = await start_stub(latency=0.01, response_tokens=8, tokens_per_second=200)
+    gateway = gateway_for(server, server)
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+
+    try:
+        result = await gateway.complete(LOCAL, MESSAGES, on_delta=on_delta)
+    finally:
+        await gateway.close()
+        await server.stop()
+
+    assert len(deltas) == 8
+    assert "".join(deltas) == result.text
+
+@pytest.mark.asyncio
+async def test_injected_errors_surface_as_gateway_errors(start_stub, gateway_for):
+    server = await start_stub(latency=0.01, error_rate=1.0, error_status=503)
+    gateway = gateway_for(server, server, llm_max_retries=1)
+    try:
+        with pytest.raises(LLMGatewayError):
+            await gateway.complete(HOSTED, MESSAGES)
+    finally:
+        await gateway.close()
+        await server.stop()
+
+    assert server.stats["errors"] == 2
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_latency_percentiles(start_stub):
+    server = await start_stub(latency=0.02, response_tokens=4)
+    try:
+        report = await run_benchmark(server, requests=8, concurrency=4, stream=True)
+    finally:
+        await server.stop()
+
+    assert report["failures"] == 0
+    assert report["total"]["p50"] >= 0.02
+    assert server.stats["max_in_flight"] <= 4
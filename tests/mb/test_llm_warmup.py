@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app.mb.llm_gateway import LOCAL, HOSTED
+from app.mb.llm_warmup import LLMWarmer, READY, FAILED
+
+@pytest.mark.asyncio
+async def test_warm_up_reports_ready_and_failed_providers(start_stub, gateway_for):
+    local = await start_stub(latency=0.05)
+    hosted = await start_stub(latency=0.01, error_rate=1.0)
+    gateway = gateway_for(local, hosted, llm_max_retries=0)
+    statuses = []
+
+    async def on_status(status):
+        statuses.append(status)
+
+    warmer = LLMWarmer(gateway, [LOCAL, HOSTED], on_status=on_status)
+    try:
+        await warmer.warm_up()
+    finally:
+        await gateway.close()
+        await local.stop()
+        await hosted.stop()
+
+    assert warmer.status[LOCAL]["state"] == READY
+    assert warmer.status[LOCAL]["latency"] >= 0.05
+    assert warmer.status[HOSTED]["state"] == FAILED
+    assert not warmer.ready
+    assert statuses[-1]["providers"][LOCAL]["state"] == READY
+
+@pytest.mark.asyncio
+async def test_unconfigured_providers_are_skipped(start_stub, gateway_for):
+    local = await start_stub(latency=0.01)
+    gateway = gateway_for(local, llm_max_retries=0)
+    warmer = LLMWarmer(gateway, [LOCAL, HOSTED])
+    try:
+        await warmer.warm_up()
+    finally:
+        await gateway.close()
+        await local.stop()
+
+    assert warmer.providers == [LOCAL]
+    assert warmer.ready
+
+@pytest.mark.asyncio
+async def test_keep_alive_pings_idle_provider(start_stub, gateway_for):
+    local = await start_stub(latency=0.01)
+    gateway = gateway_for(local, llm_max_retries=0)
+    warmer = LLMWarmer(gateway, [LOCAL], keep_alive_interval=0.1)
+    try:
+        warmer.start()
+        await asyncio.sleep(0.35)
+        await warmer.stop()
+    finally:
+        await gateway.close()
+        await local.stop()
+
+    # The warm-up request plus at least one keep-alive ping
+    assert local.stats["requests"] >= 2
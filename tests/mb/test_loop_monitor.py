@@ -0,0 +1,45 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.mb.loop_monitor import LoopMonitor, sample_stacks, write_collapsed
+from app.mb.metrics import REGISTRY
+
+def blocking_helper(seconds):
+    time.sleep(seconds)
+
+def lag_samples():
+    return REGISTRY.get_sample_value('meeting_buddy_event_loop_lag_seconds_count') or 0
+
+@pytest.mark.asyncio
+async def test_blocking_call_on_the_loop_is_recorded_with_its_stack():
+    monitor = LoopMonitor(threshold=0.05, interval=0.02)
+    before = lag_samples()
+    monitor.start()
+    await asyncio.sleep(0.1)
+    blocking_helper(0.4)
+    await asyncio.sleep(0.2)
+    await monitor.stop()
+
+    blocks = monitor.recent_blocks()
+    assert len(blocks) == 1
+    assert blocks[0]["seconds"] >= 0.2
+    assert "blocking_helper" in blocks[0]["stack"]
+    assert lag_samples() > before
+
+def test_sampled_stacks_are_written_collapsed(tmp_path):
+    done = threading.Event()
+    worker = threading.Thread(target=lambda: done.wait(5), name="worker")
+    worker.start()
+    try:
+        stacks = sample_stacks(0.05, interval=0.01, thread_ids=[worker.ident])
+    finally:
+        done.set()
+        worker.join()
+
+    assert stacks and all(stack.startswith("worker;") for stack in stacks)
+    path = write_collapsed(stacks, str(tmp_path / "profile.collapsed"))
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert ";" in stack and int(count) == sum(stacks.values())
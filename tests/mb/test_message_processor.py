@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 from queue import Queue
 from app.mb.message_processor import MessageProcessor
 
@@ -36,6 +36,20 @@ def test_process_summary_message(out_queue, in_queue):
 
         assert mock_session_state.interim_summary_text == 'Test summary'
 
+def test_reset_clears_the_replayed_meeting(out_queue, in_queue):
+    with patch('streamlit.session_state') as mock_session_state:
+        mock_session_state.transcription_text = "Old transcription\n"
+        mock_session_state.interim_summary_text = "Old summary"
+
+        processor = MessageProcessor(in_queue, out_queue)
+        out_queue.put(('reset', None))
+        out_queue.put(('transcription', 'Replayed transcription'))
+
+        processor.process_messages()
+
+        assert mock_session_state.transcription_text == 'Replayed transcription\n'
+        assert mock_session_state.interim_summary_text == ""
+
 def test_process_final_summary_message(out_queue, in_queue):
     with patch('streamlit.session_state') as mock_session_state:
         mock_session_state.final_summary_text = ""
@@ -48,3 +62,40 @@ def test_process_final_summary_message(out_queue, in_queue):
         assert mock_session_state.final_summary_text == 'Final test summary'
         # Verify download_files command was queued
         assert in_queue.get() == ('download_files', None)
+
+def test_process_summary_delta_messages(out_queue, in_queue):
+    with patch('streamlit.session_state') as mock_session_state:
+        mock_session_state.interim_summary_text = "previous summary"
+
+        processor = MessageProcessor(in_queue, out_queue)
+        out_queue.put(('summary_delta', {'text': 'Hello', 'first': True}))
+        out_queue.put(('summary_delta', {'text': ' world', 'first': False}))
+
+        processor.process_messages()
+
+        assert mock_session_state.interim_summary_text == 'Hello world'
+
+def test_process_final_summary_delta_messages(out_queue, in_queue):
+    with patch('streamlit.session_state') as mock_session_state:
+        mock_session_state.final_summary_text = ""
+
+        processor = MessageProcessor(in_queue, out_queue)
+        out_queue.put(('final_summary_delta', {'text': '# Notes', 'first': True}))
+        out_queue.put(('final_summary_delta', {'text': '\n* item', 'first': False}))
+
+        processor.process_messages()
+
+        assert mock_session_state.final_summary_text == '# Notes\n* item'
+        # Deltas alone do not trigger the download request
+        assert in_queue.empty()
+
+def test_process_llm_status_message(out_queue, in_queue):
+    with patch('streamlit.session_state') as mock_session_state:
+        status = {'ready': True, 'providers': {'local': {'state': 'ready'}}}
+
+        processor = MessageProcessor(in_queue, out_queue)
+        out_queue.put(('llm_status', status))
+
+        processor.process_messages()
+
+        assert mock_session_state.llm_status == status
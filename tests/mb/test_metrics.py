@@ -0,0 +1,31 @@
+import socket
+import urllib.request
+from app.mb.llm_gateway import LLMResult
+from app.mb.metrics import REGISTRY, record_llm_call, start_metrics_server
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_llm_calls_are_counted_per_provider():
+    before = sample('meeting_buddy_llm_tokens_total', provider='local', kind='prompt')
+    count = sample('meeting_buddy_llm_latency_seconds_count', provider='local')
+
+    record_llm_call(LLMResult("notes", "local", "mistral", 1.5, prompt_tokens=120, completion_tokens=30))
+
+    assert sample('meeting_buddy_llm_tokens_total', provider='local', kind='prompt') == before + 120
+    assert sample('meeting_buddy_llm_latency_seconds_count', provider='local') == count + 1
+
+def test_metrics_endpoint_serves_the_registry():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        port = s.getsockname()[1]
+    assert start_metrics_server(0) is None
+
+    server = start_metrics_server(port)
+    try:
+        body = urllib.request.urlopen(f"http://localhost:{port}/metrics", timeout=5).read().decode()
+    finally:
+        server.shutdown()
+
+    assert 'meeting_buddy_segment_latency_seconds_bucket' in body
+    assert 'meeting_buddy_connected_clients' in body
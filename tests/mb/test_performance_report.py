@@ -0,0 +1,54 @@
+import json
+import os
+from app.mb.performance_report import MeetingStats, build_report, peak_rss_bytes, write_report
+from app.mb.tracing import make_span
+
+def make_stats():
+    stats = MeetingStats()
+    for latency in (2.0, 3.0, 10.0):
+        stats.record_capture(10.0, 0)
+        stats.record_transcription(10.0, 2.5)
+        stats.record_latency(latency)
+    stats.record_capture(10.0, 160)  # The last segment was never transcribed
+    stats.stop()
+    return stats
+
+def test_report_compares_captured_and_transcribed_audio():
+    stats = make_stats()
+    usage = {"total": {"calls": 2, "prompt_tokens": 100, "completion_tokens": 20, "cached_tokens": 0,
+                       "latency_total": 3.0, "latency_max": 2.0},
+             "by_purpose": {"final": {"calls": 1, "prompt_tokens": 80, "completion_tokens": 15, "cached_tokens": 0,
+                                      "latency_total": 2.0, "latency_max": 2.0}}}
+    spans = [make_span("t", "transcribe.inference", 0, 2_000_000_000)]
+    blocks = [{"started": stats.started_at - 60, "seconds": 5.0, "stack": "old"},
+              {"started": stats.started_at + 1, "seconds": 0.3, "stack": "a;b"}]
+
+    report = build_report(stats, usage, spans, blocks, stop_latency=12.34, name="Standup")
+
+    assert report["meeting"] == {"name": "Standup"}
+    assert report["audio"]["captured_seconds"] == 40.0
+    assert report["audio"]["transcribed_seconds"] == 30.0
+    assert report["audio"]["transcribed_ratio"] == 0.75
+    assert report["audio"]["dropped_frames"] == 160
+    assert report["segment_latency_seconds"]["p50"] == 3.0
+    assert report["segment_latency_seconds"]["max"] == 10.0
+    assert report["real_time_factor"]["mean"] == 0.25
+    assert report["stages"]["transcribe.inference"]["mean"] == 2.0
+    assert report["llm"]["calls"] == 2
+    assert report["stop_to_final_notes_seconds"] == 12.3
+    assert report["event_loop_blocks"]["count"] == 1
+
+def test_empty_meeting_still_gets_a_report(tmp_path):
+    report = build_report(MeetingStats(), name="Empty")
+
+    path = write_report(report, str(tmp_path))
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["audio"]["transcribed_ratio"] is None
+    with open(os.path.join(str(tmp_path), "performance.md"), encoding="utf-8") as f:
+        assert f.read().startswith("# Performance: Empty")
+
+def test_peak_rss_is_reported_in_bytes():
+    peak = peak_rss_bytes()
+    if peak is not None:
+        assert peak > 1024 * 1024
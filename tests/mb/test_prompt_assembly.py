@@ -0,0 +1,35 @@
+import pytest
+from app.mb.config import Config
+from app.mb.llm_gateway import LLMResult, HOSTED
+from app.mb.prompt_assembly import PromptAssembler, SYSTEM_PROMPT
+from app.mb.prompt_manager import PromptManager
+
+@pytest.fixture
+def assembler(tmp_path):
+    (tmp_path / "context.txt").write_text("Weekly billing sync")
+    config = Config(context_directory=str(tmp_path), user_meeting_context_file="context.txt")
+    return PromptAssembler(PromptManager(config))
+
+def test_prefix_is_stable_across_prompts_and_transcript_growth(assembler):
+    minute = assembler.build("minute prompt", "Ana: hello")
+    ten_minute = assembler.build("ten minute prompt", "Ana: hello\nBo: hi", related_context="[agenda.md]\nbilling")
+
+    assert minute[0] == ten_minute[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    # The earlier request is a byte-identical prefix of the later one
+    assert ten_minute[1]["content"].startswith(minute[1]["content"])
+    assert minute[-1]["content"] == "minute prompt"
+    assert ten_minute[-1]["content"] == "Related context:\n[agenda.md]\nbilling\n\nten minute prompt"
+
+def test_meeting_context_can_be_left_out(assembler):
+    messages = assembler.build("summarize", "chunk text", include_meeting_context=False)
+
+    assert messages[1]["content"] == "Transcription:\nchunk text"
+
+def test_record_accumulates_cached_tokens(assembler):
+    assembler.record(LLMResult("a", HOSTED, "gpt", 0.1, prompt_tokens=2000, cached_tokens=0))
+    assembler.record(LLMResult("b", HOSTED, "gpt", 0.1, prompt_tokens=2000, cached_tokens=1536))
+
+    stats = assembler.cache_stats()[HOSTED]
+    assert stats["calls"] == 2
+    assert stats["cached_tokens"] == 1536
+    assert stats["cached_ratio"] == pytest.approx(0.384)
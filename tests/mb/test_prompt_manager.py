@@ -0,0 +1,61 @@
+import os
+import pytest
+from app.mb.config import Config
+from app.mb.prompt_manager import PromptManager
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def manager(tmp_path):
+    clock = FakeClock()
+    config = Config(context_directory=str(tmp_path), user_meeting_context_file="context.txt")
+    manager = PromptManager(config, reload_interval=2, clock=clock)
+    manager.prompt_directory = str(tmp_path / "prompts")
+    os.makedirs(manager.prompt_directory)
+    (tmp_path / "prompts" / "create_minute.md").write_text("minute prompt")
+    manager.load_prompts()
+    return manager, clock, tmp_path
+
+def test_prompts_reload_after_edit(manager):
+    manager, clock, tmp_path = manager
+    assert manager.get_prompt("create_minute") == "minute prompt"
+
+    prompt_file = tmp_path / "prompts" / "create_minute.md"
+    prompt_file.write_text("edited minute prompt")
+    os.utime(prompt_file, (1, 1))
+    (tmp_path / "prompts" / "create_ten_minute.md").write_text("ten minute prompt")
+
+    # Not re-checked until the reload interval has passed
+    assert manager.get_prompt("create_minute") == "minute prompt"
+    clock.now = 2
+    assert manager.get_prompt("create_minute") == "edited minute prompt"
+    assert manager.get_available_prompts() == ["create_minute", "create_ten_minute"]
+
+def test_meeting_context_is_cached_until_changed(manager):
+    manager, clock, tmp_path = manager
+    assert manager.load_meeting_context() == ""
+
+    context_file = tmp_path / "context.txt"
+    context_file.write_text("Attendees: Ana, Bo")
+    assert manager.load_meeting_context() == ""
+    clock.now = 2
+    assert manager.load_meeting_context() == "Attendees: Ana, Bo"
+
+    os.remove(context_file)
+    clock.now = 4
+    assert manager.load_meeting_context() == ""
+
+def test_meeting_context_is_read_from_the_session_directory(manager):
+    manager, clock, tmp_path = manager
+    room = tmp_path / "room"
+    room.mkdir()
+    (tmp_path / "context.txt").write_text("Default room")
+    (room / "context.txt").write_text("Other room")
+
+    assert manager.load_meeting_context() == "Default room"
+    assert manager.load_meeting_context(str(room)) == "Other room"
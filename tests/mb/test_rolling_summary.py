@@ -0,0 +1,147 @@
+import pytest
+from unittest.mock import MagicMock
+from app.mb.llm_scheduler import LLMScheduler, INTERIM, ROLLING
+from app.mb.rolling_summary import RollingSummarizer
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def prompt_manager():
+    manager = MagicMock()
+    manager.get_prompt.side_effect = lambda key: f"{key} prompt"
+    return manager
+
+@pytest.fixture
+def calls():
+    return []
+
+@pytest.fixture
+def summarizer(prompt_manager, calls):
+    async def summarize(content, prompt=None):
+        calls.append((prompt, content))
+        return f"summary of {len(content)} chars"
+    return RollingSummarizer(summarize, prompt_manager, window_seconds=60, windows_per_fold=2, clock=FakeClock())
+
+@pytest.mark.asyncio
+async def test_segments_stay_raw_until_window_closes(summarizer, calls):
+    summarizer.add_segment("hello there")
+    summarizer.add_segment("general kenobi")
+
+    assert summarizer.has_content()
+    assert calls == []
+    assert summarizer.compact_text() == "Raw transcript:\nhello there\ngeneral kenobi"
+
+@pytest.mark.asyncio
+async def test_minute_windows_fold_into_ten_minute_summary(summarizer, calls):
+    for minute in range(4):
+        summarizer.add_segment(f"segment {minute}a")
+        summarizer.clock.now += 61
+        summarizer.add_segment(f"segment {minute}b")
+        await summarizer.roll()
+
+    prompts = [prompt for prompt, _ in calls]
+    assert prompts.count("create_minute prompt") == 4
+    assert prompts.count("create_ten_minute prompt") == 2
+    assert len(summarizer.ten_minute_summaries) == 2
+    assert summarizer.minute_summaries == []
+    # Only the window that is still open remains as raw text
+    assert "Raw transcript" not in summarizer.compact_text()
+    assert summarizer.has_content()
+
+@pytest.mark.asyncio
+async def test_interim_summary_uses_compact_layers(summarizer, calls):
+    summarizer.add_segment("a" * 500)
+    summarizer.clock.now += 61
+    summarizer.add_segment("b")
+    await summarizer.roll()
+    summarizer.add_segment("c")
+
+    await summarizer.interim_summary()
+
+    prompt, content = calls[-1]
+    assert prompt is None
+    assert "a" * 500 not in content
+    assert content.startswith("1-minute summaries:")
+    assert content.endswith("Raw transcript:\nc")
+
+@pytest.mark.asyncio
+async def test_compact_text_keeps_layers_ahead_of_the_raw_tail(summarizer):
+    summarizer.windows_per_fold = 10
+    summarizer.add_segment("first")
+    summarizer.clock.now += 61
+    summarizer.add_segment("first end")
+    await summarizer.roll()
+    summarizer.add_segment("second")
+    before = summarizer.compact_text()
+    summarizer.clock.now += 61
+    summarizer.add_segment("second end")
+    await summarizer.roll()
+
+    # Shared up to the newest layer; the raw tail is replaced by its summary
+    layers = before.split("\n\nRaw transcript:")[0]
+    after = summarizer.compact_text()
+    assert after.startswith(layers)
+    assert not after.startswith(before)
+
+@pytest.mark.asyncio
+async def test_failed_layer_keeps_raw_text(prompt_manager):
+    async def failing(content, prompt=None):
+        return "Error generating summary: boom"
+
+    summarizer = RollingSummarizer(failing, prompt_manager, window_seconds=60, clock=FakeClock())
+    summarizer.add_segment("keep me")
+    summarizer.clock.now += 61
+    summarizer.add_segment("and me")
+    await summarizer.roll()
+
+    assert summarizer.minute_summaries == ["keep me\nand me"]
+
+@pytest.mark.asyncio
+async def test_finalize_only_summarizes_last_window(summarizer, calls):
+    summarizer.windows_per_fold = 10
+    summarizer.add_segment("first minute")
+    summarizer.clock.now += 61
+    summarizer.add_segment("still first minute")
+    await summarizer.roll()
+    calls.clear()
+
+    summarizer.add_segment("last words")
+    compact = await summarizer.finalize()
+
+    assert calls == [("create_minute prompt", "last words")]
+    assert summarizer.pending == []
+    assert "Raw transcript" not in compact
+    assert compact.count("summary of") == 2
+
+@pytest.mark.asyncio
+async def test_layers_are_scheduled_and_interim_summaries_are_not(prompt_manager, calls):
+    scheduler = LLMScheduler(concurrency=1)
+    priorities = []
+
+    async def summarize(content, prompt=None):
+        calls.append((prompt, content))
+        return "interim"
+
+    async def summarize_layers(content, prompt=None):
+        priorities.append(ROLLING)
+        return await scheduler.submit(lambda: summarize(content, prompt), priority=ROLLING, key="s:rolling:1")
+
+    summarizer = RollingSummarizer(summarize, prompt_manager, window_seconds=60, clock=FakeClock(),
+                                   summarize_layers=summarize_layers)
+    summarizer.add_segment("first minute")
+    summarizer.clock.now += 61
+    summarizer.add_segment("next")
+    await summarizer.roll()
+    # An interim job must not queue behind itself on a single-slot scheduler
+    assert await scheduler.submit(summarizer.interim_summary, priority=INTERIM) == "interim"
+
+    assert priorities == [ROLLING]
+    assert calls[0][0] == "create_minute prompt"
+    assert calls[1][0] is None
+    assert scheduler.stats["completed"] == 2
+    await scheduler.close()
@@ -143,10 +143,11 @@ async def test_handler_summarize_command(service):
     
     try:
         async with websockets.connect(ws_url) as ws:
-            # Send summarize command with timeout
+            # The service owns the transcript; the client only names the range
+            service.sessions.get(None).transcript.append(test_text)
             command = json.dumps({
                 'action': 'summarize',
-                'text': test_text
+                'since_seq': 0
             })
             print(f"Sending command: {command}")
             await asyncio.wait_for(ws.send(command), timeout=5)
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, AsyncMock
 from app.mb.service import Service
 from app.mb.prompt_manager import PromptManager
+from app.mb.llm_gateway import LLMResult
 
 @pytest.fixture
 def service():
@@ -16,11 +17,17 @@ async def test_prompt_selection_based_on_time():
     """Test that the correct prompt is selected based on elapsed time"""
     service = Service()
     
-    # Mock the prompts
-    service.prompts = {
+    # Mock the prompts; summarize_text reads templates through the prompt manager
+    prompts = {
         'create_minute': 'minute prompt',
         'create_ten_minute': 'ten minute prompt'
     }
+    service.prompt_manager.get_prompt = Mock(side_effect=prompts.get)
+    # Always miss the response cache so the model is called
+    service.llm_cache.get = Mock(return_value=None)
+    service.llm_cache.set = Mock()
+    # No related context, so the prompt is the whole last message
+    service.context_index.related_context = Mock(return_value="")
     
     # Mock datetime.now() to return our fixed test time
     fixed_time = datetime(2024, 12, 30, 21, 5, 48)  # Using provided time
@@ -31,19 +38,16 @@ async def test_prompt_selection_based_on_time():
         # Set the started_at time 5 minutes before our fixed time
         service.started_at = fixed_time
         
-        # Mock completion to avoid actual LLM calls
-        with patch('app.mb.service.completion') as mock_completion:
-            mock_response = Mock()
-            mock_response.choices = [Mock()]
-            mock_response.choices[0].message.content = "Test summary"
-            mock_completion.return_value = mock_response
+        # Mock the LLM gateway to avoid actual LLM calls
+        with patch.object(service.llm, 'complete', new_callable=AsyncMock) as mock_completion:
+            mock_completion.return_value = LLMResult("Test summary", "local", "test-model", 0.1)
             
             # Mock prompt_manager.load_meeting_context
             with patch.object(PromptManager, 'load_meeting_context', return_value=""):
                 await service.summarize_text("test content")
                 
                 # Verify the minute prompt was used
-                assert mock_completion.call_args[1]['messages'][0]['content'] == 'minute prompt'
+                assert mock_completion.call_args[0][1][-1]['content'] == 'minute prompt'
 
     # Test case 2: More than 10 minutes elapsed
     with patch('app.mb.service.datetime') as mock_datetime:
@@ -51,16 +55,13 @@ async def test_prompt_selection_based_on_time():
         # Set the started_at time 15 minutes before our fixed time
         service.started_at = fixed_time
         
-        # Mock completion to avoid actual LLM calls
-        with patch('app.mb.service.completion') as mock_completion:
-            mock_response = Mock()
-            mock_response.choices = [Mock()]
-            mock_response.choices[0].message.content = "Test summary"
-            mock_completion.return_value = mock_response
+        # Mock the LLM gateway to avoid actual LLM calls
+        with patch.object(service.llm, 'complete', new_callable=AsyncMock) as mock_completion:
+            mock_completion.return_value = LLMResult("Test summary", "local", "test-model", 0.1)
             
             # Mock prompt_manager.load_meeting_context
             with patch.object(PromptManager, 'load_meeting_context', return_value=""):
                 await service.summarize_text("test content")
                 
                 # Verify the ten minute prompt was used
-                assert mock_completion.call_args[1]['messages'][0]['content'] == 'ten minute prompt'
+                assert mock_completion.call_args[0][1][-1]['content'] == 'ten minute prompt'
@@ -0,0 +1,56 @@
+import pytest
+from app import WATCH_DIRECTORY
+from app.mb.session import DEFAULT_SESSION, SessionLimitError, SessionManager
+from app.mb.usage_ledger import UsageLedger
+
+def test_sessions_get_isolated_directories(tmp_path):
+    manager = SessionManager(max_sessions=2, root=str(tmp_path))
+
+    default = manager.get(None)
+    room = manager.get("room a/../b")
+
+    assert default.session_id == DEFAULT_SESSION
+    assert default.watch_directory == WATCH_DIRECTORY
+    assert room.session_id == "room_a____b"
+    assert room.watch_directory == str(tmp_path / "room_a____b" / "data")
+    assert room.output_directory != default.output_directory
+    assert manager.get("room a/../b") is room
+    assert room.archive_name("standup") == "room_a____b_standup"
+    assert room.job_key("interim") == "room_a____b:interim"
+
+def test_max_sessions_limits_recording_sessions(tmp_path):
+    manager = SessionManager(max_sessions=1, root=str(tmp_path))
+    first = manager.get("first")
+    second = manager.get("second")
+
+    manager.check_capacity(first)
+    first.mark_started()
+
+    manager.check_capacity(first)  # Joining the running meeting is always allowed
+    with pytest.raises(SessionLimitError):
+        manager.check_capacity(second)
+    first.mark_stopped()
+    manager.check_capacity(second)
+
+def test_usage_and_discard(tmp_path):
+    manager = SessionManager(root=str(tmp_path))
+    session = manager.get("room")
+    session.clients.add("client")
+    session.mark_started()
+    session.transcript.append("hello everyone")
+    session.usage_ledger = UsageLedger()
+
+    usage = manager.usage()["sessions"][0]
+
+    assert usage["session"] == "room"
+    assert usage["recording"] is True
+    assert usage["segments"] == 1
+    assert usage["words"] == 2
+    assert usage["llm_tokens"] == 0
+
+    session.mark_stopped()
+    manager.discard(session)
+    assert "room" in manager.sessions  # Still followed by a client
+    session.clients.clear()
+    manager.discard(session)
+    assert manager.sessions == {}
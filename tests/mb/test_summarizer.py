@@ -52,3 +52,33 @@ def test_run_summarizer_via_openai(test_config):
 
     assert exists, "The summarizer use OpenAI to create and then write a summary file and return its path."
     print(result)
+
+def test_generate_notes_streams_deltas_into_notes_file(tmp_path):
+    """Streamed deltas reach the caller and the notes file while the response is generated."""
+    import asyncio
+    from app.mb.config import Config
+    from app.mb.llm_gateway import LLMResult, LOCAL
+    from app.mb.summarizer import MeetingNotesGenerator
+
+    async def streaming_complete(messages, on_delta=None):
+        for delta in ["# Notes", "\n• decided", " things"]:
+            await on_delta(delta)
+            # The notes file already holds everything streamed so far
+            assert notes_path.read_text().endswith(delta.replace('•', '*'))
+        return LLMResult("# Notes\n• decided things", LOCAL, "stub", 0.1)
+
+    notes_path = tmp_path / 'notes.md'
+    config = Config(openai_api_key="", stream_summaries=True)
+    generator = MeetingNotesGenerator(config)
+    generator.router.complete = streaming_complete
+    generator.meeting_notes_path = str(notes_path)
+    received = []
+
+    async def on_delta(delta):
+        received.append(delta)
+
+    result = asyncio.run(generator.generate_notes("we decided things", on_delta))
+
+    assert received == ["# Notes", "\n• decided", " things"]
+    assert result == "# Notes\n* decided things"
+    assert notes_path.read_text() == "# Notes\n* decided things"
@@ -0,0 +1,79 @@
+from app.mb.summary_trigger import SummaryTrigger
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_trigger(clock):
+    return SummaryTrigger(min_new_words=10, min_interval=5, max_interval=60, idle_seconds=30, clock=clock)
+
+def test_dense_speech_triggers_after_min_interval():
+    clock = FakeClock()
+    trigger = make_trigger(clock)
+    clock.now = 2
+    trigger.add("one two three four five six seven eight nine ten eleven")
+
+    assert not trigger.should_summarize()
+    clock.now = 5
+    assert trigger.should_summarize()
+
+def test_silence_never_triggers():
+    clock = FakeClock()
+    trigger = make_trigger(clock)
+    trigger.add("")
+    trigger.add("   ")
+    clock.now = 600
+
+    assert not trigger.should_summarize()
+
+def test_few_words_wait_for_max_interval():
+    clock = FakeClock()
+    trigger = make_trigger(clock)
+    clock.now = 40
+    trigger.add("okay")
+
+    assert not trigger.should_summarize()
+    clock.now = 60
+    assert trigger.should_summarize()
+
+def test_idle_meeting_does_not_trigger_for_stray_words():
+    clock = FakeClock()
+    trigger = make_trigger(clock)
+    clock.now = 10
+    trigger.add("okay")
+    clock.now = 60
+
+    assert not trigger.should_summarize()
+
+def test_mark_summarized_resets_new_content():
+    clock = FakeClock()
+    trigger = make_trigger(clock)
+    trigger.add(" ".join(["word"] * 20))
+    clock.now = 10
+    assert trigger.should_summarize()
+
+    trigger.mark_summarized()
+
+    assert trigger.new_words == 0
+    assert trigger.summaries == 1
+    clock.now = 12
+    trigger.add(" ".join(["word"] * 20))
+    assert not trigger.should_summarize()
+
+def test_slow_down_and_pause():
+    clock = FakeClock()
+    trigger = make_trigger(clock)
+    trigger.slow_down(3)
+    trigger.add(" ".join(["word"] * 20))
+    clock.now = 10
+
+    assert not trigger.should_summarize()
+    clock.now = 15
+    trigger.add(" ".join(["word"] * 10))
+    assert trigger.should_summarize()
+
+    trigger.pause()
+    assert not trigger.should_summarize()
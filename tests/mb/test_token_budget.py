@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from app.mb.config import Config
+from app.mb.summarizer import MeetingNotesGenerator
+from app.mb.token_budget import TokenBudget
+
+@pytest.fixture
+def budget():
+    return TokenBudget(context_tokens=1000, max_output_tokens=200, safety_margin=0)
+
+def test_input_budget_accounts_for_fixed_parts(budget):
+    prompt = "word " * 50
+    assert budget.input_budget() == 800
+    assert budget.input_budget(prompt) == 800 - budget.count(prompt)
+    assert budget.fits("short text", prompt)
+    assert not budget.fits("word " * 2000, prompt)
+
+def test_split_produces_overlapping_chunks(budget):
+    text = " ".join(f"w{i}" for i in range(600))
+    chunks = budget.split(text, chunk_tokens=200, overlap_tokens=50)
+
+    assert len(chunks) > 1
+    assert all(budget.count(chunk) <= 200 for chunk in chunks)
+    # The tail of each chunk is repeated at the head of the next one
+    for previous, following in zip(chunks, chunks[1:]):
+        assert previous.split()[-1] in following
+
+def test_split_without_tokenizer_uses_character_estimate(budget):
+    budget.encoding = None
+    chunks = budget.split("x" * 1000, chunk_tokens=100, overlap_tokens=10)
+
+    assert budget.count("x" * 1000) == 250
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) >= 1000
+
+def test_group_respects_budget(budget):
+    parts = ["alpha " * 30, "beta " * 30, "gamma " * 30]
+    limit = budget.count(parts[0]) + budget.count("\n\n") + budget.count(parts[1])
+    groups = budget.group(parts, budget_tokens=limit)
+
+    assert len(groups) == 2
+    assert all(budget.count(group) <= limit for group in groups)
+
+class FakeLLM:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    async def send(self, prompt, content, on_delta=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.calls.append((prompt, content))
+        return f"summary {len(self.calls)}"
+
+@pytest.mark.asyncio
+async def test_generator_map_reduces_oversized_transcription():
+    config = Config(openai_api_key="", local_llm_context_tokens=6000, llm_max_output_tokens=200,
+                    chunk_overlap_tokens=20, summary_parallelism=2)
+    llm = FakeLLM()
+    generator = MeetingNotesGenerator(config)
+    generator.send_to_llm = llm.send
+    prompt = generator.prompt_manager.get_prompt("meeting_prompt")
+    transcription = "\n".join(f"Speaker {i % 3}: we discussed item number {i}" for i in range(3000))
+
+    fitted = await generator.fit_transcription(prompt, "", transcription)
+
+    assert fitted.startswith("Segment summaries:")
+    assert len(llm.calls) > 2
+    assert llm.max_in_flight == 2
+    assert TokenBudget.for_model(config, hosted=False).fits(fitted, prompt)
+
+@pytest.mark.asyncio
+async def test_generator_keeps_transcription_that_fits():
+    config = Config(openai_api_key="")
+    llm = FakeLLM()
+    generator = MeetingNotesGenerator(config)
+    generator.send_to_llm = llm.send
+
+    fitted = await generator.fit_transcription("prompt", "context", "a short meeting")
+
+    assert fitted == "a short meeting"
+    assert llm.calls == []
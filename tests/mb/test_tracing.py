@@ -0,0 +1,50 @@
+import pytest
+from app.mb.tracing import Tracer, breakdown, current_trace, read_spans, with_trace
+
+def test_segment_trace_is_written_as_otlp_spans(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.jsonl"))
+    trace = tracer.start_segment("recording_1.wav", file="recording_1.wav")
+    trace.span("record.capture", trace.started_ns, chunks=645)
+
+    assert tracer.take("recording_1.wav") is trace
+    assert tracer.take("recording_1.wav") is None
+    trace.end(transcribed=True)
+    trace.end()  # Only once
+
+    spans = read_spans(tracer.path)
+    assert [s["name"] for s in spans] == ["record.capture", "segment"]
+    capture, segment = spans
+    assert capture["traceId"] == segment["traceId"] and len(segment["traceId"]) == 32
+    assert capture["parentSpanId"] == segment["spanId"]
+    assert "parentSpanId" not in segment
+    assert {"key": "chunks", "value": {"intValue": "645"}} in capture["attributes"]
+    assert {"key": "transcribed", "value": {"boolValue": True}} in segment["attributes"]
+    assert int(segment["endTimeUnixNano"]) >= int(segment["startTimeUnixNano"])
+
+def test_closed_tracer_drops_late_spans(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.jsonl"))
+    trace = tracer.start_segment("a")
+    tracer.close()
+    trace.end()
+
+    assert not (tmp_path / "trace.jsonl").exists()
+
+@pytest.mark.asyncio
+async def test_with_trace_sets_the_current_trace(tmp_path):
+    trace = Tracer(str(tmp_path / "trace.jsonl")).start_segment("a")
+
+    async def broadcast():
+        return current_trace.get()
+
+    assert await with_trace(trace, broadcast()) is trace
+    assert current_trace.get() is None
+
+def test_breakdown_per_span_name():
+    spans = [{"name": "transcribe.inference", "startTimeUnixNano": "0", "endTimeUnixNano": str(n * 10**9)}
+             for n in (1, 2, 3, 4)]
+
+    report = breakdown(spans)["transcribe.inference"]
+
+    assert report["count"] == 4
+    assert report["mean"] == 2.5
+    assert report["max"] == 4.0
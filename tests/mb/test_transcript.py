@@ -0,0 +1,20 @@
+from app.mb.transcript import SessionTranscript
+
+def test_segments_are_numbered_from_one():
+    transcript = SessionTranscript()
+
+    assert transcript.last_seq == 0
+    assert transcript.append("first") == 1
+    assert transcript.append("second") == 2
+    assert transcript.last_seq == 2
+    assert len(transcript) == 2
+
+def test_since_returns_segments_after_seq():
+    transcript = SessionTranscript()
+    for text in ("one", "two", "three"):
+        transcript.append(text)
+
+    assert transcript.since(0) == transcript.text() == "one\ntwo\nthree"
+    assert transcript.since(1) == "two\nthree"
+    assert transcript.since(3) == ""
+    assert transcript.since(10) == ""
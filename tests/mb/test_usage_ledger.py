@@ -0,0 +1,85 @@
+import json
+import pytest
+from app.mb.config import Config
+from app.mb.llm_gateway import LLMGateway, LLMResult, LOCAL, HOSTED
+from app.mb.llm_stub_server import LLMStubServer, StubSettings
+from app.mb.usage_ledger import UsageLedger, with_purpose, with_ledger, OK, NEAR, EXCEEDED, USAGE_FILE
+
+def result(provider=LOCAL, prompt_tokens=100, completion_tokens=20, latency=0.5):
+    return LLMResult("text", provider, "model", latency, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+@pytest.mark.asyncio
+async def test_records_are_tagged_with_outermost_purpose():
+    ledger = UsageLedger()
+
+    async def layer():
+        return await with_purpose("rolling", ledger.record(result()))
+
+    await with_purpose("interim", layer())
+    await layer()
+    await ledger.record(result())
+
+    assert [r.purpose for r in ledger.records] == ["interim", "rolling", "other"]
+
+@pytest.mark.asyncio
+async def test_budget_state_changes_are_reported():
+    states = []
+
+    async def on_budget(state):
+        states.append(state)
+
+    ledger = UsageLedger(budget_tokens=300, near_ratio=0.5, on_budget=on_budget)
+    await ledger.record(result(prompt_tokens=100, completion_tokens=20))
+    await ledger.record(result(prompt_tokens=100, completion_tokens=20))
+    await ledger.record(result(prompt_tokens=100, completion_tokens=20))
+
+    assert states == [NEAR, EXCEEDED]
+    assert UsageLedger().budget_state == OK
+
+@pytest.mark.asyncio
+async def test_write_aggregates_by_provider_and_purpose(tmp_path):
+    ledger = UsageLedger()
+    await with_purpose("interim", ledger.record(result(LOCAL, latency=1.0)))
+    await with_purpose("final", ledger.record(result(HOSTED, prompt_tokens=1000, latency=4.0)))
+
+    path = ledger.write(str(tmp_path))
+
+    data = json.loads(open(path).read())
+    assert path.endswith(USAGE_FILE)
+    assert data["summary"]["total"]["prompt_tokens"] == 1100
+    assert data["summary"]["by_provider"][HOSTED]["latency_max"] == 4.0
+    assert data["summary"]["by_purpose"]["interim"]["calls"] == 1
+    assert len(data["calls"]) == 2
+
+@pytest.mark.asyncio
+async def test_gateway_records_every_call():
+    server = await LLMStubServer(StubSettings(latency=0.01, response_tokens=5)).start()
+    config = Config(openai_api_key="", local_llm_model="openai/stub", local_llm_api_base=server.url,
+                    local_llm_api_key="stub")
+    gateway = LLMGateway(config)
+    ledger = UsageLedger()
+    try:
+        await with_ledger(ledger, with_purpose("interim", gateway.complete(LOCAL, [{"role": "user", "content": "hi"}])))
+    finally:
+        await gateway.close()
+        await server.stop()
+
+    record = ledger.records[0]
+    assert (record.purpose, record.provider, record.completion_tokens) == ("interim", LOCAL, 5)
+
+@pytest.mark.asyncio
+async def test_with_ledger_routes_calls_to_the_session_ledger():
+    server = await LLMStubServer(StubSettings(latency=0.01, response_tokens=5)).start()
+    config = Config(openai_api_key="", local_llm_model="openai/stub", local_llm_api_base=server.url,
+                    local_llm_api_key="stub")
+    gateway = LLMGateway(config)
+    session_ledger = UsageLedger()
+    try:
+        await with_ledger(session_ledger, gateway.complete(LOCAL, [{"role": "user", "content": "hi"}]))
+        await gateway.complete(LOCAL, [{"role": "user", "content": "hi"}])
+    finally:
+        await gateway.close()
+        await server.stop()
+
+    # Calls outside a session's context are not charged to it
+    assert len(session_ledger.records) == 1
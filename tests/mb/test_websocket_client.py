@@ -1,7 +1,10 @@
 import pytest
 import asyncio
+import json
+import websockets
 from unittest import mock
 from queue import Queue
+from app.mb.file_transfer import send_file
 from app.mb.websocket_client import websocket_client
 
 @pytest.fixture
@@ -60,3 +63,99 @@ async def test_websocket_client_start_command(in_message_queue, out_message_queu
         
         # Verify start command was sent
         mock_ws.send.assert_called_with('{"action": "start"}')
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, frame):
+        self.frames.append(frame)
+
+@pytest.mark.asyncio
+async def test_download_resumes_after_connection_drops_mid_transfer(in_message_queue, out_message_queue, tmp_path):
+    transcript = tmp_path / "meeting_transcription.txt"
+    transcript.write_bytes(b"".join(f"line {i} of the meeting\n".encode() for i in range(2000)))
+    notes = tmp_path / "meeting_notes.md"
+    notes.write_text("# Notes")
+    connections = []
+    download_requests = []
+
+    async def serve(websocket):
+        connections.append(websocket)
+        await websocket.recv()  # hello; the client keeps JSON without a reply
+        command = json.loads(await websocket.recv())
+        if command["action"] == "start":
+            await websocket.send(json.dumps({"type": "recording", "recording": True, "session": "default",
+                                             "event_log": "log"}))
+        else:
+            await websocket.send(json.dumps({"type": "resumed", "session": "default", "recording": False,
+                                             "reset": False, "replayed": 0, "event_log": "log"}))
+        async for frame in websocket:
+            command = json.loads(frame)
+            if command["action"] != "download_files":
+                continue
+            download_requests.append(command)
+            if len(connections) == 1:
+                # Send the manifest and three chunks, then drop the connection
+                sent = RecordingSocket()
+                await send_file(sent, str(transcript), "transcription", chunk_size=4096)
+                for frame in sent.frames[:4]:
+                    await websocket.send(frame)
+                await websocket.close()
+                return
+            await websocket.send(json.dumps({"type": "final_summary", "text": "notes"}))
+            for file_type, path in (("transcription", transcript), ("summary", notes)):
+                if file_type in command["file_types"]:
+                    await send_file(websocket, str(path), file_type, chunk_size=4096,
+                                    resume=command["resume"].get(file_type))
+
+    async with websockets.serve(serve, "localhost", 0) as server:
+        class Config:
+            websocket_port = server.sockets[0].getsockname()[1]
+            websocket_wire_format = "json"
+            reconnect_grace_seconds = 10
+
+        in_message_queue.put(("stop", "Standup"))
+        await asyncio.wait_for(websocket_client(in_message_queue, out_message_queue, Config()), timeout=10)
+
+    messages = [out_message_queue.get_nowait() for _ in range(out_message_queue.qsize())]
+    files = {payload["type"]: payload["data"] for kind, payload in messages if kind == "file_data"}
+    assert files["transcription"] == transcript.read_bytes()
+    assert files["summary"] == b"# Notes"
+    assert "error" not in [kind for kind, _ in messages]
+    assert len(connections) == 2
+    assert download_requests[1]["resume"]["transcription"]["offset"] == 3 * 4096
+
+@pytest.mark.asyncio
+async def test_replayed_error_does_not_end_the_wait_for_final_summary(in_message_queue, out_message_queue, tmp_path):
+    notes = tmp_path / "meeting_notes.md"
+    notes.write_text("# Notes")
+
+    async def serve(websocket):
+        await websocket.recv()  # hello
+        await websocket.recv()  # start
+        await websocket.send(json.dumps({"type": "recording", "recording": True, "session": "default",
+                                         "event_log": "log"}))
+        async for frame in websocket:
+            command = json.loads(frame)
+            if command["action"] == "stop":
+                # An error from earlier in the meeting, replayed e.g. after reconnecting
+                await websocket.send(json.dumps({"type": "error", "text": "LLM unavailable", "event_seq": 1,
+                                                 "replayed": True}))
+            elif command["action"] == "download_files":
+                await websocket.send(json.dumps({"type": "final_summary", "text": "notes", "event_seq": 2}))
+                for file_type in command["file_types"]:
+                    await send_file(websocket, str(notes), file_type)
+
+    async with websockets.serve(serve, "localhost", 0) as server:
+        class Config:
+            websocket_port = server.sockets[0].getsockname()[1]
+            websocket_wire_format = "json"
+
+        in_message_queue.put(("stop", "Standup"))
+        await asyncio.wait_for(websocket_client(in_message_queue, out_message_queue, Config()), timeout=10)
+
+    messages = [out_message_queue.get_nowait() for _ in range(out_message_queue.qsize())]
+    assert ("error", "LLM unavailable") in messages
+    assert ("final_summary", "notes") in messages
+    assert messages[-1] == ("stopped", None)
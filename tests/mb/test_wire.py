@@ -0,0 +1,57 @@
+import pytest
+from app.mb.wire import (
+    JSON, MSGPACK, WIRE_VERSION, WireCodec, WireError, hello_message, negotiate, run_benchmark,
+    sample_meeting, validate
+)
+
+def test_json_round_trip_is_compact():
+    codec = WireCodec(JSON)
+    message = {"type": "transcription", "text": "hello there", "seq": 3}
+
+    frame = codec.encode(message)
+
+    assert isinstance(frame, str)
+    assert " " not in frame.replace("hello there", "")
+    assert codec.decode(frame) == message
+
+def test_validate_rejects_bad_messages():
+    assert validate({"action": "summarize", "since_seq": 4})
+    assert validate({"type": "final_summary", "text": "done", "stop_latency_seconds": 2})
+
+    with pytest.raises(WireError):
+        validate({"type": "transcription"})
+    with pytest.raises(WireError):
+        validate({"action": "summarize", "since_seq": "4"})
+    with pytest.raises(WireError):
+        validate({"type": "summary_delta", "text": "a", "first": 1})
+    with pytest.raises(WireError):
+        validate({"action": "reboot"})
+    with pytest.raises(WireError):
+        WireCodec(JSON).decode("not json")
+
+def test_negotiate_falls_back_to_json():
+    codec, reply = negotiate({"action": "hello", "version": WIRE_VERSION, "formats": ["cbor", JSON]})
+
+    assert codec.format == JSON
+    assert reply == {"type": "hello", "version": WIRE_VERSION, "format": JSON}
+    with pytest.raises(WireError):
+        negotiate({"action": "hello", "version": 0})
+
+def test_msgpack_round_trip_is_smaller():
+    pytest.importorskip("msgpack")
+    codec, reply = negotiate(hello_message(MSGPACK))
+    message = {"type": "llm_status", "ready": True, "providers": {"local": {"state": "ready"}}}
+
+    frame = codec.encode(message)
+
+    assert reply["format"] == MSGPACK
+    assert isinstance(frame, bytes)
+    assert len(frame) < len(WireCodec(JSON).encode(message))
+    assert codec.decode(frame) == message
+
+def test_benchmark_reports_every_format():
+    report = run_benchmark(sample_meeting(20), rounds=1)
+
+    before = report["json.dumps (before)"]
+    assert report["wire json"]["bytes"] < before["bytes"]
+    assert all(row["deflated_bytes"] < row["bytes"] for row in report.values())